@@ -0,0 +1,129 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+class SqliteMappingStore:
+    """Stores all controller mappings in a single SQLite database
+
+    Lookups go through the primary key index on the controller ID and
+    batched writes are committed in one transaction, replacing the one JSON
+    file per controller layout.
+    """
+
+    def __init__(self, db_file: str):
+        self.db_file = db_file
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_file, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS controllers ("
+                " id TEXT PRIMARY KEY,"
+                " name TEXT,"
+                " key_mappings TEXT NOT NULL,"
+                " updated_at REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)"
+            )
+
+    def get(self, controller_id: str) -> Optional[Dict]:
+        """Get a controller record ({id, name, key_mappings}) or None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, name, key_mappings FROM controllers WHERE id = ?",
+                (controller_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        return {"id": row[0], "name": row[1], "key_mappings": json.loads(row[2])}
+
+    def put(self, controller_id: str, mappings: Dict[str, str], name: str = None):
+        """Insert or replace one controller's mappings"""
+        self.put_many([(controller_id, mappings, name)])
+
+    def put_many(self, records: Iterable[Tuple[str, Dict[str, str], Optional[str]]]):
+        """Insert or replace several controllers' mappings atomically"""
+        now = time.time()
+        rows = [
+            (
+                str(controller_id),
+                name or f"Controller {controller_id}",
+                json.dumps(mappings),
+                now,
+            )
+            for controller_id, mappings, name in records
+        ]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO controllers (id, name, key_mappings, updated_at)"
+                " VALUES (?, ?, ?, ?)",
+                rows,
+            )
+
+    def delete(self, controller_id: str):
+        """Remove a controller's mappings"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM controllers WHERE id = ?", (controller_id,))
+
+    def list_ids(self) -> List[str]:
+        """Get the IDs of all stored controllers"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id FROM controllers ORDER BY id"
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def migrate_json_files(self, config_dir: str) -> int:
+        """Import every controller_<id>.json file once, in one transaction
+
+        The JSON files are left in place. Returns the number of imported
+        controllers, or 0 if the migration already ran.
+        """
+        with self._lock:
+            done = self._conn.execute(
+                "SELECT value FROM meta WHERE key = 'json_migrated'"
+            ).fetchone()
+        if done:
+            return 0
+
+        records = []
+        for filename in sorted(os.listdir(config_dir)):
+            if not (filename.startswith("controller_") and filename.endswith(".json")):
+                continue
+            try:
+                with open(os.path.join(config_dir, filename), "r") as f:
+                    data = json.load(f)
+                controller_id = str(data.get("id", filename[11:-5]))
+                records.append(
+                    (controller_id, data.get("key_mappings", {}), data.get("name"))
+                )
+            except Exception as e:
+                print(f"Error migrating {filename}: {e}")
+
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO controllers (id, name, key_mappings, updated_at)"
+                " VALUES (?, ?, ?, ?)",
+                [
+                    (cid, name or f"Controller {cid}", json.dumps(mappings), now)
+                    for cid, mappings, name in records
+                ],
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('json_migrated', ?)",
+                (str(now),),
+            )
+        print(f"Migrated {len(records)} controller mapping files to {self.db_file}")
+        return len(records)
+
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            self._conn.close()
@@ -1,20 +1,99 @@
 import json
 import os
-from typing import Dict, Any
+import threading
+from typing import Dict, Any, Optional
+
+from config.settings_writer import settings_writer
+
+# Process-wide cache of parsed settings files: path -> (mtime_ns, size, data)
+_file_cache = {}
+_file_cache_lock = threading.Lock()
+
+# Shared settings managers by config directory
+_managers = {}
+_managers_lock = threading.Lock()
+
+
+def _read_json_cached(path):
+    """Read a JSON file through the process-wide cache
+
+    The cached data is reused while the file's modification time and size
+    are unchanged. Returns None if the file does not exist. Callers must
+    not mutate the returned data.
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+
+    key = os.path.abspath(path)
+    entry = _file_cache.get(key)
+    if entry and entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size:
+        return entry[2]
+
+    with open(path, "r") as f:
+        data = json.load(f)
+    with _file_cache_lock:
+        _file_cache[key] = (stat.st_mtime_ns, stat.st_size, data)
+    return data
+
+
+def _write_json_cached(path, data):
+    """Atomically write a JSON file and refresh its cache entry
+
+    The data is written to a temporary file that then replaces the target,
+    so readers never see a partially written file.
+    """
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    stat = os.stat(path)
+    with _file_cache_lock:
+        _file_cache[os.path.abspath(path)] = (stat.st_mtime_ns, stat.st_size, data)
+
+
+def invalidate_settings_cache(path=None):
+    """Drop one file (or every file) from the settings cache"""
+    with _file_cache_lock:
+        if path is None:
+            _file_cache.clear()
+        else:
+            _file_cache.pop(os.path.abspath(path), None)
+
+
+def get_settings_manager(config_dir="config"):
+    """Get the shared SettingsManager for a config directory"""
+    key = os.path.abspath(config_dir)
+    manager = _managers.get(key)
+    if manager is None:
+        with _managers_lock:
+            manager = _managers.get(key)
+            if manager is None:
+                manager = _managers[key] = SettingsManager(config_dir)
+    return manager
 
 
 class SettingsManager:
     """Manages application settings and key mappings"""
 
-    def __init__(self, config_dir="config"):
+    def __init__(self, config_dir="config", mapping_store=None):
         self.config_dir = config_dir
         self.default_mappings_file = os.path.join(config_dir, "default_mappings.json")
         self.mosquitto_settings_file = os.path.join(
             config_dir, "mosquitto_settings.json"
         )
+        self.app_settings_file = os.path.join(config_dir, "app_settings.json")
+        self.profiles_dir = os.path.join(config_dir, "profiles")
 
-        # Ensure config directory exists
+        # Ensure config directories exist
         os.makedirs(config_dir, exist_ok=True)
+        os.makedirs(self.profiles_dir, exist_ok=True)
 
         # Default key mappings
         self.default_mappings = {
@@ -34,27 +113,53 @@ class SettingsManager:
             "joystick2_right": "right",
         }
 
+        # Default application settings
+        self.default_app_settings = {
+            "keyboard_backend": None,  # None selects the platform default
+            "mapping_store": "json",  # "json" (one file per controller) or "sqlite"
+            "gui_refresh_rate": 30,  # GUI updates applied per second
+            "log_file": os.path.join("logs", "client.log"),  # None disables it
+            "log_rate_limit": 20,  # input event lines per controller and type per second
+            "journal_dir": None,  # directory for the binary input journal
+        }
+
+        # Controller mappings waiting for the writer thread, by controller ID
+        self._pending_mappings = {}
+        self._pending_lock = threading.Lock()
+
+        # Optional single-file store for controller mappings
+        self.mapping_store = None
+        store_type = mapping_store or self.load_app_settings().get("mapping_store")
+        if store_type == "sqlite":
+            from config.mapping_store import SqliteMappingStore
+
+            self.mapping_store = SqliteMappingStore(
+                os.path.join(config_dir, "mappings.db")
+            )
+            self.mapping_store.migrate_json_files(config_dir)
+
     def load_default_mappings(self) -> Dict[str, str]:
         """Load default key mappings from file, create if doesn't exist"""
         try:
-            if os.path.exists(self.default_mappings_file):
-                with open(self.default_mappings_file, "r") as f:
-                    data = json.load(f)
-                    return data.get("key_mappings", self.default_mappings)
+            data = _read_json_cached(self.default_mappings_file)
+            if data is not None:
+                return dict(data.get("key_mappings", self.default_mappings))
             else:
                 # Create default file
                 self.save_default_mappings(self.default_mappings)
-                return self.default_mappings
+                return dict(self.default_mappings)
         except Exception as e:
             print(f"Error loading default mappings: {e}")
-            return self.default_mappings
+            return dict(self.default_mappings)
 
     def save_default_mappings(self, mappings: Dict[str, str]):
         """Save default key mappings to file"""
         try:
-            data = {"name": "Default Controller Mapping", "key_mappings": mappings}
-            with open(self.default_mappings_file, "w") as f:
-                json.dump(data, f, indent=2)
+            data = {
+                "name": "Default Controller Mapping",
+                "key_mappings": dict(mappings),
+            }
+            _write_json_cached(self.default_mappings_file, data)
             print(f"Saved default mappings to {self.default_mappings_file}")
         except Exception as e:
             print(f"Error saving default mappings: {e}")
@@ -65,10 +170,12 @@ class SettingsManager:
             self.config_dir, f"controller_{controller_id}.json"
         )
         try:
-            if os.path.exists(controller_file):
-                with open(controller_file, "r") as f:
-                    data = json.load(f)
-                    return data.get("key_mappings", self.load_default_mappings())
+            if self.mapping_store is not None:
+                data = self.mapping_store.get(str(controller_id))
+            else:
+                data = _read_json_cached(controller_file)
+            if data is not None and "key_mappings" in data:
+                return dict(data["key_mappings"])
             else:
                 # Return default mappings for new controllers
                 return self.load_default_mappings()
@@ -76,6 +183,25 @@ class SettingsManager:
             print(f"Error loading controller {controller_id} mappings: {e}")
             return self.load_default_mappings()
 
+    def load_controller_record(self, controller_id: str) -> Optional[Dict[str, Any]]:
+        """Load a controller's stored record ({id, name, key_mappings}) as is
+
+        Unlike load_controller_mappings there is no fallback to the default
+        mappings: returns None if nothing is stored and raises if the stored
+        record cannot be read or has no key_mappings object.
+        """
+        if self.mapping_store is not None:
+            data = self.mapping_store.get(str(controller_id))
+        else:
+            data = _read_json_cached(
+                os.path.join(self.config_dir, f"controller_{controller_id}.json")
+            )
+        if data is None:
+            return None
+        if not isinstance(data, dict) or not isinstance(data.get("key_mappings"), dict):
+            raise ValueError("no key_mappings object")
+        return data
+
     def save_controller_mappings(
         self, controller_id: str, mappings: Dict[str, str], name: str = None
     ):
@@ -84,23 +210,85 @@ class SettingsManager:
             self.config_dir, f"controller_{controller_id}.json"
         )
         try:
+            if self.mapping_store is not None:
+                self.mapping_store.put(str(controller_id), mappings, name)
+                return
+
             data = {
                 "id": controller_id,
                 "name": name or f"Controller {controller_id}",
-                "key_mappings": mappings,
+                "key_mappings": dict(mappings),
             }
-            with open(controller_file, "w") as f:
-                json.dump(data, f, indent=2)
+            _write_json_cached(controller_file, data)
             print(f"Saved controller {controller_id} mappings to {controller_file}")
         except Exception as e:
             print(f"Error saving controller {controller_id} mappings: {e}")
 
+    def save_controller_mappings_async(
+        self, controller_id: str, mappings: Dict[str, str], name: str = None
+    ):
+        """Schedule a controller's mappings to be saved on the writer thread
+
+        Repeated saves of the same controller within the writer's delay are
+        coalesced into one write of the latest mappings, and every controller
+        saved in that window is written in one batch (one transaction with
+        the SQLite store).
+        """
+        with self._pending_lock:
+            self._pending_mappings[str(controller_id)] = (
+                controller_id,
+                dict(mappings),
+                name,
+            )
+        settings_writer.schedule(
+            (os.path.abspath(self.config_dir), "controller_mappings"),
+            self._write_pending_mappings,
+        )
+
+    def _write_pending_mappings(self):
+        with self._pending_lock:
+            records = list(self._pending_mappings.values())
+            self._pending_mappings.clear()
+        if records:
+            self.save_many_controller_mappings(records)
+
+    def save_many_controller_mappings(self, records):
+        """Save (controller_id, mappings, name) records in one batch
+
+        With the SQLite store the batch is written in a single transaction.
+        """
+        if self.mapping_store is not None:
+            try:
+                self.mapping_store.put_many(
+                    (str(cid), mappings, name) for cid, mappings, name in records
+                )
+            except Exception as e:
+                print(f"Error saving controller mappings: {e}")
+            return
+
+        for controller_id, mappings, name in records:
+            self.save_controller_mappings(controller_id, mappings, name)
+
+    def get_controller_name(self, controller_id: str) -> Optional[str]:
+        """Get the stored name of a controller, if any"""
+        try:
+            if self.mapping_store is not None:
+                data = self.mapping_store.get(str(controller_id))
+            else:
+                data = _read_json_cached(
+                    os.path.join(self.config_dir, f"controller_{controller_id}.json")
+                )
+            return data.get("name") if data else None
+        except Exception as e:
+            print(f"Error loading controller {controller_id} name: {e}")
+            return None
+
     def load_mosquitto_settings(self) -> Dict[str, Any]:
         """Load Mosquitto settings"""
         try:
-            if os.path.exists(self.mosquitto_settings_file):
-                with open(self.mosquitto_settings_file, "r") as f:
-                    return json.load(f)
+            data = _read_json_cached(self.mosquitto_settings_file)
+            if data is not None:
+                return dict(data)
             else:
                 # Return default settings
                 default_settings = {
@@ -120,12 +308,105 @@ class SettingsManager:
     def save_mosquitto_settings(self, settings: Dict[str, Any]):
         """Save Mosquitto settings"""
         try:
-            with open(self.mosquitto_settings_file, "w") as f:
-                json.dump(settings, f, indent=2)
+            _write_json_cached(self.mosquitto_settings_file, dict(settings))
             print(f"Saved Mosquitto settings to {self.mosquitto_settings_file}")
         except Exception as e:
             print(f"Error saving Mosquitto settings: {e}")
 
+    def load_app_settings(self) -> Dict[str, Any]:
+        """Load application settings merged over the defaults"""
+        settings = dict(self.default_app_settings)
+        try:
+            data = _read_json_cached(self.app_settings_file)
+            if data is not None:
+                settings.update(data)
+        except Exception as e:
+            print(f"Error loading application settings: {e}")
+        return settings
+
+    def save_app_settings(self, settings: Dict[str, Any]):
+        """Save application settings"""
+        try:
+            _write_json_cached(self.app_settings_file, dict(settings))
+            print(f"Saved application settings to {self.app_settings_file}")
+        except Exception as e:
+            print(f"Error saving application settings: {e}")
+
+    def _profile_file(self, name: str) -> str:
+        """Get the file of a named mapping profile"""
+        safe_name = "".join(c if c.isalnum() or c in "-_ " else "_" for c in name)
+        return os.path.join(self.profiles_dir, f"{safe_name}.json")
+
+    def get_profile_names(self) -> list:
+        """Get the names of all saved mapping profiles"""
+        return sorted(self.load_profiles())
+
+    def load_profiles(self) -> Dict[str, Dict[str, str]]:
+        """Load every mapping profile as name -> key mappings"""
+        profiles = {}
+        try:
+            filenames = sorted(os.listdir(self.profiles_dir))
+        except Exception as e:
+            print(f"Error getting profile files: {e}")
+            return profiles
+        for filename in filenames:
+            if not filename.endswith(".json"):
+                continue
+            try:
+                data = _read_json_cached(os.path.join(self.profiles_dir, filename))
+                if data is not None and "key_mappings" in data:
+                    name = data.get("name", filename[: -len(".json")])
+                    profiles[name] = dict(data["key_mappings"])
+            except Exception as e:
+                print(f"Error loading profile {filename}: {e}")
+        return profiles
+
+    def save_profile(self, name: str, mappings: Dict[str, str]):
+        """Save a named mapping profile"""
+        profile_file = self._profile_file(name)
+        try:
+            _write_json_cached(
+                profile_file, {"name": name, "key_mappings": dict(mappings)}
+            )
+            print(f"Saved profile '{name}' to {profile_file}")
+        except Exception as e:
+            print(f"Error saving profile '{name}': {e}")
+
+    def delete_profile(self, name: str):
+        """Delete a named mapping profile"""
+        profile_file = self._profile_file(name)
+        try:
+            os.remove(profile_file)
+            invalidate_settings_cache(profile_file)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"Error deleting profile '{name}': {e}")
+
+    def preload(self):
+        """Read every settings file into the cache ahead of time
+
+        Call at startup so controller registrations are served from memory.
+        Returns the number of controller files loaded.
+        """
+        self.load_default_mappings()
+        self.load_mosquitto_settings()
+        self.load_app_settings()
+        self.load_profiles()
+
+        # The SQLite store serves indexed lookups without a file cache
+        if self.mapping_store is not None:
+            return len(self.mapping_store.list_ids())
+
+        loaded = 0
+        for filename in self.get_all_controller_files():
+            try:
+                _read_json_cached(os.path.join(self.config_dir, filename))
+                loaded += 1
+            except Exception as e:
+                print(f"Error preloading {filename}: {e}")
+        return loaded
+
     def get_all_controller_files(self) -> list:
         """Get list of all controller configuration files"""
         try:
@@ -0,0 +1,109 @@
+import threading
+import time
+from typing import Callable, Dict, Hashable, Optional, Tuple
+
+# Seconds a scheduled write waits for newer writes of the same key
+DEFAULT_WRITE_DELAY = 0.5
+
+
+class SettingsWriter:
+    """Writes settings on a background thread, coalescing repeated saves
+
+    Each write is scheduled under a key (e.g. a controller ID). Scheduling
+    the same key again before its delay has elapsed replaces the pending
+    write, so a burst of saves results in a single write of the latest data.
+    """
+
+    def __init__(self, delay: float = DEFAULT_WRITE_DELAY):
+        self.delay = delay
+        self._pending: Dict[Hashable, Tuple[float, Callable[[], None]]] = {}
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+
+        # Metrics
+        self.scheduled = 0
+        self.written = 0
+
+    def start(self):
+        """Start the writer thread"""
+        with self._condition:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(
+            target=self._run, name="settings-writer", daemon=True
+        )
+        self._thread.start()
+
+    def schedule(self, key: Hashable, write: Callable[[], None]):
+        """Schedule a write, replacing any pending write with the same key"""
+        if not self._running:
+            self.start()
+        with self._condition:
+            # Keep the original deadline so constant saves still get written
+            deadline = self._pending.get(key, (time.monotonic() + self.delay,))[0]
+            self._pending[key] = (deadline, write)
+            self.scheduled += 1
+            self._condition.notify()
+
+    def flush(self):
+        """Perform every pending write now, on the calling thread"""
+        with self._condition:
+            writes = [write for _, write in self._pending.values()]
+            self._pending.clear()
+        for write in writes:
+            self._perform(write)
+
+    def stop(self):
+        """Flush pending writes and stop the writer thread"""
+        with self._condition:
+            self._running = False
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def get_metrics(self):
+        """Get scheduled/written counters and the pending write count"""
+        with self._condition:
+            return {
+                "pending": len(self._pending),
+                "scheduled": self.scheduled,
+                "written": self.written,
+            }
+
+    def _perform(self, write):
+        try:
+            write()
+            self.written += 1
+        except Exception as e:
+            print(f"Error writing settings: {e}")
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._running:
+                    now = time.monotonic()
+                    due = [k for k, (t, _) in self._pending.items() if t <= now]
+                    if due:
+                        break
+                    timeout = None
+                    if self._pending:
+                        timeout = min(t for t, _ in self._pending.values()) - now
+                    self._condition.wait(timeout)
+                if not self._running:
+                    return
+                writes = [self._pending.pop(key)[1] for key in due]
+            for write in writes:
+                self._perform(write)
+
+
+# Process-wide writer shared by all settings managers
+settings_writer = SettingsWriter()
+
+
+def flush_settings_writes():
+    """Write out every pending settings change; call before exiting"""
+    settings_writer.stop()
@@ -0,0 +1,159 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import threading
+from typing import Callable, Dict, Optional, Tuple
+
+# inotify constants from sys/inotify.h
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+# struct inotify_event: int wd, uint32 mask, uint32 cookie, uint32 len, name
+INOTIFY_EVENT = struct.Struct("iIII")
+
+DEFAULT_POLL_INTERVAL = 1.0
+
+
+def controller_id_from_filename(filename: str) -> Optional[str]:
+    """Get the controller ID of a controller_<id>.json file name, or None"""
+    if filename.startswith("controller_") and filename.endswith(".json"):
+        return filename[len("controller_") : -len(".json")]
+    return None
+
+
+def _load_inotify():
+    """Get libc if it provides inotify, else None"""
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        libc.inotify_init1
+        libc.inotify_add_watch
+    except (OSError, AttributeError, TypeError):
+        return None
+    return libc
+
+
+class MappingFileWatcher:
+    """Watches controller mapping files and reports which ones changed
+
+    Uses inotify on Linux and falls back to polling file modification times
+    elsewhere. ``on_change`` is called with the controller ID of each
+    changed file from the watcher thread.
+    """
+
+    def __init__(
+        self,
+        config_dir: str,
+        on_change: Callable[[str], None],
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+        use_inotify: bool = True,
+    ):
+        self.config_dir = config_dir
+        self.on_change = on_change
+        self.poll_interval = poll_interval
+        self.use_inotify = use_inotify
+        self.mode = None
+        self._thread = None
+        self._stop = threading.Event()
+
+    def start(self):
+        """Start watching in a background thread"""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        libc = _load_inotify() if self.use_inotify else None
+        fd = -1
+        if libc is not None:
+            fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+            if fd >= 0:
+                wd = libc.inotify_add_watch(
+                    fd,
+                    os.fsencode(os.path.abspath(self.config_dir)),
+                    IN_CLOSE_WRITE | IN_MOVED_TO,
+                )
+                if wd < 0:
+                    os.close(fd)
+                    fd = -1
+
+        if fd >= 0:
+            self.mode = "inotify"
+            target, args = self._run_inotify, (fd,)
+        else:
+            self.mode = "poll"
+            target, args = self._run_poll, ()
+        self._thread = threading.Thread(
+            target=target, args=args, name="mapping-watcher", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        """Stop watching"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _notify(self, controller_ids):
+        for controller_id in sorted(controller_ids):
+            try:
+                self.on_change(controller_id)
+            except Exception as e:
+                print(f"Error reloading controller {controller_id} mappings: {e}")
+
+    def _run_inotify(self, fd):
+        try:
+            while not self._stop.is_set():
+                readable, _, _ = select.select([fd], [], [], self.poll_interval)
+                if not readable:
+                    continue
+                try:
+                    data = os.read(fd, 64 * 1024)
+                except BlockingIOError:
+                    continue
+
+                # Several events for one save collapse into one reload
+                changed = set()
+                offset = 0
+                while offset + INOTIFY_EVENT.size <= len(data):
+                    _, _, _, length = INOTIFY_EVENT.unpack_from(data, offset)
+                    offset += INOTIFY_EVENT.size
+                    name = data[offset : offset + length].rstrip(b"\0")
+                    offset += length
+                    controller_id = controller_id_from_filename(os.fsdecode(name))
+                    if controller_id is not None:
+                        changed.add(controller_id)
+                self._notify(changed)
+        finally:
+            os.close(fd)
+
+    def _snapshot(self) -> Dict[str, Tuple[int, int]]:
+        snapshot = {}
+        try:
+            filenames = os.listdir(self.config_dir)
+        except OSError:
+            return snapshot
+        for filename in filenames:
+            controller_id = controller_id_from_filename(filename)
+            if controller_id is None:
+                continue
+            try:
+                stat = os.stat(os.path.join(self.config_dir, filename))
+            except OSError:
+                continue
+            snapshot[controller_id] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def _run_poll(self):
+        previous = self._snapshot()
+        while not self._stop.wait(self.poll_interval):
+            current = self._snapshot()
+            changed = {
+                controller_id
+                for controller_id, signature in current.items()
+                if previous.get(controller_id) != signature
+            }
+            previous = current
+            self._notify(changed)
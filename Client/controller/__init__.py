@@ -1,4 +1,11 @@
 # Controller package
 from controller.game_controller import GameController, DEFAULT_MAPPINGS
+from controller.profiles import Profile, ProfileLibrary, profile_library
 
-__all__ = ["GameController", "DEFAULT_MAPPINGS"]
+__all__ = [
+    "GameController",
+    "DEFAULT_MAPPINGS",
+    "Profile",
+    "ProfileLibrary",
+    "profile_library",
+]
@@ -1,6 +1,9 @@
 import os
 import json
-from config.settings import SettingsManager
+from collections import namedtuple
+from config.settings import get_settings_manager
+from utils.keyboard import resolve_key
+from utils.key_state import key_state
 
 # Default key mappings
 DEFAULT_MAPPINGS = {
@@ -18,6 +21,50 @@ DEFAULT_MAPPINGS = {
     "joystick2_right": "right",
 }
 
+# Order of the direction entries in a compiled joystick table
+JOYSTICK_DIRECTIONS = ("up", "down", "left", "right")
+
+# Key mappings resolved to native key codes, addressed by control index:
+# buttons[n] is (key, code) or None for button n, joysticks[n] is a tuple
+# of (key, code) or None entries in JOYSTICK_DIRECTIONS order for joystick n
+CompiledMappings = namedtuple("CompiledMappings", ["buttons", "joysticks"])
+
+
+def _resolve_entry(key):
+    """Resolve a mapped key name to a (key, code) pair, None if unmapped"""
+    if not key:
+        return None
+    code = resolve_key(key)
+    if code is None:
+        print(f"Key '{key}' not supported")
+        return None
+    return key, code
+
+
+def compile_key_mappings(key_mappings):
+    """Compile control -> key name mappings into index-addressed tables"""
+    buttons = {}
+    joysticks = {}
+    for control, key in key_mappings.items():
+        if control.startswith("button") and control[6:].isdigit():
+            buttons[int(control[6:])] = _resolve_entry(key)
+        elif control.startswith("joystick") and "_" in control:
+            number, direction = control[8:].split("_", 1)
+            if number.isdigit() and direction in JOYSTICK_DIRECTIONS:
+                joysticks.setdefault(int(number), {})[direction] = _resolve_entry(key)
+
+    button_table = [None] * (max(buttons, default=0) + 1)
+    for number, entry in buttons.items():
+        button_table[number] = entry
+
+    joystick_table = [None] * (max(joysticks, default=0) + 1)
+    for number, directions in joysticks.items():
+        joystick_table[number] = tuple(
+            directions.get(direction) for direction in JOYSTICK_DIRECTIONS
+        )
+
+    return CompiledMappings(tuple(button_table), tuple(joystick_table))
+
 
 class GameController:
     def __init__(self, controller_id, settings_manager=None):
@@ -36,20 +83,62 @@ class GameController:
             2: {"x": 512, "y": 512, "pressed": False},
         }
         self.active_keys = set()
+        self.profile = None
 
         # Use settings manager for key mappings
-        self.settings_manager = settings_manager or SettingsManager()
+        self.settings_manager = settings_manager or get_settings_manager()
         self.key_mappings = self.settings_manager.load_controller_mappings(
             controller_id
         )
 
+    @property
+    def key_mappings(self):
+        """Control name -> key name mappings of this controller"""
+        return self._key_mappings
+
+    @key_mappings.setter
+    def key_mappings(self, mappings):
+        self._key_mappings = mappings
+        self.profile = None
+        self.compile_mappings()
+
+    def compile_mappings(self):
+        """Rebuild the compiled key tables used on the input hot path"""
+        # Built completely before the single attribute swap, so the input
+        # thread always sees either the old or the new tables
+        self.compiled_mappings = compile_key_mappings(self._key_mappings)
+
+    def install_mappings(self, mappings, compiled):
+        """Swap in mappings already compiled with compile_key_mappings
+
+        Lets the tables be compiled on another thread, so only the swap
+        runs on the input thread.
+        """
+        self._key_mappings = mappings
+        self.compiled_mappings = compiled
+        self.profile = None
+
     def update_key_mapping(self, control, key):
         """Update a key mapping for this controller"""
-        self.key_mappings[control] = key
+        self._key_mappings[control] = key
+        self.compile_mappings()
+
+    def apply_profile(self, profile):
+        """Switch to a precompiled profile, releasing keys held under the old one
+
+        Must run on the input thread (see mqtt.client.submit_input_task).
+        """
+        self._key_mappings = dict(profile.key_mappings)
+        self.compiled_mappings = profile.compiled
+        self.profile = profile.name
+
+        # Keys pressed through the old tables would otherwise stay down
+        key_state.release_controller(self.id)
+        self.active_keys.clear()
 
     def save_mappings(self):
-        """Save the controller's key mappings to a file"""
-        self.settings_manager.save_controller_mappings(
+        """Save the controller's key mappings in the background"""
+        self.settings_manager.save_controller_mappings_async(
             self.id, self.key_mappings, self.name
         )
 
@@ -73,6 +162,7 @@ class GameController:
             "id": self.id,
             "name": self.name,
             "key_mappings": self.key_mappings.copy(),
+            "profile": self.profile,
             "button_states": self.button_states.copy(),
             "joystick_states": self.joystick_states.copy(),
         }
@@ -0,0 +1,56 @@
+import threading
+from collections import namedtuple
+from config.settings import get_settings_manager
+from controller.game_controller import compile_key_mappings
+
+# A named set of key mappings together with its compiled tables
+Profile = namedtuple("Profile", ["name", "key_mappings", "compiled"])
+
+
+class ProfileLibrary:
+    """Named mapping profiles, compiled once so switching is a lookup"""
+
+    def __init__(self):
+        self._profiles = {}
+        self._lock = threading.Lock()
+
+    def load(self, settings_manager=None):
+        """Load and compile every profile saved by the settings manager
+
+        Must run after the keyboard backend is selected, since compiled
+        tables hold backend key codes. Returns the number of profiles.
+        """
+        settings_manager = settings_manager or get_settings_manager()
+        profiles = {
+            name: Profile(name, mappings, compile_key_mappings(mappings))
+            for name, mappings in settings_manager.load_profiles().items()
+        }
+        with self._lock:
+            self._profiles = profiles
+        return len(profiles)
+
+    def add(self, name, key_mappings, settings_manager=None):
+        """Compile a profile, keep it and save it to disk"""
+        profile = Profile(name, dict(key_mappings), compile_key_mappings(key_mappings))
+        with self._lock:
+            self._profiles = {**self._profiles, name: profile}
+        (settings_manager or get_settings_manager()).save_profile(name, key_mappings)
+        return profile
+
+    def remove(self, name, settings_manager=None):
+        """Forget a profile and delete it from disk"""
+        with self._lock:
+            self._profiles = {k: v for k, v in self._profiles.items() if k != name}
+        (settings_manager or get_settings_manager()).delete_profile(name)
+
+    def get(self, name):
+        """Get a compiled profile by name, or None"""
+        return self._profiles.get(name)
+
+    def names(self):
+        """Get the names of all profiles"""
+        return sorted(self._profiles)
+
+
+# Process-wide profile library
+profile_library = ProfileLibrary()
@@ -2,13 +2,59 @@ import os
 import sys
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-from PIL import Image, ImageTk
 import json
 import socket
 import subprocess
 import shutil
+import threading
 import time
 
+from controller.profiles import profile_library
+from mqtt.client import switch_profile, submit_input_task, get_latency_metrics
+from utils.ui_queue import UIEventQueue
+from utils.log_buffer import LogBuffer
+from utils.list_model import KeyedRowModel
+
+# Default rate at which queued GUI updates are applied
+DEFAULT_REFRESH_RATE = 30
+
+# Milliseconds between refreshes of the latency column
+LATENCY_REFRESH_INTERVAL = 1000
+
+
+def load_resized_photo(image_path, size):
+    """Load an image resized to size as a Tk photo
+
+    The resized copy is cached in a .cache directory next to the image, so
+    PIL is only imported when the cache is missing or outdated and later
+    launches load the PNG with tk.PhotoImage directly. If the cache cannot
+    be written (e.g. a read-only install) the image is resized in memory.
+    """
+    cache_dir = os.path.join(os.path.dirname(image_path), ".cache")
+    name = os.path.splitext(os.path.basename(image_path))[0]
+    cache_path = os.path.join(cache_dir, f"{name}_{size[0]}x{size[1]}.png")
+
+    if not os.path.exists(cache_path) or os.path.getmtime(
+        cache_path
+    ) < os.path.getmtime(image_path):
+        from PIL import Image, ImageTk
+
+        with Image.open(image_path) as image:
+            resized = image.resize(size, Image.LANCZOS)
+        try:
+            if not os.path.isdir(cache_dir):
+                os.makedirs(cache_dir)
+                # Keep generated files out of version control
+                with open(os.path.join(cache_dir, ".gitignore"), "w") as f:
+                    f.write("*\n")
+            resized.save(cache_path)
+        except OSError as e:
+            print(f"Could not cache resized image {cache_path}: {e}")
+            return ImageTk.PhotoImage(resized)
+
+    return tk.PhotoImage(file=cache_path)
+
+
 # Import DEFAULT_MAPPINGS from main module
 try:
     from main import DEFAULT_MAPPINGS
@@ -31,9 +77,16 @@ except ImportError:
 
 
 class GameControllerGUI(tk.Tk):
-    def __init__(self, controllers, settings_manager=None):
+    def __init__(
+        self, controllers, settings_manager=None, refresh_rate=DEFAULT_REFRESH_RATE
+    ):
         super().__init__()
 
+        # Updates from MQTT threads are queued and applied on this thread
+        self._ui_thread_id = threading.get_ident()
+        self.ui_queue = UIEventQueue()
+        self.refresh_interval = max(1, int(1000 / refresh_rate))
+
         self.title("Game Controller Configuration")
         self.geometry("800x600")
 
@@ -70,8 +123,7 @@ class GameControllerGUI(tk.Tk):
         if os.path.exists(icon_path):
             try:
                 # Load and set the icon
-                icon_image = Image.open(icon_path)
-                icon_photo = ImageTk.PhotoImage(icon_image)
+                icon_photo = tk.PhotoImage(file=icon_path)
                 self.iconphoto(True, icon_photo)
                 # Keep a reference to prevent garbage collection
                 self._icon_photo = icon_photo
@@ -91,11 +143,7 @@ class GameControllerGUI(tk.Tk):
         )
         if os.path.exists(image_path):
             try:
-                self.controller_image = Image.open(image_path)
-                self.controller_image = self.controller_image.resize(
-                    (400, 300), Image.LANCZOS
-                )
-                self.controller_photo = ImageTk.PhotoImage(self.controller_image)
+                self.controller_photo = load_resized_photo(image_path, (400, 300))
             except Exception as e:
                 print(f"Error loading controller image: {e}")
                 self.controller_photo = None
@@ -112,6 +160,28 @@ class GameControllerGUI(tk.Tk):
         # Bind key press events for mapping
         self.bind("<Key>", self.on_key_press)
 
+        # Live input state labels by controller ID
+        self.controller_state_labels = {}
+
+        # Start applying queued updates
+        self.after(self.refresh_interval, self.process_ui_queue)
+        self.after(LATENCY_REFRESH_INTERVAL, self.refresh_latency)
+
+    def on_ui_thread(self):
+        """Check whether the caller is the GUI thread"""
+        return threading.get_ident() == self._ui_thread_id
+
+    def process_ui_queue(self):
+        """Apply queued GUI updates, then schedule the next tick"""
+        self.ui_queue.drain()
+        self.flush_log_messages()
+        self.after(self.refresh_interval, self.process_ui_queue)
+
+    def refresh_latency(self):
+        """Refresh the latency column, then schedule the next refresh"""
+        self.refresh_controllers()
+        self.after(LATENCY_REFRESH_INTERVAL, self.refresh_latency)
+
     def setup_tabs(self):
         """Set up the tabs for the GUI"""
         # Create the controllers tab
@@ -137,10 +207,22 @@ class GameControllerGUI(tk.Tk):
         )
         self.controllers_list_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
 
-        # Create a listbox for the controllers
-        self.controllers_listbox = tk.Listbox(self.controllers_list_frame, height=10)
-        self.controllers_listbox.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
-        self.controllers_listbox.bind("<<ListboxSelect>>", self.on_controller_select)
+        # Create a tree of controllers, one row per controller ID
+        self.controllers_tree = ttk.Treeview(
+            self.controllers_list_frame,
+            columns=("id", "name", "latency"),
+            show="headings",
+            selectmode="browse",
+            height=10,
+        )
+        self.controllers_tree.heading("id", text="ID")
+        self.controllers_tree.heading("name", text="Name")
+        self.controllers_tree.heading("latency", text="Input -> Key p50 / p99 / p99.9")
+        self.controllers_tree.column("id", width=80, stretch=False)
+        self.controllers_tree.column("latency", width=220, stretch=False)
+        self.controllers_tree.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        self.controllers_tree.bind("<<TreeviewSelect>>", self.on_controller_select)
+        self.controller_rows = KeyedRowModel()
 
         # Add a refresh button
         self.refresh_button = ttk.Button(
@@ -286,6 +368,9 @@ class GameControllerGUI(tk.Tk):
 
     def setup_log_tab(self):
         """Set up the log tab with a text widget for displaying logs"""
+        # Lines are buffered from any thread and shown once per refresh tick
+        self.log_buffer = LogBuffer()
+
         # Create text widget and scrollbar
         self.log_text = tk.Text(self.log_frame, wrap=tk.WORD, height=20)
         self.log_text.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
@@ -306,14 +391,32 @@ class GameControllerGUI(tk.Tk):
         self.log_text.tag_configure("timestamp", foreground="gray")
 
     def add_log_message(self, message):
-        """Add a message to the log display"""
+        """Add a message to the log display; safe to call from any thread"""
+        self.log_buffer.append(message)
+
+    def flush_log_messages(self):
+        """Show buffered log lines with one insert and trim old lines in bulk"""
+        lines = self.log_buffer.take_pending()
+        if not lines:
+            return
+
+        # Only follow new lines if the view is already at the bottom
+        at_bottom = self.log_text.yview()[1] >= 0.999
+
         self.log_text.config(state=tk.NORMAL)
-        self.log_text.insert(tk.END, message + "\n")
+        self.log_text.insert(tk.END, "\n".join(lines) + "\n")
+        line_count = int(self.log_text.index("end-1c").split(".")[0]) - 1
+        excess = line_count - self.log_buffer.max_lines
+        if excess > 0:
+            self.log_text.delete("1.0", f"{excess + 1}.0")
         self.log_text.config(state=tk.DISABLED)
-        self.log_text.see(tk.END)  # Auto-scroll to bottom
+
+        if at_bottom:
+            self.log_text.see(tk.END)
 
     def clear_logs(self):
         """Clear the log text widget"""
+        self.log_buffer.clear()
         self.log_text.config(state=tk.NORMAL)
         self.log_text.delete(1.0, tk.END)
         self.log_text.config(state=tk.DISABLED)
@@ -351,19 +454,30 @@ class GameControllerGUI(tk.Tk):
 
     def update_controllers(self, controllers):
         """Update the list of controllers"""
+        if not self.on_ui_thread():
+            self.ui_queue.post(self.update_controllers, controllers, key="controllers")
+            return
         self.controllers = controllers
         self.refresh_controllers()
 
     def refresh_controllers(self):
-        """Refresh the listbox of controllers"""
-        self.controllers_listbox.delete(0, tk.END)
-
-        # Add all current controllers to the listbox
-        for controller_id, controller in self.controllers.items():
-            display_name = f"Controller {controller_id}"
-            if hasattr(controller, "name") and controller.name:
-                display_name = f"{display_name} ({controller.name})"
-            self.controllers_listbox.insert(tk.END, display_name)
+        """Refresh the tree of controllers, touching only rows that changed"""
+        latency = get_latency_metrics()
+        rows = {
+            controller_id: (
+                controller_id,
+                getattr(controller, "name", ""),
+                self.format_latency(latency.get(controller_id)),
+            )
+            for controller_id, controller in list(self.controllers.items())
+        }
+        removed, added, changed = self.controller_rows.diff(rows)
+        for controller_id in removed:
+            self.controllers_tree.delete(controller_id)
+        for controller_id, values in added:
+            self.controllers_tree.insert("", tk.END, iid=controller_id, values=values)
+        for controller_id, values in changed:
+            self.controllers_tree.item(controller_id, values=values)
 
         # Update status label
         if self.controllers:
@@ -373,6 +487,44 @@ class GameControllerGUI(tk.Tk):
         else:
             self.status_label.config(text="Waiting for controllers...")
 
+    def format_latency(self, metrics):
+        """Format a controller's receive-to-injection latency percentiles"""
+        inject = metrics.get("inject") if metrics else None
+        if not inject:
+            return "-"
+        text = " / ".join(
+            f"{inject[name] / 1000:.2f}" for name in ("p50_us", "p99_us", "p999_us")
+        )
+        text += " ms"
+        missed = metrics.get("missed_frames")
+        if missed:
+            text += f" ({missed} missed)"
+        return text
+
+    def update_controller_state(self, controller_id, control_type, number, value):
+        """Show a controller's input state; updates are collapsed per controller"""
+        # The label is refreshed from the controller itself, so only the
+        # latest update of each controller per tick needs to run
+        self.ui_queue.post(
+            self.show_controller_state, controller_id, key=("state", controller_id)
+        )
+
+    def show_controller_state(self, controller_id):
+        """Refresh the live input state label of a controller"""
+        label = self.controller_state_labels.get(controller_id)
+        controller = self.controllers.get(controller_id)
+        if label is None or controller is None or not label.winfo_exists():
+            return
+
+        pressed = [str(n) for n, down in controller.button_states.items() if down]
+        joysticks = [
+            f"Joystick {n}: ({state['x']}, {state['y']})"
+            for n, state in controller.joystick_states.items()
+        ]
+        label.config(
+            text=" | ".join([f"Buttons: {' '.join(pressed) or '-'}"] + joysticks)
+        )
+
     def update_server_status(self, is_running):
         """Update the server status display"""
         if is_running:
@@ -392,6 +544,9 @@ class GameControllerGUI(tk.Tk):
 
     def update_mqtt_status(self, is_connected):
         """Update the MQTT connection status display"""
+        if not self.on_ui_thread():
+            self.ui_queue.post(self.update_mqtt_status, is_connected, key="mqtt")
+            return
         if is_connected:
             self.mqtt_status_canvas.itemconfig(
                 self.mqtt_status_circle, fill="green", outline="darkgreen"
@@ -409,6 +564,11 @@ class GameControllerGUI(tk.Tk):
 
     def update_central_mqtt_status(self, is_connected):
         """Update the central MQTT connection status display"""
+        if not self.on_ui_thread():
+            self.ui_queue.post(
+                self.update_central_mqtt_status, is_connected, key="central_mqtt"
+            )
+            return
         if is_connected:
             self.central_mqtt_canvas.itemconfig(
                 self.central_mqtt_circle, fill="green", outline="darkgreen"
@@ -425,12 +585,10 @@ class GameControllerGUI(tk.Tk):
             )
 
     def on_controller_select(self, event):
-        """Handle selection of a controller from the listbox"""
-        selection = self.controllers_listbox.curselection()
+        """Handle selection of a controller from the tree"""
+        selection = self.controllers_tree.selection()
         if selection:
-            index = selection[0]
-            controller_id = list(self.controllers.keys())[index]
-            self.selected_controller_id = controller_id
+            self.selected_controller_id = selection[0]
 
     def configure_selected_controller(self):
         """Open the configuration tab for the selected controller"""
@@ -479,6 +637,45 @@ class GameControllerGUI(tk.Tk):
             side=tk.LEFT, padx=5
         )
 
+        # Live input state
+        state_label = ttk.Label(self.controller_map_frame, foreground="gray")
+        state_label.pack(fill=tk.X, padx=15)
+        self.controller_state_labels[controller_id] = state_label
+        self.show_controller_state(controller_id)
+
+        # Mapping profile frame
+        profile_frame = ttk.Frame(self.controller_map_frame)
+        profile_frame.pack(fill=tk.X, padx=10, pady=(0, 10))
+
+        ttk.Label(profile_frame, text="Profile:").pack(side=tk.LEFT, padx=5)
+        profile_var = tk.StringVar(value=controller.profile or "")
+        profile_combo = ttk.Combobox(
+            profile_frame,
+            textvariable=profile_var,
+            values=profile_library.names(),
+            width=27,
+        )
+        profile_combo.pack(side=tk.LEFT, padx=5)
+
+        ttk.Button(
+            profile_frame,
+            text="Apply Profile",
+            command=lambda: self.apply_profile(controller_id, profile_var.get()),
+        ).pack(side=tk.LEFT, padx=5)
+
+        def save_profile():
+            name = profile_var.get().strip()
+            if not name:
+                messagebox.showerror("Error", "Please enter a profile name")
+                return
+            profile_library.add(name, controller.key_mappings, self.settings_manager)
+            controller.profile = name
+            profile_combo.config(values=profile_library.names())
+
+        ttk.Button(profile_frame, text="Save as Profile", command=save_profile).pack(
+            side=tk.LEFT, padx=5
+        )
+
         # Controller image and mapping buttons
         if self.controller_photo:
             # Container for image and buttons
@@ -735,7 +932,7 @@ class GameControllerGUI(tk.Tk):
 
         # Update the mapping
         controller_id, control_name = self.current_mapping_control
-        self.controllers[controller_id].key_mappings[control_name] = key
+        self.controllers[controller_id].update_key_mapping(control_name, key)
 
         # Update the button text
         canvas_or_button, text_id = self.mapping_buttons[self.current_mapping_control]
@@ -782,7 +979,30 @@ class GameControllerGUI(tk.Tk):
         else:
             controller.key_mappings = DEFAULT_MAPPINGS.copy()
 
-        # Update all button texts
+        self.refresh_mapping_buttons(controller_id)
+
+        messagebox.showinfo("Reset", "Mappings reset to default")
+
+    def apply_profile(self, controller_id, profile_name):
+        """Switch a controller to a saved mapping profile"""
+        if profile_library.get(profile_name) is None:
+            messagebox.showerror("Error", f"Unknown profile: {profile_name}")
+            return
+
+        def switch():
+            # Runs on the input thread, which owns the key state
+            switch_profile(profile_name, controller_id)
+            self.ui_queue.post(
+                self.refresh_mapping_buttons,
+                controller_id,
+                key=("mappings", controller_id),
+            )
+
+        submit_input_task(switch)
+
+    def refresh_mapping_buttons(self, controller_id):
+        """Show a controller's current key mappings on its mapping buttons"""
+        controller = self.controllers[controller_id]
         for (cid, control_name), (canvas, text_id) in self.mapping_buttons.items():
             if cid == controller_id:
                 key = controller.key_mappings.get(control_name, "-")
@@ -791,8 +1011,6 @@ class GameControllerGUI(tk.Tk):
                 else:
                     text_id.config(text=key)
 
-        messagebox.showinfo("Reset", "Mappings reset to default")
-
     def validate_port(self, value):
         """Validate port number - only allow digits and ensure it's in valid range"""
         # Empty value is allowed during editing
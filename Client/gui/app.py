@@ -77,38 +77,37 @@ class GameControllerGUI(tk.Tk):
         """Update the list of controllers"""
         self.controllers = controllers
         self.refresh_controllers()
-        add_log(self, f"Controllers updated. Total controllers: {len(controllers)}")
 
     def refresh_controllers(self):
-        """Refresh the listbox of controllers"""
-        if hasattr(self, "controllers_listbox"):
-            self.controllers_listbox.delete(0, tk.END)
+        """Refresh the tree of controllers, touching only rows that changed"""
+        if hasattr(self, "controllers_tree"):
+            rows = {
+                controller_id: (controller.name, controller_id)
+                for controller_id, controller in list(self.controllers.items())
+            }
+            removed, added, changed = self.controller_rows.diff(rows)
+            for controller_id in removed:
+                self.controllers_tree.delete(controller_id)
+            for controller_id, values in added:
+                self.controllers_tree.insert(
+                    "", tk.END, iid=controller_id, values=values
+                )
+                add_log(self, f"Controller found: {values[0]} (ID: {controller_id})")
+            for controller_id, values in changed:
+                self.controllers_tree.item(controller_id, values=values)
 
             if not self.controllers:
                 self.status_label.config(text="No controllers connected")
-                add_log(self, "No controllers connected", "WARNING")
             else:
                 self.status_label.config(
                     text=f"{len(self.controllers)} controller(s) connected"
                 )
-                add_log(self, f"{len(self.controllers)} controller(s) connected")
-
-                for controller_id, controller in sorted(
-                    self.controllers.items(), key=lambda x: x[0]
-                ):
-                    self.controllers_listbox.insert(
-                        tk.END, f"{controller.name} (ID: {controller_id})"
-                    )
-                    add_log(
-                        self,
-                        f"Controller found: {controller.name} (ID: {controller_id})",
-                    )
 
     def on_controller_select(self, event):
-        """Handle selection of a controller from the listbox"""
-        if self.controllers_listbox.curselection():
-            index = self.controllers_listbox.curselection()[0]
-            controller_id = list(self.controllers.keys())[index]
+        """Handle selection of a controller from the tree"""
+        selection = self.controllers_tree.selection()
+        if selection:
+            controller_id = selection[0]
             self.selected_controller_id = controller_id
             add_log(
                 self,
@@ -1,5 +1,6 @@
 import tkinter as tk
 from tkinter import ttk
+from utils.list_model import KeyedRowModel
 
 
 def setup_controllers_tab(app):
@@ -10,10 +11,20 @@ def setup_controllers_tab(app):
     )
     app.controllers_list_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
 
-    # Create a listbox for the controllers
-    app.controllers_listbox = tk.Listbox(app.controllers_list_frame, height=10)
-    app.controllers_listbox.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
-    app.controllers_listbox.bind("<<ListboxSelect>>", app.on_controller_select)
+    # Create a tree of controllers, one row per controller ID
+    app.controllers_tree = ttk.Treeview(
+        app.controllers_list_frame,
+        columns=("name", "id"),
+        show="headings",
+        selectmode="browse",
+        height=10,
+    )
+    app.controllers_tree.heading("name", text="Name")
+    app.controllers_tree.heading("id", text="ID")
+    app.controllers_tree.column("id", width=80, stretch=False)
+    app.controllers_tree.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+    app.controllers_tree.bind("<<TreeviewSelect>>", app.on_controller_select)
+    app.controller_rows = KeyedRowModel()
 
     # Add a refresh button
     app.refresh_button = ttk.Button(
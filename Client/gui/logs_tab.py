@@ -1,6 +1,10 @@
 import tkinter as tk
 from tkinter import ttk, scrolledtext
 from datetime import datetime
+from utils.log_buffer import LogBuffer
+
+# Milliseconds between log view refreshes
+LOG_REFRESH_INTERVAL = 100
 
 
 def setup_logs_tab(app):
@@ -16,6 +20,10 @@ def setup_logs_tab(app):
     # Store the text widget reference in the app for later use
     app.log_text = log_text
 
+    # Lines are buffered and shown in batches
+    app.log_buffer = LogBuffer()
+    app.after(LOG_REFRESH_INTERVAL, lambda: refresh_logs(app))
+
     # Create control buttons frame
     control_frame = ttk.Frame(logs_frame)
     control_frame.pack(fill=tk.X, padx=10, pady=5)
@@ -35,19 +43,42 @@ def setup_logs_tab(app):
 
 def add_log(app, message, level="INFO"):
     """Add a new log entry to the log display"""
-    if not hasattr(app, "log_text"):
+    if not hasattr(app, "log_buffer"):
         return
 
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    log_entry = f"[{timestamp}] [{level}] {message}\n"
+    app.log_buffer.append(f"[{timestamp}] [{level}] {message}")
+
+
+def flush_logs(app):
+    """Insert buffered log entries in one batch, trimming the oldest lines"""
+    lines = app.log_buffer.take_pending()
+    if not lines:
+        return
+
+    # Only auto-scroll if the view is already at the bottom
+    at_bottom = app.log_text.yview()[1] >= 0.999
+
+    app.log_text.insert(tk.END, "\n".join(lines) + "\n")
+    line_count = int(app.log_text.index("end-1c").split(".")[0]) - 1
+    excess = line_count - app.log_buffer.max_lines
+    if excess > 0:
+        app.log_text.delete("1.0", f"{excess + 1}.0")
+
+    if at_bottom:
+        app.log_text.see(tk.END)
+
 
-    app.log_text.insert(tk.END, log_entry)
-    app.log_text.see(tk.END)  # Auto-scroll to the bottom
+def refresh_logs(app):
+    """Flush buffered log entries and schedule the next refresh"""
+    flush_logs(app)
+    app.after(LOG_REFRESH_INTERVAL, lambda: refresh_logs(app))
 
 
 def clear_logs(app):
     """Clear all logs from the display"""
     if hasattr(app, "log_text"):
+        app.log_buffer.clear()
         app.log_text.delete(1.0, tk.END)
 
 
@@ -0,0 +1,245 @@
+"""
+Headless Game Controller Client
+-------------------------------
+Runs the MQTT bridge, the key mapping engine and the keyboard backend
+without a GUI. Nothing in this entry point imports Tkinter, so it can run
+on machines without a display. Settings are read from the config
+directory and can be overridden with command line flags.
+"""
+
+import argparse
+import os
+import signal
+import threading
+
+# Ensure we're in the correct directory (Client directory)
+script_dir = os.path.dirname(os.path.abspath(__file__))
+os.chdir(script_dir)
+
+from mqtt.client import (
+    create_central_mqtt_client,
+    create_local_mqtt_client,
+    connect_to_central_mqtt,
+    connect_to_local_mqtt,
+    cleanup_mqtt,
+    cleanup_controllers,
+    start_ingest_worker,
+    stop_ingest_worker,
+    start_mapping_watcher,
+    stop_mapping_watcher,
+    is_mosquitto_running,
+    configure_log_throttle,
+    flush_log_summaries,
+    start_journal,
+    stop_journal,
+    start_session_capture,
+    stop_session_capture,
+    start_local_mosquitto,
+    log_event,
+    INGEST_QUEUE_SIZE,
+    LOCAL_MQTT_PORT,
+)
+from mqtt.ingest import OVERFLOW_EVICT_OR_BLOCK, OVERFLOW_POLICIES
+from config.settings import get_settings_manager
+from config.settings_writer import flush_settings_writes
+from controller.profiles import profile_library
+from utils.log_pipeline import start_logging, stop_logging
+from utils.keyboard import (
+    BACKEND_ENV_VAR,
+    select_backend,
+    close_backend,
+    get_backend_names,
+)
+
+# Seconds between attempts to reach a local broker that is not connected
+RECONNECT_INTERVAL = 5
+
+
+class HeadlessBridge:
+    """MQTT userdata standing in for the GUI in headless mode"""
+
+    def __init__(self, settings_manager, local_port):
+        self.settings_manager = settings_manager
+        self.local_port = local_port
+        self.mqtt_connected = None
+
+    def update_mqtt_status(self, is_connected):
+        """Log local broker connection changes"""
+        if is_connected != self.mqtt_connected:
+            self.mqtt_connected = is_connected
+            log_event(
+                "Local MQTT: Connected" if is_connected else "Local MQTT: Not Connected"
+            )
+
+    def update_controllers(self, controllers):
+        """Log the number of registered controllers"""
+        log_event(f"{len(controllers)} controller(s) connected")
+
+
+def parse_args(argv=None):
+    """Parse the headless command line"""
+    parser = argparse.ArgumentParser(
+        description="Run the Game Controller bridge without a GUI"
+    )
+    parser.add_argument(
+        "--config-dir", default="config", help="settings directory (default: config)"
+    )
+    parser.add_argument(
+        "--backend",
+        choices=get_backend_names(),
+        help=(
+            f"keyboard backend (default: ${BACKEND_ENV_VAR}, then app settings, "
+            "then the platform default)"
+        ),
+    )
+    parser.add_argument(
+        "--port", type=int, help="local broker port (default: Mosquitto settings)"
+    )
+    parser.add_argument(
+        "--no-central",
+        action="store_true",
+        help="do not connect to the central discovery server",
+    )
+    parser.add_argument(
+        "--start-mosquitto",
+        action="store_true",
+        help="start the local Mosquitto broker if it is not running",
+    )
+    parser.add_argument(
+        "--queue-size",
+        type=int,
+        default=INGEST_QUEUE_SIZE,
+        help=f"input queue capacity (default: {INGEST_QUEUE_SIZE})",
+    )
+    parser.add_argument(
+        "--overflow-policy",
+        choices=OVERFLOW_POLICIES,
+        default=OVERFLOW_EVICT_OR_BLOCK,
+        help=(
+            "what to do when the input queue is full (default: "
+            f"{OVERFLOW_EVICT_OR_BLOCK}, which waits for room when no superseded "
+            "joystick update can be evicted)"
+        ),
+    )
+    parser.add_argument(
+        "--log-file", help="rotating log file (default: app settings log_file)"
+    )
+    parser.add_argument(
+        "--log-rate-limit",
+        type=int,
+        help="input event log lines per controller and type per second, 0 for no limit",
+    )
+    parser.add_argument(
+        "--journal",
+        metavar="DIR",
+        help="record input and injected keys to a binary journal in DIR",
+    )
+    parser.add_argument(
+        "--capture",
+        metavar="FILE",
+        help="capture received controller messages to a session file for replay.py",
+    )
+    parser.add_argument(
+        "--no-coalesce",
+        action="store_true",
+        help="process every queued joystick/state message instead of the latest",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Headless entry point"""
+    args = parse_args(argv)
+
+    # Initialize settings manager
+    settings_manager = get_settings_manager(args.config_dir)
+    settings_manager.preload()
+    app_settings = settings_manager.load_app_settings()
+
+    # Format and write log records on a background thread
+    start_logging(log_file=args.log_file or app_settings.get("log_file"))
+    configure_log_throttle(
+        args.log_rate_limit
+        if args.log_rate_limit is not None
+        else app_settings.get("log_rate_limit")
+    )
+
+    # Select the keyboard output backend before any controller registers
+    select_backend(args.backend, configured=app_settings.get("keyboard_backend"))
+
+    # Compile mapping profiles once the backend's key codes are known
+    profile_library.load(settings_manager)
+
+    local_port = args.port
+    if local_port is None:
+        port_str = str(settings_manager.load_mosquitto_settings().get("port", ""))
+        local_port = int(port_str) if port_str.isdigit() else None
+    bridge = HeadlessBridge(settings_manager, local_port)
+
+    # Record received input and injected keys if configured
+    journal_dir = args.journal or app_settings.get("journal_dir")
+    if journal_dir:
+        start_journal(journal_dir)
+
+    # Capture raw controller messages for replay
+    if args.capture:
+        start_session_capture(args.capture)
+
+    # Process controller input off the MQTT network thread
+    start_ingest_worker(
+        maxsize=args.queue_size,
+        overflow_policy=args.overflow_policy,
+        coalesce=not args.no_coalesce,
+    )
+
+    # Apply edits of controller mapping files to live controllers
+    if settings_manager.mapping_store is None:
+        start_mapping_watcher(settings_manager.config_dir)
+
+    # Set up MQTT clients
+    central_client = None
+    if not args.no_central:
+        central_client = create_central_mqtt_client()
+        if not connect_to_central_mqtt(central_client):
+            log_event("Failed to connect to central MQTT server")
+    local_client = create_local_mqtt_client(userdata=bridge)
+
+    if not is_mosquitto_running(local_port or LOCAL_MQTT_PORT) and args.start_mosquitto:
+        log_event("Starting local Mosquitto")
+        start_local_mosquitto()
+    if connect_to_local_mqtt(local_client, local_port):
+        log_event("Connecting to local MQTT server")
+    else:
+        bridge.update_mqtt_status(False)
+
+    # Run until interrupted
+    stop_event = threading.Event()
+    signal.signal(signal.SIGINT, lambda signum, frame: stop_event.set())
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop_event.set())
+    log_event("Headless bridge running, press Ctrl+C to stop")
+    while not stop_event.wait(RECONNECT_INTERVAL):
+        # The broker may have been down at startup
+        if not local_client.is_connected() and is_mosquitto_running(
+            local_port or LOCAL_MQTT_PORT
+        ):
+            local_client.loop_stop()
+            connect_to_local_mqtt(local_client, local_port)
+
+    # Clean up
+    log_event("Shutting down")
+    if central_client is not None:
+        cleanup_mqtt(central_client)
+    cleanup_mqtt(local_client)
+    stop_session_capture()
+    stop_ingest_worker()
+    stop_mapping_watcher()
+    cleanup_controllers()
+    stop_journal()
+    flush_settings_writes()
+    close_backend()
+    flush_log_summaries()
+    stop_logging()
+
+
+if __name__ == "__main__":
+    main()
@@ -7,17 +7,12 @@ It connects to game controllers via MQTT and maps their inputs to keyboard event
 
 import os
 import importlib.util
+import threading
 
 # Ensure we're in the correct directory (Client directory)
 script_dir = os.path.dirname(os.path.abspath(__file__))
 os.chdir(script_dir)
 
-# Import from gui.py in the current directory
-gui_path = os.path.join(script_dir, "gui.py")
-spec = importlib.util.spec_from_file_location("gui_module", gui_path)
-gui_module = importlib.util.module_from_spec(spec)
-spec.loader.exec_module(gui_module)
-GameControllerGUI = gui_module.GameControllerGUI
 from mqtt.client import (
     create_central_mqtt_client,
     create_local_mqtt_client,
@@ -25,24 +20,122 @@ from mqtt.client import (
     connect_to_local_mqtt,
     cleanup_mqtt,
     cleanup_controllers,
+    start_ingest_worker,
+    stop_ingest_worker,
+    start_mapping_watcher,
+    stop_mapping_watcher,
     controllers,
     set_log_callback,
     is_mosquitto_running,
+    configure_log_throttle,
+    flush_log_summaries,
+    start_journal,
+    stop_journal,
 )
-from config.settings import SettingsManager
+from config.settings import get_settings_manager
+from config.settings_writer import flush_settings_writes
+from controller.profiles import profile_library
+from utils.log_pipeline import start_logging, stop_logging
+from utils.keyboard import select_backend, close_backend
+
+
+def load_gui_class():
+    """Import GameControllerGUI from gui.py in the current directory
+
+    Deferred until the GUI is created so Tkinter is not loaded on import.
+    """
+    gui_path = os.path.join(script_dir, "gui.py")
+    spec = importlib.util.spec_from_file_location("gui_module", gui_path)
+    gui_module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(gui_module)
+    return gui_module.GameControllerGUI
+
+
+def connect_central(app, client):
+    """Connect to the central MQTT server and report the result to the GUI"""
+    if connect_to_central_mqtt(client):
+        print("Connected to central MQTT server for device discovery")
+        app.update_central_mqtt_status(True)
+    else:
+        print("Failed to connect to central MQTT server")
+        app.update_central_mqtt_status(False)
+
+
+def connect_local(app, client):
+    """Connect to the local MQTT server if Mosquitto is running"""
+    if not is_mosquitto_running():
+        print("Local Mosquitto not running")
+        app.update_mqtt_status(False)
+    elif connect_to_local_mqtt(client):
+        print("Connected to local MQTT server")
+        app.update_mqtt_status(True)
+    else:
+        print("Failed to connect to local MQTT server")
+        app.update_mqtt_status(False)
+
+
+def start_connections(app, central_client, local_client):
+    """Connect to both brokers concurrently without blocking the GUI
+
+    The GUI's status updates are thread-safe, so results are reported from
+    the connecting threads.
+    """
+    threads = [
+        threading.Thread(
+            target=connect_central,
+            args=(app, central_client),
+            name="central-connect",
+            daemon=True,
+        ),
+        threading.Thread(
+            target=connect_local,
+            args=(app, local_client),
+            name="local-connect",
+            daemon=True,
+        ),
+    ]
+    for thread in threads:
+        thread.start()
+    return threads
 
 
 def main():
     """Main entry point for the application"""
     # Initialize settings manager
-    settings_manager = SettingsManager()
+    settings_manager = get_settings_manager()
+    settings_manager.preload()
+    app_settings = settings_manager.load_app_settings()
+
+    # Format and write log records on a background thread
+    start_logging(log_file=app_settings.get("log_file"))
+    configure_log_throttle(app_settings.get("log_rate_limit"))
+
+    # Select the keyboard output backend before any controller registers
+    select_backend(configured=app_settings.get("keyboard_backend"))
+
+    # Compile mapping profiles once the backend's key codes are known
+    profile_library.load(settings_manager)
 
     # Create the GUI
-    app = GameControllerGUI(controllers, settings_manager)
+    GameControllerGUI = load_gui_class()
+    app = GameControllerGUI(
+        controllers, settings_manager, app_settings.get("gui_refresh_rate", 30)
+    )
 
     # Set up logging callback
     set_log_callback(app.add_log_message)
 
+    # Record received input and injected keys if configured
+    if app_settings.get("journal_dir"):
+        start_journal(app_settings["journal_dir"])
+
+    # Process controller input off the MQTT network thread
+    start_ingest_worker()
+
+    # Apply edits of controller mapping files to live controllers
+    if settings_manager.mapping_store is None:
+        start_mapping_watcher(settings_manager.config_dir)
+
     # Set up MQTT clients
     central_client = create_central_mqtt_client()
     local_client = create_local_mqtt_client(userdata=app)
@@ -51,27 +144,10 @@ def main():
     app.central_mqtt_client = central_client
     app.local_mqtt_client = local_client
 
-    # Connect to central MQTT server for device discovery
-    central_connected = connect_to_central_mqtt(central_client)
-    if central_connected:
-        print("Connected to central MQTT server for device discovery")
-        app.update_central_mqtt_status(True)
-    else:
-        print("Failed to connect to central MQTT server")
-        app.update_central_mqtt_status(False)
-
-    # Only try to connect to local MQTT if Mosquitto is actually running
-    if is_mosquitto_running():
-        local_connected = connect_to_local_mqtt(local_client)
-        if local_connected:
-            print("Connected to local MQTT server")
-            app.update_mqtt_status(True)
-        else:
-            print("Failed to connect to local MQTT server")
-            app.update_mqtt_status(False)
-    else:
-        print("Local Mosquitto not running")
-        app.update_mqtt_status(False)
+    # Connect to the central server (device discovery) and the local
+    # broker in the background, so an unreachable broker never stalls the
+    # window
+    start_connections(app, central_client, local_client)
 
     # Start the GUI
     app.mainloop()
@@ -79,7 +155,14 @@ def main():
     # Clean up
     cleanup_mqtt(central_client)
     cleanup_mqtt(local_client)
+    stop_ingest_worker()
+    stop_mapping_watcher()
     cleanup_controllers()
+    stop_journal()
+    flush_settings_writes()
+    close_backend()
+    flush_log_summaries()
+    stop_logging()
 
 
 if __name__ == "__main__":
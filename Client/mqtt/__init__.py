@@ -6,10 +6,29 @@ from mqtt.client import (
     connect_to_local_mqtt,
     cleanup_mqtt,
     cleanup_controllers,
+    start_ingest_worker,
+    stop_ingest_worker,
+    get_ingest_metrics,
+    drain_ingest_queue,
+    submit_input_task,
+    get_latency_metrics,
+    reset_latency_metrics,
+    reload_controller_mappings,
+    start_mapping_watcher,
+    stop_mapping_watcher,
+    switch_profile,
+    start_journal,
+    stop_journal,
+    start_session_capture,
+    stop_session_capture,
     controllers,
     set_log_callback,
     log_event,
+    configure_log_throttle,
+    flush_log_summaries,
+    get_log_metrics,
     get_local_ip,
+    get_local_port,
     is_mosquitto_running,
     start_local_mosquitto,
     CENTRAL_MQTT_SERVER,
@@ -25,10 +44,29 @@ __all__ = [
     "connect_to_local_mqtt",
     "cleanup_mqtt",
     "cleanup_controllers",
+    "start_ingest_worker",
+    "stop_ingest_worker",
+    "get_ingest_metrics",
+    "drain_ingest_queue",
+    "submit_input_task",
+    "get_latency_metrics",
+    "reset_latency_metrics",
+    "reload_controller_mappings",
+    "start_mapping_watcher",
+    "stop_mapping_watcher",
+    "switch_profile",
+    "start_journal",
+    "stop_journal",
+    "start_session_capture",
+    "stop_session_capture",
     "controllers",
     "set_log_callback",
     "log_event",
+    "configure_log_throttle",
+    "flush_log_summaries",
+    "get_log_metrics",
     "get_local_ip",
+    "get_local_port",
     "is_mosquitto_running",
     "start_local_mosquitto",
     "CENTRAL_MQTT_SERVER",
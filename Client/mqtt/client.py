@@ -1,12 +1,41 @@
-import paho.mqtt.client as mqtt
 import json
 import threading
 import socket
 import subprocess
 import platform
 import os
+import time
+import logging
+from collections import namedtuple
 from datetime import datetime
-from utils.keyboard import press_key, release_key
+from utils.keyboard import (
+    begin_batch,
+    flush_batch,
+    add_transition_hook,
+    remove_transition_hook,
+)
+from utils.key_state import key_state
+from utils.log_pipeline import logger, is_logging_started, set_gui_sink
+from utils.log_throttle import LogThrottle
+from utils.journal import JournalWriter, RECORD_BUTTON, RECORD_JOYSTICK, RECORD_STATE
+from utils.latency import LatencyTracker
+from mqtt.frames import (
+    decode_frame,
+    FRAME_VERSION,
+    FRAME_BUTTON,
+    FRAME_JOYSTICK,
+    FRAME_STATE,
+    decode_frame_trailer,
+    STATE_BUTTONS,
+    STATE_JOYSTICKS,
+)
+from mqtt.router import TopicRouter
+from mqtt.ingest import IngestQueue, OVERFLOW_EVICT_OR_BLOCK, BARRIER
+from mqtt.session import SessionRecorder
+from config.settings import invalidate_settings_cache
+from config.watcher import MappingFileWatcher
+from controller.game_controller import compile_key_mappings
+from controller.profiles import profile_library
 
 # Central MQTT server settings
 CENTRAL_MQTT_SERVER = "31.44.2.222"
@@ -24,24 +53,116 @@ RESPONSE_TOPIC = "controller/response"
 BASE_TOPIC = "gamecontroller"
 REGISTER_TOPIC = f"{BASE_TOPIC}/register"
 ID_TOPIC = f"{BASE_TOPIC}/getid"
+BUTTON_TOPIC = f"{BASE_TOPIC}/+/button"
+JOYSTICK_TOPIC = f"{BASE_TOPIC}/+/joystick"
+FRAME_TOPIC = f"{BASE_TOPIC}/+/frame"
+PROFILE_TOPIC = f"{BASE_TOPIC}/profile"
+CONTROLLER_PROFILE_TOPIC = f"{BASE_TOPIC}/+/profile"
 
 # Controller tracking
 controllers = {}
 next_controller_id = 1
 controller_lock = threading.Lock()
 
+# Ingest queue between the MQTT network thread and input processing
+INGEST_QUEUE_SIZE = 1024
+INGEST_OVERFLOW_POLICY = OVERFLOW_EVICT_OR_BLOCK
+ingest_queue = None
+
+# Work queued for the input thread, e.g. releasing a controller's keys
+InputTask = namedtuple("InputTask", ["func", "args"])
+
+# Serializes input processing when no ingest worker is running
+_input_lock = threading.RLock()
+
+# Watcher reloading edited controller mapping files
+mapping_watcher = None
+
+# Optional binary journal of received input and injected keys
+journal = None
+
+# Optional capture of raw local messages for replay
+session_recorder = None
+
+# Per-controller input latency histograms
+latency_tracker = LatencyTracker()
+
 # Logging
 log_callback = None
 
+# Receive time of the message being processed on this thread
+_message_context = threading.local()
+
 
 def set_log_callback(callback):
     """Set the callback function for logging"""
     global log_callback
     log_callback = callback
+    set_gui_sink(callback)
+
+
+def _log_suppressed(key, count):
+    """Summarize log lines dropped by the log throttle"""
+    controller_id, event = key
+    log_event(
+        "Suppressed %d %s events from controller %s",
+        count,
+        event,
+        controller_id,
+        controller=controller_id,
+        event="suppressed",
+        count=count,
+    )
+
+
+# Caps input event log lines per (controller, event type) per second
+log_throttle = LogThrottle(_log_suppressed)
+
+
+def configure_log_throttle(rate=None, summary_interval=None):
+    """Set the input event log rate limit (0 disables it) and summary interval"""
+    if rate is not None:
+        log_throttle.rate = rate
+    if summary_interval is not None:
+        log_throttle.summary_interval = summary_interval
+
 
+def flush_log_summaries():
+    """Log the remaining suppressed-line summaries; call before exiting"""
+    log_throttle.stop()
 
-def log_event(message):
-    """Log an event with timestamp"""
+
+def get_log_metrics():
+    """Get logged/suppressed input event line counts by (controller, event)"""
+    return log_throttle.get_metrics()
+
+
+def log_event(message, *args, level=logging.INFO, throttle=False, **fields):
+    """Log an event with optional %-style arguments and structured fields
+
+    Once the log pipeline is started (utils.log_pipeline.start_logging),
+    the record is only enqueued here; formatting and output happen on the
+    pipeline's listener thread. While handling a local message, the time
+    since the message was received is added as ``latency_us``. With
+    ``throttle`` the line counts against the per-(controller, event) rate
+    limit and is dropped, but counted, once the limit is reached.
+    """
+    if throttle and not log_throttle.allow(
+        (fields.get("controller"), fields.get("event"))
+    ):
+        return
+
+    received_ns = getattr(_message_context, "received_ns", None)
+    if received_ns is not None:
+        fields["latency_us"] = (time.perf_counter_ns() - received_ns) // 1000
+
+    if is_logging_started():
+        if logger.isEnabledFor(level):
+            logger.log(level, message, *args, extra={"fields": fields})
+        return
+
+    if args:
+        message = message % args
     timestamp = datetime.now().strftime("%H:%M:%S")
     log_message = f"[{timestamp}] {message}"
     print(log_message)
@@ -63,13 +184,25 @@ def get_local_ip():
         return "127.0.0.1"
 
 
-def is_mosquitto_running():
+def get_local_port(userdata=None):
+    """Get the local broker port from the GUI's port entry or the userdata"""
+    port = LOCAL_MQTT_PORT
+    if userdata and hasattr(userdata, "mosquitto_port_entry"):
+        port_str = userdata.mosquitto_port_entry.get()
+        if port_str and port_str.isdigit():
+            port = int(port_str)
+    elif userdata and getattr(userdata, "local_port", None):
+        port = int(userdata.local_port)
+    return port
+
+
+def is_mosquitto_running(port=LOCAL_MQTT_PORT):
     """Check if local Mosquitto is running"""
     try:
         # Try to connect to the MQTT port to verify if something is actually listening
         s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         s.settimeout(1)
-        result = s.connect_ex(("localhost", LOCAL_MQTT_PORT))
+        result = s.connect_ex(("localhost", port))
         s.close()
 
         if result != 0:
@@ -114,8 +247,6 @@ def start_local_mosquitto():
             subprocess.Popen(["mosquitto", "-v", "-c", config_path])
 
         # Wait a moment for it to start
-        import time
-
         time.sleep(2)
         return is_mosquitto_running()
     except Exception as e:
@@ -177,12 +308,7 @@ def on_central_message(client, userdata, msg):
 def on_local_connect(client, userdata, flags, rc):
     """Callback for when the client connects to the local MQTT broker"""
     if rc == 0:
-        # Get port from GUI if available
-        port = LOCAL_MQTT_PORT
-        if userdata and hasattr(userdata, "mosquitto_port_entry"):
-            port_str = userdata.mosquitto_port_entry.get()
-            if port_str and port_str.isdigit():
-                port = int(port_str)
+        port = get_local_port(userdata)
 
         # Verify Mosquitto is still running on the correct port
         try:
@@ -204,8 +330,11 @@ def on_local_connect(client, userdata, flags, rc):
 
         log_event("Connected to local MQTT server")
         client.subscribe(REGISTER_TOPIC)
-        client.subscribe(f"{BASE_TOPIC}/+/button")
-        client.subscribe(f"{BASE_TOPIC}/+/joystick")
+        client.subscribe(BUTTON_TOPIC)
+        client.subscribe(JOYSTICK_TOPIC)
+        client.subscribe(FRAME_TOPIC)
+        client.subscribe(PROFILE_TOPIC)
+        client.subscribe(CONTROLLER_PROFILE_TOPIC)
 
         # Update GUI connection status if available
         if userdata and hasattr(userdata, "update_mqtt_status"):
@@ -229,188 +358,777 @@ def on_local_disconnect(client, userdata, rc):
         userdata.update_mqtt_status(False)
 
     # Try to reconnect if Mosquitto is still running
-    if is_mosquitto_running():
+    port = get_local_port(userdata)
+    if is_mosquitto_running(port):
         log_event("Attempting to reconnect...")
         client.loop_stop()
-        connect_to_local_mqtt(client)
+        connect_to_local_mqtt(client, port)
 
 
-def on_local_message(client, userdata, msg):
-    """Callback for when a message is received from the local MQTT broker"""
-    topic = msg.topic
-    payload = msg.payload.decode()
+def handle_button_input(controller_id, button_num, pressed, userdata):
+    """Apply a button press/release to a controller and its mapped key
+
+    ``button_num`` may arrive as a string or be missing from a JSON
+    message, so it is coerced before any state is touched. Returns the
+    button number, or None if the input was not applied.
+    """
+    controller = controllers.get(controller_id)
+    if controller is None:
+        return None
 
-    # New controller registration
-    if topic == REGISTER_TOPIC and payload == "new":
-        with controller_lock:
-            global next_controller_id
-            controller_id = str(next_controller_id)
-            next_controller_id += 1
+    try:
+        button_num = int(button_num)
+    except (TypeError, ValueError):
+        log_event(
+            f"Ignoring invalid button {button_num!r} from controller {controller_id}"
+        )
+        return None
+
+    # Update controller state
+    controller.button_states[button_num] = pressed
+
+    # Map to key press/release
+    button_keys = controller.compiled_mappings.buttons
+    entry = button_keys[button_num] if 0 < button_num < len(button_keys) else None
+
+    if entry:
+        mapped_key, key_code = entry
+        action = "pressed" if pressed else "released"
+        log_event(
+            "Controller %s %s button %s -> key '%s'",
+            controller_id,
+            action,
+            button_num,
+            mapped_key,
+            controller=controller_id,
+            event="button",
+            throttle=True,
+            control=f"button{button_num}",
+            key=mapped_key,
+        )
+
+        holder = (controller_id, "button", button_num)
+        if pressed:
+            key_state.press(holder, key_code)
+            controller.active_keys.add(mapped_key)
+        else:
+            key_state.release(holder, key_code)
+            controller.active_keys.discard(mapped_key)
 
-            # Create new controller
-            from controller import GameController
+    # Update GUI if needed
+    if userdata and hasattr(userdata, "update_controller_state"):
+        userdata.update_controller_state(controller_id, "button", button_num, pressed)
 
-            # Get settings manager from userdata if available
-            settings_manager = None
-            if userdata and hasattr(userdata, "settings_manager"):
-                settings_manager = userdata.settings_manager
-            controller = GameController(controller_id, settings_manager)
-            controllers[controller_id] = controller
+    return button_num
 
-            # Send ID to the controller
-            client.publish(ID_TOPIC, controller_id)
 
-            log_event(f"New controller registered with ID: {controller_id}")
+def handle_joystick_input(controller_id, joystick_num, x, y, pressed, userdata):
+    """Apply a joystick position to a controller and its mapped direction keys
 
-            # Notify the GUI of the new controller
-            if userdata and hasattr(userdata, "update_controllers"):
-                userdata.update_controllers(controllers)
+    The joystick number and axes are coerced like ``button_num`` in
+    handle_button_input before any state is touched. Returns the joystick
+    number, or None if the input was not applied.
+    """
+    controller = controllers.get(controller_id)
+    if controller is None:
+        return None
 
-    # Handle button press/release messages
-    elif "/button" in topic:
-        try:
-            parts = topic.split("/")
-            controller_id = parts[1]
+    try:
+        joystick_num = int(joystick_num)
+        x = int(x)
+        y = int(y)
+    except (TypeError, ValueError):
+        log_event(
+            f"Ignoring invalid joystick {joystick_num!r} position ({x!r}, {y!r}) "
+            f"from controller {controller_id}"
+        )
+        return None
+
+    # Get previous joystick state
+    prev_state = controller.joystick_states.get(
+        joystick_num, {"x": 512, "y": 512, "pressed": False}
+    )
+    prev_x = prev_state["x"]
+    prev_y = prev_state["y"]
+
+    # Update controller state
+    controller.joystick_states[joystick_num] = {
+        "x": x,
+        "y": y,
+        "pressed": pressed,
+    }
+
+    # Handle joystick pressed state if needed
+    if pressed != prev_state["pressed"] and pressed:
+        # Joystick button press logic can go here if needed
+        pass
 
-            if controller_id in controllers:
-                button_data = json.loads(payload)
-                button_num = button_data.get("button")
-                pressed = button_data.get("pressed", False)
+    # Map joystick positions to key presses
+    joystick_keys = controller.compiled_mappings.joysticks
+    if not 0 < joystick_num < len(joystick_keys) or not joystick_keys[joystick_num]:
+        directions = (None, None, None, None)
+    else:
+        directions = joystick_keys[joystick_num]
+    up, down, left, right = directions
+
+    # X-axis
+    # Right
+    if x > 800 and prev_x <= 800 and right:
+        key_state.press((controller_id, "joystick", joystick_num, "right"), right[1])
+        controller.active_keys.add(right[0])
+        log_event(
+            "Controller %s joystick %s moved right -> key '%s'",
+            controller_id,
+            joystick_num,
+            right[0],
+            controller=controller_id,
+            event="joystick",
+            throttle=True,
+            control=f"joystick{joystick_num}_right",
+            key=right[0],
+        )
+    elif x <= 800 and prev_x > 800 and right:
+        key_state.release((controller_id, "joystick", joystick_num, "right"), right[1])
+        controller.active_keys.discard(right[0])
+
+    # Left
+    if x < 200 and prev_x >= 200 and left:
+        key_state.press((controller_id, "joystick", joystick_num, "left"), left[1])
+        controller.active_keys.add(left[0])
+        log_event(
+            "Controller %s joystick %s moved left -> key '%s'",
+            controller_id,
+            joystick_num,
+            left[0],
+            controller=controller_id,
+            event="joystick",
+            throttle=True,
+            control=f"joystick{joystick_num}_left",
+            key=left[0],
+        )
+    elif x >= 200 and prev_x < 200 and left:
+        key_state.release((controller_id, "joystick", joystick_num, "left"), left[1])
+        controller.active_keys.discard(left[0])
+
+    # Y-axis
+    # Down
+    if y > 800 and prev_y <= 800 and down:
+        key_state.press((controller_id, "joystick", joystick_num, "down"), down[1])
+        controller.active_keys.add(down[0])
+        log_event(
+            "Controller %s joystick %s moved down -> key '%s'",
+            controller_id,
+            joystick_num,
+            down[0],
+            controller=controller_id,
+            event="joystick",
+            throttle=True,
+            control=f"joystick{joystick_num}_down",
+            key=down[0],
+        )
+    elif y <= 800 and prev_y > 800 and down:
+        key_state.release((controller_id, "joystick", joystick_num, "down"), down[1])
+        controller.active_keys.discard(down[0])
+
+    # Up
+    if y < 200 and prev_y >= 200 and up:
+        key_state.press((controller_id, "joystick", joystick_num, "up"), up[1])
+        controller.active_keys.add(up[0])
+        log_event(
+            "Controller %s joystick %s moved up -> key '%s'",
+            controller_id,
+            joystick_num,
+            up[0],
+            controller=controller_id,
+            event="joystick",
+            throttle=True,
+            control=f"joystick{joystick_num}_up",
+            key=up[0],
+        )
+    elif y >= 200 and prev_y < 200 and up:
+        key_state.release((controller_id, "joystick", joystick_num, "up"), up[1])
+        controller.active_keys.discard(up[0])
+
+    # Update GUI if needed
+    if userdata and hasattr(userdata, "update_controller_state"):
+        userdata.update_controller_state(
+            controller_id, "joystick", joystick_num, (x, y)
+        )
+
+    return joystick_num
+
+
+def handle_state_input(controller_id, buttons, axes, userdata):
+    """Diff a full controller state frame against the controller in one pass
+
+    Only buttons whose bit changed and joysticks whose position or press
+    state changed are forwarded to the per-control handlers.
+    """
+    controller = controllers.get(controller_id)
+    if controller is None:
+        return
+
+    button_states = controller.button_states
+    for button_num in range(1, STATE_BUTTONS + 1):
+        pressed = bool(buttons & (1 << (button_num - 1)))
+        if button_states.get(button_num, False) != pressed:
+            handle_button_input(controller_id, button_num, pressed, userdata)
+
+    joystick_states = controller.joystick_states
+    for joystick_num in range(1, STATE_JOYSTICKS + 1):
+        x = axes[2 * joystick_num - 2]
+        y = axes[2 * joystick_num - 1]
+        # L3/R3 (buttons 5 and 6) are the joystick presses
+        pressed = bool(buttons & (1 << (joystick_num + 3)))
+        prev_state = joystick_states.get(joystick_num)
+        if (
+            prev_state is None
+            or prev_state["x"] != x
+            or prev_state["y"] != y
+            or prev_state["pressed"] != pressed
+        ):
+            handle_joystick_input(controller_id, joystick_num, x, y, pressed, userdata)
 
-                # Update controller state
-                controllers[controller_id].button_states[button_num] = pressed
 
-                # Map to key press/release
-                button_key = f"button{button_num}"
-                mapped_key = controllers[controller_id].key_mappings.get(button_key)
+def handle_register_message(client, userdata, controller_id, payload):
+    """Register a new controller and send it its ID"""
+    if payload != b"new":
+        return
 
-                if mapped_key:
-                    action = "pressed" if pressed else "released"
-                    log_event(
-                        f"Controller {controller_id} {action} button {button_num} -> key '{mapped_key}'"
-                    )
+    with controller_lock:
+        global next_controller_id
+        controller_id = str(next_controller_id)
+        next_controller_id += 1
 
-                    if pressed:
-                        press_key(mapped_key)
-                        controllers[controller_id].active_keys.add(mapped_key)
-                    else:
-                        release_key(mapped_key)
-                        controllers[controller_id].active_keys.discard(mapped_key)
+        # Create new controller
+        from controller import GameController
 
-                # Update GUI if needed
-                if userdata and hasattr(userdata, "update_controller_state"):
-                    userdata.update_controller_state(
-                        controller_id, "button", button_num, pressed
-                    )
-        except Exception as e:
-            log_event(f"Error processing button message: {e}")
+        # Get settings manager from userdata if available
+        settings_manager = None
+        if userdata and hasattr(userdata, "settings_manager"):
+            settings_manager = userdata.settings_manager
+        controller = GameController(controller_id, settings_manager)
+        controllers[controller_id] = controller
 
-    # Handle joystick movement messages
-    elif "/joystick" in topic:
-        try:
-            parts = topic.split("/")
-            controller_id = parts[1]
+        # Send ID to the controller
+        client.publish(ID_TOPIC, controller_id)
 
-            if controller_id in controllers:
-                joystick_data = json.loads(payload)
-                joystick_num = joystick_data.get("joystick")
-                x = joystick_data.get("x", 512)
-                y = joystick_data.get("y", 512)
-                pressed = joystick_data.get("pressed", False)
-
-                # Get previous joystick state
-                prev_state = controllers[controller_id].joystick_states.get(
-                    joystick_num, {"x": 512, "y": 512, "pressed": False}
-                )
-                prev_x = prev_state["x"]
-                prev_y = prev_state["y"]
-
-                # Update controller state
-                controllers[controller_id].joystick_states[joystick_num] = {
-                    "x": x,
-                    "y": y,
-                    "pressed": pressed,
-                }
+        log_event(f"New controller registered with ID: {controller_id}")
 
-                # Handle joystick pressed state if needed
-                if pressed != prev_state["pressed"] and pressed:
-                    # Joystick button press logic can go here if needed
-                    pass
+        # Notify the GUI of the new controller
+        if userdata and hasattr(userdata, "update_controllers"):
+            userdata.update_controllers(controllers)
 
-                # Map joystick positions to key presses
-                joystick_prefix = f"joystick{joystick_num}"
 
-                # X-axis
-                right_key = controllers[controller_id].key_mappings.get(
-                    f"{joystick_prefix}_right"
-                )
-                left_key = controllers[controller_id].key_mappings.get(
-                    f"{joystick_prefix}_left"
-                )
+def handle_button_message(client, userdata, controller_id, payload):
+    """Handle a JSON button press/release message"""
+    try:
+        if controller_id in controllers:
+            button_data = json.loads(payload)
+            pressed = button_data.get("pressed", False)
+            button_num = handle_button_input(
+                controller_id, button_data.get("button"), pressed, userdata
+            )
+            if button_num is not None and journal is not None:
+                journal_input(RECORD_BUTTON, controller_id, button_num, pressed)
+    except Exception as e:
+        log_event(f"Error processing button message: {e}")
 
-                # Right
-                if x > 800 and prev_x <= 800 and right_key:
-                    press_key(right_key)
-                    controllers[controller_id].active_keys.add(right_key)
-                    log_event(
-                        f"Controller {controller_id} joystick {joystick_num} moved right -> key '{right_key}'"
-                    )
-                elif x <= 800 and prev_x > 800 and right_key:
-                    release_key(right_key)
-                    controllers[controller_id].active_keys.discard(right_key)
-
-                # Left
-                if x < 200 and prev_x >= 200 and left_key:
-                    press_key(left_key)
-                    controllers[controller_id].active_keys.add(left_key)
-                    log_event(
-                        f"Controller {controller_id} joystick {joystick_num} moved left -> key '{left_key}'"
-                    )
-                elif x >= 200 and prev_x < 200 and left_key:
-                    release_key(left_key)
-                    controllers[controller_id].active_keys.discard(left_key)
 
-                # Y-axis
-                down_key = controllers[controller_id].key_mappings.get(
-                    f"{joystick_prefix}_down"
-                )
-                up_key = controllers[controller_id].key_mappings.get(
-                    f"{joystick_prefix}_up"
+def handle_joystick_message(client, userdata, controller_id, payload):
+    """Handle a JSON joystick movement message
+
+    ``payload`` is the raw JSON, or the message already parsed while
+    coalescing the ingest backlog.
+    """
+    try:
+        if controller_id in controllers:
+            if isinstance(payload, dict):
+                joystick_data = payload
+            else:
+                joystick_data = json.loads(payload)
+            x = joystick_data.get("x", 512)
+            y = joystick_data.get("y", 512)
+            pressed = joystick_data.get("pressed", False)
+            joystick_num = handle_joystick_input(
+                controller_id, joystick_data.get("joystick"), x, y, pressed, userdata
+            )
+            if joystick_num is not None and journal is not None:
+                journal_input(
+                    RECORD_JOYSTICK, controller_id, joystick_num, pressed, (x, y)
                 )
+    except Exception as e:
+        log_event(f"Error processing joystick message: {e}")
 
-                # Down
-                if y > 800 and prev_y <= 800 and down_key:
-                    press_key(down_key)
-                    controllers[controller_id].active_keys.add(down_key)
-                    log_event(
-                        f"Controller {controller_id} joystick {joystick_num} moved down -> key '{down_key}'"
-                    )
-                elif y <= 800 and prev_y > 800 and down_key:
-                    release_key(down_key)
-                    controllers[controller_id].active_keys.discard(down_key)
-
-                # Up
-                if y < 200 and prev_y >= 200 and up_key:
-                    press_key(up_key)
-                    controllers[controller_id].active_keys.add(up_key)
-                    log_event(
-                        f"Controller {controller_id} joystick {joystick_num} moved up -> key '{up_key}'"
+
+def handle_frame_message(client, userdata, controller_id, payload):
+    """Handle a binary input frame (see mqtt/frames.py)"""
+    try:
+        if controller_id in controllers:
+            frame = decode_frame(payload)
+            if frame[0] == FRAME_BUTTON:
+                handle_button_input(controller_id, frame[1], frame[2], userdata)
+                if journal is not None:
+                    journal_input(RECORD_BUTTON, controller_id, frame[1], frame[2])
+            elif frame[0] == FRAME_JOYSTICK:
+                handle_joystick_input(
+                    controller_id, frame[1], frame[2], frame[3], frame[4], userdata
+                )
+                if journal is not None:
+                    journal_input(
+                        RECORD_JOYSTICK,
+                        controller_id,
+                        frame[1],
+                        frame[4],
+                        (frame[2], frame[3]),
                     )
-                elif y >= 200 and prev_y < 200 and up_key:
-                    release_key(up_key)
-                    controllers[controller_id].active_keys.discard(up_key)
-
-                # Update GUI if needed
-                if userdata and hasattr(userdata, "update_controller_state"):
-                    userdata.update_controller_state(
-                        controller_id, "joystick", joystick_num, (x, y)
+            else:
+                handle_state_input(controller_id, frame[1], frame[2], userdata)
+                if journal is not None:
+                    journal_input(
+                        RECORD_STATE, controller_id, frame[1], False, frame[2]
                     )
-        except Exception as e:
-            log_event(f"Error processing joystick message: {e}")
+    except Exception as e:
+        log_event(f"Error processing frame message: {e}")
+
+
+def record_frame_trailer(controller_id, payload, received_ns):
+    """Check a received frame's device sequence number and transit time
+
+    Runs as frames arrive, before the ingest queue, so only frames lost
+    before reaching the bridge count as missed; frames the queue drops or
+    coalesces are reported by its metrics.
+    """
+    if controller_id not in controllers:
+        return
+    try:
+        trailer = decode_frame_trailer(payload)
+    except Exception:
+        return
+    if trailer is not None:
+        latency_tracker.record_device(
+            controller_id, trailer[0], trailer[1], received_ns
+        )
+
+
+def switch_profile(profile_name, controller_id=None):
+    """Switch one controller, or all of them, to a precompiled profile
+
+    Releases the keys the controllers hold, so it must run on the input
+    thread: the profile topic handler does, other threads use
+    submit_input_task. Returns the number of controllers switched.
+    """
+    profile = profile_library.get(profile_name)
+    if profile is None:
+        log_event(f"Unknown profile: {profile_name}")
+        return 0
+
+    if controller_id is None:
+        targets = list(controllers.values())
+    else:
+        controller = controllers.get(controller_id)
+        targets = [controller] if controller else []
+
+    for controller in targets:
+        controller.apply_profile(profile)
+
+    if controller_id is None:
+        log_event(f"Switched all controllers to profile '{profile_name}'")
+    elif targets:
+        log_event(f"Switched controller {controller_id} to profile '{profile_name}'")
+    return len(targets)
+
+
+def handle_profile_message(client, userdata, controller_id, payload):
+    """Switch profiles; controller_id is None for the all-controllers topic"""
+    try:
+        switch_profile(payload.decode().strip(), controller_id)
+    except Exception as e:
+        log_event(f"Error processing profile message: {e}")
+
+
+# Local topic routing
+local_router = TopicRouter()
+local_router.add_route(REGISTER_TOPIC, handle_register_message)
+local_router.add_route(BUTTON_TOPIC, handle_button_message)
+local_router.add_route(JOYSTICK_TOPIC, handle_joystick_message)
+local_router.add_route(FRAME_TOPIC, handle_frame_message)
+local_router.add_route(PROFILE_TOPIC, handle_profile_message)
+local_router.add_route(CONTROLLER_PROFILE_TOPIC, handle_profile_message)
+
+
+def process_local_message(client, userdata, topic, payload, received_ns=None):
+    """Route and handle a message received from the local MQTT broker
+
+    ``received_ns`` is the perf_counter_ns() time the message arrived. When
+    it is given, the time spent queued and handled is added to the
+    controller's latency histograms.
+    """
+    route = local_router.resolve(topic)
+    if route is not None:
+        controller_id, handler = route
+        dequeued_ns = time.perf_counter_ns()
+        with _input_lock:
+            _message_context.received_ns = received_ns
+            # Key changes caused by one message reach the backend in one call
+            begin_batch()
+            try:
+                handler(client, userdata, controller_id, payload)
+            finally:
+                injected = flush_batch()
+                _message_context.received_ns = None
+        if received_ns is not None and controller_id in controllers:
+            latency_tracker.record_message(
+                controller_id,
+                received_ns,
+                dequeued_ns,
+                time.perf_counter_ns(),
+                injected,
+            )
+
+
+def _joystick_message_key(controller_id, joystick_data):
+    """Coalescing key of a parsed JSON joystick message
+
+    The joystick's button state is the tag, so its edges are never lost.
+    """
+    return (
+        ("joystick", controller_id, joystick_data.get("joystick")),
+        bool(joystick_data.get("pressed", False)),
+    )
+
+
+def _frame_message_key(controller_id, payload):
+    """Coalescing key of a binary frame, None for button frames
+
+    State frames are only interchangeable when their button bitmask is the
+    same, so the bitmask is used as the tag.
+    """
+    if len(payload) < 3 or payload[0] != FRAME_VERSION:
+        return None
+    if payload[1] == FRAME_JOYSTICK:
+        return ("joystick", controller_id, payload[2]), bool(payload[3])
+    if payload[1] == FRAME_STATE:
+        return ("state", controller_id), payload[2]
+    return None
+
+
+# Handlers whose messages are snapshots that a newer message can supersede
+COALESCE_KEYS = {
+    handle_joystick_message: _joystick_message_key,
+    handle_frame_message: _frame_message_key,
+}
+
+
+def local_message_key(item):
+    """Get ``(item, key)`` for a queued item (see mqtt.ingest supersede_key)
+
+    JSON joystick messages are parsed here once; the returned item carries
+    the parsed message on to handle_joystick_message.
+    """
+    if type(item) is InputTask:
+        # Tasks may change mappings, so snapshots before one are never
+        # replaced by snapshots after it
+        return item, BARRIER
+    route = local_router.resolve(item[2])
+    key_func = COALESCE_KEYS.get(route[1]) if route is not None else None
+    if key_func is None:
+        return item, None
+    try:
+        payload = item[3]
+        if key_func is _joystick_message_key and not isinstance(payload, dict):
+            payload = json.loads(payload)
+            item = item[:3] + (payload,) + item[4:]
+        return item, key_func(route[0], payload)
+    except Exception:
+        return item, None
+
+
+def coalesce_local_messages(batch):
+    """Drop queued snapshots superseded by a newer message of the same stream
+
+    Walks the backlog from newest to oldest and keeps only the newest
+    joystick/state frame per (controller, stream). An older item is dropped
+    only if the next newer item of its stream has the same tag, so button
+    edges (including those carried in state frames and joystick messages)
+    are never lost. The ingest queue uses the same rule when it is full, so
+    this holds from receipt to handling.
+    """
+    latest_tags = {}
+    kept = []
+    for item in reversed(batch):
+        item, key = local_message_key(item)
+        if key is BARRIER:
+            latest_tags.clear()
+        elif key is not None:
+            stream, tag = key
+            if stream in latest_tags and latest_tags[stream] == tag:
+                continue
+            latest_tags[stream] = tag
+        kept.append(item)
+
+    kept.reverse()
+    return kept
+
+
+def _run_input_task(func, args):
+    """Run a task on the input thread, batching the key changes it makes"""
+    with _input_lock:
+        begin_batch()
+        try:
+            func(*args)
+        finally:
+            flush_batch()
+
+
+def submit_input_task(func, *args):
+    """Run ``func(*args)`` on the input thread, in order with queued messages
+
+    Key state (utils.key_state) may only change on the input thread, so
+    other threads (GUI, mapping watcher) use this for anything that presses
+    or releases keys. With the ingest worker running the task is queued
+    behind the messages already received and never dropped; otherwise it
+    runs now, serialized with message processing.
+    """
+    queue = ingest_queue
+    if queue is not None and not queue.is_worker_thread():
+        queue.put(InputTask(func, args), critical=True)
+    else:
+        _run_input_task(func, args)
+
+
+def _process_queued_message(item):
+    """Ingest worker entry point"""
+    try:
+        if type(item) is InputTask:
+            _run_input_task(item.func, item.args)
+        else:
+            process_local_message(*item)
+    except Exception as e:
+        log_event(f"Error processing local message: {e}")
+
+
+def start_ingest_worker(
+    maxsize=INGEST_QUEUE_SIZE, overflow_policy=INGEST_OVERFLOW_POLICY, coalesce=True
+):
+    """Process local messages on a dedicated worker instead of the MQTT thread
+
+    With ``coalesce`` enabled, a backlog of joystick snapshots is collapsed to
+    the newest pending frame per controller and joystick. Whatever the
+    setting, a full queue only evicts snapshots superseded by a newer
+    queued message, never button edges (see mqtt.ingest).
+    """
+    global ingest_queue
+    if ingest_queue is not None:
+        return ingest_queue
+
+    ingest_queue = IngestQueue(
+        _process_queued_message,
+        maxsize,
+        overflow_policy,
+        coalesce=coalesce_local_messages if coalesce else None,
+        supersede_key=local_message_key,
+    )
+    ingest_queue.start()
+    log_event(
+        f"Started ingest worker (queue size {maxsize}, overflow policy {overflow_policy})"
+    )
+    return ingest_queue
+
+
+def stop_ingest_worker():
+    """Drain and stop the ingest worker"""
+    global ingest_queue
+    if ingest_queue is not None:
+        ingest_queue.stop()
+        ingest_queue = None
+
+
+def drain_ingest_queue(timeout=None):
+    """Wait until every queued local message has been processed
+
+    Returns False if the timeout expired first.
+    """
+    if ingest_queue is None:
+        return True
+    return ingest_queue.join(timeout)
+
+
+def get_ingest_metrics():
+    """Get queue depth and throughput metrics of the ingest worker"""
+    if ingest_queue is None:
+        return None
+    return ingest_queue.get_metrics()
+
+
+def get_latency_metrics():
+    """Get input latency percentiles by controller ID and stage
+
+    See utils.latency for the stages. Values are in microseconds.
+    """
+    return latency_tracker.get_metrics()
+
+
+def reset_latency_metrics():
+    """Start new latency histograms"""
+    latency_tracker.reset()
+
+
+def journal_input(kind, controller_id, control, pressed, values=()):
+    """Record a decoded input in the journal, stamped with its receive time"""
+    active_journal = journal
+    if active_journal is not None:
+        t_ns = getattr(_message_context, "received_ns", None)
+        active_journal.record_input(
+            t_ns or time.perf_counter_ns(),
+            kind,
+            controller_id,
+            control,
+            pressed,
+            values,
+        )
+
+
+def _journal_keys(transitions):
+    """Record injected key transitions in the journal"""
+    active_journal = journal
+    if active_journal is not None:
+        active_journal.record_keys(time.perf_counter_ns(), transitions)
+
+
+def start_journal(directory="journal", **options):
+    """Record received input and injected keys to a binary journal
+
+    ``options`` are passed to utils.journal.JournalWriter (segment_size,
+    max_segments).
+    """
+    global journal
+    if journal is None:
+        journal = JournalWriter(directory, **options)
+        add_transition_hook(_journal_keys)
+        log_event(f"Recording input journal to {directory}")
+    return journal
+
+
+def stop_journal():
+    """Stop recording and finish the current journal segment"""
+    global journal
+    if journal is not None:
+        active_journal, journal = journal, None
+        remove_transition_hook(_journal_keys)
+        active_journal.close()
+
+
+def start_session_capture(path):
+    """Capture every message received from the local broker to a session file"""
+    global session_recorder
+    if session_recorder is None:
+        session_recorder = SessionRecorder(path)
+        log_event(f"Capturing local messages to {path}")
+    return session_recorder
+
+
+def stop_session_capture():
+    """Stop capturing and close the session file"""
+    global session_recorder
+    if session_recorder is not None:
+        recorder, session_recorder = session_recorder, None
+        recorder.close()
+        log_event(f"Captured {recorder.recorded} local messages to {recorder.path}")
+
+
+def reload_controller_mappings(controller_id):
+    """Reload a live controller's mappings from its settings file
+
+    The file is read and compiled on the calling thread (the mapping
+    watcher); only the swap and the release of keys held under the old
+    mappings run on the input thread. A missing or invalid file (e.g. saved
+    half way through an edit) is logged and the current mappings are kept.
+    Returns True if the mappings changed.
+    """
+    controller = controllers.get(controller_id)
+    if controller is None:
+        return False
+
+    manager = controller.settings_manager
+    path = os.path.join(manager.config_dir, f"controller_{controller_id}.json")
+    invalidate_settings_cache(path)
+    try:
+        record = manager.load_controller_record(controller_id)
+    except Exception as e:
+        log_event(f"Keeping mappings for controller {controller_id}: {path}: {e}")
+        return False
+    if record is None:
+        log_event(f"Keeping mappings for controller {controller_id}: {path} missing")
+        return False
+
+    if record.get("name"):
+        controller.name = record["name"]
+    mappings = dict(record["key_mappings"])
+    if mappings == controller.key_mappings:
+        return False
+    compiled = compile_key_mappings(mappings)
+
+    # Swapped on the input thread so no message is handled half way
+    # through the swap and the releases stay in order with its key presses
+    submit_input_task(_swap_controller_mappings, controller, mappings, compiled)
+    return True
+
+
+def _swap_controller_mappings(controller, mappings, compiled):
+    """Install reloaded mappings and release keys held under the old ones"""
+    controller.install_mappings(mappings, compiled)
+
+    # Keys held under the old mappings would otherwise never be released
+    key_state.release_controller(controller.id)
+    controller.active_keys.clear()
+
+    log_event(f"Reloaded mappings for controller {controller.id}")
+
+
+def start_mapping_watcher(config_dir="config"):
+    """Start reloading controllers whose mapping files change on disk"""
+    global mapping_watcher
+    if mapping_watcher is None:
+        mapping_watcher = MappingFileWatcher(config_dir, reload_controller_mappings)
+        mapping_watcher.start()
+    return mapping_watcher
+
+
+def stop_mapping_watcher():
+    """Stop watching controller mapping files"""
+    global mapping_watcher
+    if mapping_watcher is not None:
+        mapping_watcher.stop()
+        mapping_watcher = None
+
+
+def on_local_message(client, userdata, msg):
+    """Callback for when a message is received from the local MQTT broker
+
+    When the ingest worker is running the message is only enqueued here, so
+    paho's network thread never waits on parsing, key injection or the GUI.
+    """
+    received_ns = time.perf_counter_ns()
+    route = local_router.resolve(msg.topic)
+    if route is not None and route[1] is handle_frame_message:
+        record_frame_trailer(route[0], msg.payload, received_ns)
+    # The capture can be stopped from another thread between the check and
+    # the call, so use one reference (a stopped recorder ignores records)
+    active_recorder = session_recorder
+    if active_recorder is not None:
+        active_recorder.record(received_ns, msg.topic, msg.payload)
+    if ingest_queue is not None:
+        ingest_queue.put((client, userdata, msg.topic, msg.payload, received_ns))
+    else:
+        process_local_message(client, userdata, msg.topic, msg.payload, received_ns)
 
 
 def create_central_mqtt_client():
     """Create and configure a central MQTT client"""
+    # paho is only imported once a client is actually needed
+    import paho.mqtt.client as mqtt
+
     client = mqtt.Client()
     client.username_pw_set(CENTRAL_MQTT_USERNAME, CENTRAL_MQTT_PASSWORD)
     client.on_connect = on_central_connect
@@ -420,6 +1138,8 @@ def create_central_mqtt_client():
 
 def create_local_mqtt_client(userdata=None):
     """Create and configure a local MQTT client"""
+    import paho.mqtt.client as mqtt
+
     client = mqtt.Client(userdata=userdata)
     client.on_connect = on_local_connect
     client.on_message = on_local_message
@@ -442,11 +1162,11 @@ def connect_to_central_mqtt(client):
         return False
 
 
-def connect_to_local_mqtt(client):
+def connect_to_local_mqtt(client, port=None):
     """Connect to the local MQTT broker"""
     try:
         # First verify Mosquitto is actually running
-        if not is_mosquitto_running():
+        if not is_mosquitto_running(port or LOCAL_MQTT_PORT):
             log_event("Cannot connect: Local Mosquitto server is not running")
             if (
                 hasattr(client, "userdata")
@@ -457,15 +1177,16 @@ def connect_to_local_mqtt(client):
             return False
 
         # Get port from GUI if available
-        port = LOCAL_MQTT_PORT
-        if (
-            hasattr(client, "userdata")
-            and client.userdata
-            and hasattr(client.userdata, "mosquitto_port_entry")
-        ):
-            port_str = client.userdata.mosquitto_port_entry.get()
-            if port_str and port_str.isdigit():
-                port = int(port_str)
+        if port is None:
+            port = LOCAL_MQTT_PORT
+            if (
+                hasattr(client, "userdata")
+                and client.userdata
+                and hasattr(client.userdata, "mosquitto_port_entry")
+            ):
+                port_str = client.userdata.mosquitto_port_entry.get()
+                if port_str and port_str.isdigit():
+                    port = int(port_str)
 
         # Try to connect
         client.connect(LOCAL_MQTT_SERVER, port, keepalive=60)
@@ -493,8 +1214,6 @@ def cleanup_mqtt(client):
 
 def cleanup_controllers():
     """Release any pressed keys for all controllers"""
-    from utils.keyboard import release_key
-
+    key_state.release_all()
     for controller in controllers.values():
-        for key in controller.active_keys:
-            release_key(key)
+        controller.active_keys.clear()
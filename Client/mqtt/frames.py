@@ -0,0 +1,124 @@
+"""
+Binary Input Frames
+-------------------
+Fixed-layout binary frames published by controllers on the
+``gamecontroller/<id>/frame`` topic as a compact alternative to the JSON
+button/joystick messages.
+
+Every frame starts with a two byte header (version, frame type) followed by
+a little-endian payload whose layout depends on the frame type:
+
+    button   : <BB B B       version, type, button, pressed
+    joystick : <BB B B h h   version, type, joystick, pressed, x, y
+    state    : <BB B hhhh    version, type, button bitmask, x1, y1, x2, y2
+
+A state frame carries the full controller state for one tick: bit ``n - 1``
+of the bitmask is button ``n`` and the axes are joystick 1 and 2 positions.
+
+Any frame may be followed by an optional trailer for latency measurement:
+
+    trailer  : <I Q          sequence number, device time in microseconds
+
+Decoders that do not know the trailer ignore it. The encode_* helpers build
+frames for tests and the controller simulator.
+"""
+
+import struct
+
+# Wire format version understood by this client
+FRAME_VERSION = 1
+
+# Frame types
+FRAME_BUTTON = 1
+FRAME_JOYSTICK = 2
+FRAME_STATE = 3
+
+# Controls carried by a state frame
+STATE_BUTTONS = 6
+STATE_JOYSTICKS = 2
+
+# Precompiled frame layouts
+FRAME_HEADER = struct.Struct("<BB")
+BUTTON_FRAME = struct.Struct("<BBBB")
+JOYSTICK_FRAME = struct.Struct("<BBBBhh")
+STATE_FRAME = struct.Struct("<BBBhhhh")
+FRAME_TRAILER = struct.Struct("<IQ")
+
+# Frame size without trailer by frame type
+FRAME_SIZES = {
+    FRAME_BUTTON: BUTTON_FRAME.size,
+    FRAME_JOYSTICK: JOYSTICK_FRAME.size,
+    FRAME_STATE: STATE_FRAME.size,
+}
+
+
+def decode_frame(payload):
+    """Decode a binary frame without copying the payload
+
+    Returns ``(FRAME_BUTTON, button, pressed)``,
+    ``(FRAME_JOYSTICK, joystick, x, y, pressed)`` or
+    ``(FRAME_STATE, buttons, (x1, y1, x2, y2))``. Raises ValueError for
+    malformed, truncated or unsupported frames.
+    """
+    view = memoryview(payload)
+    if len(view) < FRAME_HEADER.size:
+        raise ValueError(f"Frame too short ({len(view)} bytes)")
+
+    version, frame_type = FRAME_HEADER.unpack_from(view)
+    if version != FRAME_VERSION:
+        raise ValueError(f"Unsupported frame version {version}")
+
+    if frame_type == FRAME_BUTTON:
+        if len(view) < BUTTON_FRAME.size:
+            raise ValueError("Truncated button frame")
+        _, _, button, pressed = BUTTON_FRAME.unpack_from(view)
+        return FRAME_BUTTON, button, bool(pressed)
+
+    if frame_type == FRAME_JOYSTICK:
+        if len(view) < JOYSTICK_FRAME.size:
+            raise ValueError("Truncated joystick frame")
+        _, _, joystick, pressed, x, y = JOYSTICK_FRAME.unpack_from(view)
+        return FRAME_JOYSTICK, joystick, x, y, bool(pressed)
+
+    if frame_type == FRAME_STATE:
+        if len(view) < STATE_FRAME.size:
+            raise ValueError("Truncated state frame")
+        fields = STATE_FRAME.unpack_from(view)
+        return FRAME_STATE, fields[2], fields[3:]
+
+    raise ValueError(f"Unknown frame type {frame_type}")
+
+
+def decode_frame_trailer(payload):
+    """Return the ``(sequence, device_us)`` trailer of a frame, or None
+
+    Frames without a trailer and malformed frames return None.
+    """
+    if len(payload) < FRAME_HEADER.size:
+        return None
+    size = FRAME_SIZES.get(payload[1])
+    if size is None or len(payload) != size + FRAME_TRAILER.size:
+        return None
+    return FRAME_TRAILER.unpack_from(payload, size)
+
+
+def encode_button_frame(button_num, pressed):
+    """Encode a button event as a binary frame"""
+    return BUTTON_FRAME.pack(FRAME_VERSION, FRAME_BUTTON, button_num, int(pressed))
+
+
+def encode_joystick_frame(joystick_num, x, y, pressed=False):
+    """Encode a joystick position as a binary frame"""
+    return JOYSTICK_FRAME.pack(
+        FRAME_VERSION, FRAME_JOYSTICK, joystick_num, int(pressed), x, y
+    )
+
+
+def encode_state_frame(buttons, axes):
+    """Encode a full controller state (button bitmask + 4 axes) as a frame"""
+    return STATE_FRAME.pack(FRAME_VERSION, FRAME_STATE, buttons, *axes)
+
+
+def encode_frame_trailer(sequence, device_us):
+    """Encode the optional sequence number and device time trailer"""
+    return FRAME_TRAILER.pack(sequence & 0xFFFFFFFF, device_us)
@@ -0,0 +1,283 @@
+"""
+Ingest Queue
+------------
+Bounded hand-off between paho's network thread and input processing.
+The MQTT callback only enqueues raw messages; a dedicated worker thread
+dequeues them and runs parsing, key injection, logging and GUI updates so
+slow consumers never stall socket reads or keepalives.
+
+When a ``coalesce`` function is given and a backlog has built up, the worker
+drains the whole backlog at once and lets ``coalesce`` drop items that are
+superseded by newer ones (e.g. intermediate joystick positions) before
+processing the rest in order.
+
+When the queue is full, the evicting policies only ever evict such
+superseded items, so a button press or release is never evicted. They are
+found with the ``supersede_key`` function, which maps an item to
+``(item, key)``: ``key`` is ``(stream, tag)`` for a snapshot, which is
+superseded by the next newer item of its stream if that has the same tag,
+BARRIER for an item (e.g. a task) that nothing is superseded across, or
+None. The queue indexes queued snapshots by stream from its first
+overflow until it next runs empty, so each put into a full queue costs
+O(1) instead of a pass over the queue.
+
+    evict_or_block   evict a superseded item, otherwise wait for room (the
+                     default: when the queue is full of button edges the
+                     producer, i.e. paho's network thread, waits for the
+                     worker, which is counted as ``blocked``)
+    evict_or_reject  evict a superseded item, otherwise reject the new item
+                     (counted as ``dropped``)
+    block            always wait for room
+"""
+
+import threading
+from collections import deque
+
+# What to do when a message arrives and the queue is full
+OVERFLOW_EVICT_OR_BLOCK = "evict_or_block"
+OVERFLOW_EVICT_OR_REJECT = "evict_or_reject"
+OVERFLOW_BLOCK = "block"
+OVERFLOW_POLICIES = (OVERFLOW_EVICT_OR_BLOCK, OVERFLOW_EVICT_OR_REJECT, OVERFLOW_BLOCK)
+
+# supersede_key result for items that nothing is superseded across
+BARRIER = "barrier"
+
+# Slot value of an item that left the queue (processed or evicted)
+_GONE = object()
+
+
+class IngestQueue:
+    """Bounded message queue consumed by a single worker thread"""
+
+    def __init__(
+        self,
+        process,
+        maxsize=1024,
+        overflow_policy=OVERFLOW_EVICT_OR_BLOCK,
+        coalesce=None,
+        coalesce_threshold=2,
+        supersede_key=None,
+    ):
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {overflow_policy}")
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+
+        self.process = process
+        self.maxsize = maxsize
+        self.overflow_policy = overflow_policy
+        self.coalesce = coalesce
+        self.coalesce_threshold = coalesce_threshold
+        self.supersede_key = supersede_key
+
+        # One-item lists, so an evicted item can be blanked in place
+        self._items = deque()
+        self._size = 0
+        # Newest queued (slot, tag) per stream and queued superseded slots,
+        # kept from the first overflow until the queue runs empty
+        self._latest = None
+        self._superseded = deque()
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+        self._all_done = threading.Condition(self._lock)
+        self._unfinished = 0
+        self._running = False
+        self._thread = None
+
+        # Metrics
+        self.enqueued = 0
+        self.processed = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.blocked = 0
+        self.max_depth = 0
+
+    def start(self):
+        """Start the worker thread"""
+        with self._lock:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(
+            target=self._run, name="ingest-worker", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout=5):
+        """Stop the worker after it has drained the queue"""
+        with self._lock:
+            self._running = False
+            self._not_empty.notify_all()
+            self._not_full.notify_all()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def put(self, item, critical=False):
+        """Enqueue an item, applying the overflow policy if the queue is full
+
+        A ``critical`` item is never rejected; it waits for room instead.
+        Returns False if the item was rejected.
+        """
+        with self._lock:
+            slot = [item]
+            evicting = (
+                self.overflow_policy != OVERFLOW_BLOCK
+                and self.supersede_key is not None
+            )
+            if evicting and self._latest is None and self._size >= self.maxsize:
+                self._build_index()
+            tracked = self._track(slot) if self._latest is not None else None
+
+            if self._size >= self.maxsize:
+                if evicting:
+                    self._evict_superseded()
+                if self._size >= self.maxsize:
+                    if (
+                        self.overflow_policy == OVERFLOW_EVICT_OR_REJECT
+                        and not critical
+                    ):
+                        if tracked is not None:
+                            self._untrack(*tracked)
+                        self.dropped += 1
+                        return False
+                    self.blocked += 1
+                    while self._size >= self.maxsize and self._running:
+                        self._not_full.wait()
+
+            self._items.append(slot)
+            self._size += 1
+            self._unfinished += 1
+            self.enqueued += 1
+            if self._size > self.max_depth:
+                self.max_depth = self._size
+            self._not_empty.notify()
+        return True
+
+    def _track(self, slot):
+        """Index a new slot, noting the queued slot it supersedes
+
+        Called with the lock held. ``supersede_key`` may replace the item
+        (e.g. with its parsed form). Returns what _untrack needs to forget
+        the slot again, or None.
+        """
+        try:
+            slot[0], key = self.supersede_key(slot[0])
+        except Exception as e:
+            print(f"Error indexing queued message: {e}")
+            return None
+        if key is BARRIER:
+            self._latest.clear()
+        elif key is not None:
+            stream, tag = key
+            previous = self._latest.get(stream)
+            if previous is not None and previous[1] == tag:
+                self._superseded.append(previous[0])
+            self._latest[stream] = (slot, tag)
+            return stream, previous
+        return None
+
+    def _untrack(self, stream, previous):
+        """Forget a rejected slot; called with the lock held"""
+        if previous is None:
+            self._latest.pop(stream, None)
+        else:
+            self._latest[stream] = previous
+
+    def _build_index(self):
+        """Index the queued slots; called with the lock held"""
+        self._latest = {}
+        self._superseded.clear()
+        for slot in self._items:
+            if slot[0] is not _GONE:
+                self._track(slot)
+
+    def _evict_superseded(self):
+        """Evict the oldest queued superseded item, if any
+
+        Called with the lock held. The superseding item is always newer, so
+        evicting never loses the latest state of a stream.
+        """
+        while self._superseded:
+            slot = self._superseded.popleft()
+            if slot[0] is not _GONE:
+                slot[0] = _GONE
+                self._size -= 1
+                self._unfinished -= 1
+                self.coalesced += 1
+                return True
+        return False
+
+    def is_worker_thread(self):
+        """Check whether the caller is the worker thread"""
+        return threading.current_thread() is self._thread
+
+    def join(self, timeout=None):
+        """Wait until every enqueued item has been processed"""
+        with self._lock:
+            return self._all_done.wait_for(lambda: self._unfinished == 0, timeout)
+
+    def get_metrics(self):
+        """Get a snapshot of the queue metrics"""
+        with self._lock:
+            return {
+                "depth": self._size,
+                "max_depth": self.max_depth,
+                "maxsize": self.maxsize,
+                "overflow_policy": self.overflow_policy,
+                "enqueued": self.enqueued,
+                "processed": self.processed,
+                "dropped": self.dropped,
+                "coalesced": self.coalesced,
+                "blocked": self.blocked,
+            }
+
+    def _run(self):
+        """Worker loop: process items until stopped and drained"""
+        while True:
+            with self._lock:
+                while not self._size and self._running:
+                    self._not_empty.wait()
+                if not self._size:
+                    return
+
+                # Take the whole backlog when it is large enough to coalesce
+                if self.coalesce and self._size >= self.coalesce_threshold:
+                    slots = list(self._items)
+                    self._items.clear()
+                    self._not_full.notify_all()
+                else:
+                    slot = self._items.popleft()
+                    while slot[0] is _GONE:
+                        slot = self._items.popleft()
+                    slots = [slot]
+                    self._not_full.notify()
+                batch = [slot[0] for slot in slots if slot[0] is not _GONE]
+                for slot in slots:
+                    slot[0] = _GONE
+                self._size -= len(batch)
+                if not self._size:
+                    self._items.clear()
+                    self._latest = None
+                    self._superseded.clear()
+
+            taken = len(batch)
+            if taken > 1:
+                try:
+                    batch = self.coalesce(batch)
+                except Exception as e:
+                    print(f"Error coalescing queued messages: {e}")
+
+            for item in batch:
+                try:
+                    self.process(item)
+                except Exception as e:
+                    print(f"Error processing queued message: {e}")
+
+            with self._lock:
+                self._unfinished -= taken
+                self.processed += len(batch)
+                self.coalesced += taken - len(batch)
+                if self._unfinished <= 0:
+                    self._all_done.notify_all()
@@ -0,0 +1,60 @@
+"""
+Topic Router
+------------
+Maps MQTT topics to message handlers. Patterns are matched level by level
+once per concrete topic; the resolved (controller_id, handler) pair is then
+cached so that routing a message is a single dict lookup.
+"""
+
+_MISS = object()
+
+
+class TopicRouter:
+    """Routes topics to handlers with a per-topic resolution cache"""
+
+    def __init__(self, max_cache_size=4096):
+        self.routes = []
+        self.max_cache_size = max_cache_size
+        self._cache = {}
+
+    def add_route(self, pattern, handler):
+        """Register a handler for a topic pattern
+
+        A ``+`` level matches any single topic level and its value is passed
+        to the handler as the controller ID.
+        """
+        self.routes.append((tuple(pattern.split("/")), handler))
+        self._cache.clear()
+
+    def resolve(self, topic):
+        """Return the ``(controller_id, handler)`` pair for a topic, or None"""
+        route = self._cache.get(topic, _MISS)
+        if route is _MISS:
+            route = self._match(topic)
+            # Unknown topics are cached too, so bound the cache size
+            if len(self._cache) >= self.max_cache_size:
+                self._cache.clear()
+            self._cache[topic] = route
+        return route
+
+    def clear_cache(self):
+        """Forget all resolved topics"""
+        self._cache.clear()
+
+    def _match(self, topic):
+        """Match a topic against the registered patterns"""
+        levels = topic.split("/")
+        for pattern, handler in self.routes:
+            if len(pattern) != len(levels):
+                continue
+
+            controller_id = None
+            for expected, level in zip(pattern, levels):
+                if expected == "+":
+                    if controller_id is None:
+                        controller_id = level
+                elif expected != level:
+                    break
+            else:
+                return controller_id, handler
+        return None
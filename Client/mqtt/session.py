@@ -0,0 +1,99 @@
+"""
+Session Files
+-------------
+Captures the raw messages received from the local broker, with their
+receive time, so a session can be replayed later through the same
+processing path (see replay.py).
+
+File layout (little-endian):
+    header  SESSION_HEADER  magic, version, wall clock and perf_counter_ns
+                            at capture start
+    records SESSION_RECORD  t_ns, topic length, payload length, followed by
+                            the UTF-8 topic and the raw payload
+
+``t_ns`` is the time.perf_counter_ns() stamp taken when the message arrived.
+"""
+
+import struct
+import threading
+import time
+
+SESSION_MAGIC = b"GCSESS"
+SESSION_VERSION = 1
+
+# magic, version, wall time_ns, perf_counter_ns
+SESSION_HEADER = struct.Struct("<6sHqq")
+# t_ns, topic length, payload length
+SESSION_RECORD = struct.Struct("<qHI")
+
+
+class SessionRecorder:
+    """Appends received messages to a session file"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, "wb")
+        self._file.write(
+            SESSION_HEADER.pack(
+                SESSION_MAGIC, SESSION_VERSION, time.time_ns(), time.perf_counter_ns()
+            )
+        )
+
+        # Metrics
+        self.recorded = 0
+
+    def record(self, t_ns, topic, payload):
+        """Append one message"""
+        topic_bytes = topic.encode()
+        if isinstance(payload, str):
+            payload = payload.encode()
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.write(
+                SESSION_RECORD.pack(t_ns, len(topic_bytes), len(payload))
+                + topic_bytes
+                + payload
+            )
+            self.recorded += 1
+
+    def close(self):
+        """Write out buffered messages and close the file"""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def get_metrics(self):
+        """Get the number of recorded messages"""
+        return {"recorded": self.recorded, "path": self.path}
+
+
+def read_session(path):
+    """Load a session file as a list of ``(t_ns, topic, payload)`` tuples
+
+    Raises ValueError for files that are not sessions or are truncated.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    if len(data) < SESSION_HEADER.size:
+        raise ValueError(f"Not a session file: {path}")
+    magic, version, _, _ = SESSION_HEADER.unpack_from(data)
+    if magic != SESSION_MAGIC or version != SESSION_VERSION:
+        raise ValueError(f"Not a version {SESSION_VERSION} session file: {path}")
+
+    records = []
+    offset = SESSION_HEADER.size
+    while offset < len(data):
+        if offset + SESSION_RECORD.size > len(data):
+            raise ValueError(f"Truncated session file: {path}")
+        t_ns, topic_len, payload_len = SESSION_RECORD.unpack_from(data, offset)
+        offset += SESSION_RECORD.size
+        end = offset + topic_len + payload_len
+        if end > len(data):
+            raise ValueError(f"Truncated session file: {path}")
+        topic = data[offset : offset + topic_len].decode()
+        records.append((t_ns, topic, data[offset + topic_len : end]))
+        offset = end
+    return records
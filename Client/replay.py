@@ -0,0 +1,243 @@
+"""
+Session Replay
+--------------
+Feeds a session captured with ``headless.py --capture FILE`` back through
+the local message path (on_local_message) without a broker, at the
+original timing, N times faster or as fast as possible, and reports the
+throughput. Keys go to the recording backend by default, so a replay
+injects nothing and its key events can be written out and diffed between
+runs, e.g. after changing mappings or joystick thresholds.
+
+Controllers are created from the IDs in the session's topics with the
+mappings in the config directory; captured registration requests are
+skipped.
+"""
+
+import argparse
+import os
+import time
+from collections import namedtuple
+
+# Ensure we're in the correct directory (Client directory)
+script_dir = os.path.dirname(os.path.abspath(__file__))
+os.chdir(script_dir)
+
+from mqtt.client import (
+    on_local_message,
+    handle_register_message,
+    local_router,
+    controllers,
+    cleanup_controllers,
+    start_ingest_worker,
+    stop_ingest_worker,
+    drain_ingest_queue,
+    get_ingest_metrics,
+    configure_log_throttle,
+    flush_log_summaries,
+    INGEST_QUEUE_SIZE,
+)
+from mqtt.ingest import OVERFLOW_BLOCK, OVERFLOW_POLICIES
+from mqtt.session import read_session
+from config.settings import get_settings_manager
+from controller import GameController
+from controller.profiles import profile_library
+from utils.log_pipeline import start_logging, stop_logging
+from utils.keyboard import (
+    select_backend,
+    close_backend,
+    get_backend,
+    get_backend_names,
+)
+
+# Stand-in for the paho message object passed to on_local_message
+ReplayMessage = namedtuple("ReplayMessage", ["topic", "payload"])
+
+
+class ReplayBridge:
+    """MQTT client and userdata standing in for the broker and the GUI"""
+
+    def __init__(self, settings_manager):
+        self.settings_manager = settings_manager
+        self.published = []
+
+    def publish(self, topic, payload=None, *args, **kwargs):
+        """Record messages the handlers would have published"""
+        self.published.append((topic, payload))
+
+
+def prepare_messages(records):
+    """Build ``(t_ns, message)`` pairs, skipping registration requests"""
+    messages = []
+    for t_ns, topic, payload in records:
+        route = local_router.resolve(topic)
+        if route is not None and route[1] is handle_register_message:
+            continue
+        messages.append((t_ns, ReplayMessage(topic, payload)))
+    return messages
+
+
+def register_session_controllers(messages, settings_manager):
+    """Create a fresh controller for every controller ID in the session"""
+    cleanup_controllers()
+    controllers.clear()
+    for _, msg in messages:
+        route = local_router.resolve(msg.topic)
+        if route is not None and route[0] is not None and route[0] not in controllers:
+            controllers[route[0]] = GameController(route[0], settings_manager)
+
+
+def replay(messages, bridge, speed=1.0):
+    """Feed messages to on_local_message at ``speed`` times the original pace
+
+    With a speed of 0 messages are fed as fast as possible. Returns the
+    elapsed nanoseconds, including draining the ingest queue if it is
+    running, and the largest delay behind schedule.
+    """
+    first_ns = messages[0][0] if messages else 0
+    max_lag_ns = 0
+    start_ns = time.perf_counter_ns()
+    for t_ns, msg in messages:
+        if speed:
+            due_ns = start_ns + int((t_ns - first_ns) / speed)
+            delay_ns = due_ns - time.perf_counter_ns()
+            if delay_ns > 0:
+                time.sleep(delay_ns / 1e9)
+            elif -delay_ns > max_lag_ns:
+                max_lag_ns = -delay_ns
+        on_local_message(bridge, bridge, msg)
+    drain_ingest_queue()
+    return time.perf_counter_ns() - start_ns, max_lag_ns
+
+
+def write_key_events(path, events):
+    """Write ``code down|up`` lines, one per injected key transition"""
+    with open(path, "w") as f:
+        for _, code, down in events:
+            f.write(f"{code} {'down' if down else 'up'}\n")
+
+
+def parse_args(argv=None):
+    """Parse the replay command line"""
+    parser = argparse.ArgumentParser(
+        description="Replay a captured controller session without a broker"
+    )
+    parser.add_argument("session", help="session file captured with --capture")
+    parser.add_argument(
+        "--speed",
+        type=float,
+        default=1.0,
+        help="playback speed multiplier, 0 for as fast as possible (default: 1)",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=1, help="number of replays (default: 1)"
+    )
+    parser.add_argument(
+        "--config-dir", default="config", help="settings directory (default: config)"
+    )
+    parser.add_argument(
+        "--backend",
+        choices=get_backend_names(),
+        default="recording",
+        help="keyboard backend (default: recording)",
+    )
+    parser.add_argument(
+        "--ingest",
+        action="store_true",
+        help="process messages on the ingest worker as the live bridge does",
+    )
+    parser.add_argument(
+        "--queue-size",
+        type=int,
+        default=INGEST_QUEUE_SIZE,
+        help=f"input queue capacity with --ingest (default: {INGEST_QUEUE_SIZE})",
+    )
+    parser.add_argument(
+        "--overflow-policy",
+        choices=OVERFLOW_POLICIES,
+        default=OVERFLOW_BLOCK,
+        help=f"what to do when the input queue is full (default: {OVERFLOW_BLOCK})",
+    )
+    parser.add_argument(
+        "--no-coalesce",
+        action="store_true",
+        help="process every queued joystick/state message with --ingest",
+    )
+    parser.add_argument(
+        "--keys-out",
+        metavar="FILE",
+        help="write the recorded key events of the last replay to FILE",
+    )
+    parser.add_argument(
+        "--verbose", action="store_true", help="print input event log lines"
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Replay entry point"""
+    args = parse_args(argv)
+
+    settings_manager = get_settings_manager(args.config_dir)
+    settings_manager.preload()
+
+    # Input event lines would dominate a fast replay, so only print them
+    # on request
+    start_logging(console=args.verbose)
+    if args.verbose:
+        configure_log_throttle(0)
+
+    select_backend(args.backend)
+    profile_library.load(settings_manager)
+    backend = get_backend()
+
+    messages = prepare_messages(read_session(args.session))
+    bridge = ReplayBridge(settings_manager)
+    if args.ingest:
+        start_ingest_worker(
+            maxsize=args.queue_size,
+            overflow_policy=args.overflow_policy,
+            coalesce=not args.no_coalesce,
+        )
+
+    speed = f"{args.speed:g}x" if args.speed else "max"
+    for run in range(1, args.repeat + 1):
+        register_session_controllers(messages, settings_manager)
+        if hasattr(backend, "clear"):
+            backend.clear()
+
+        elapsed_ns, max_lag_ns = replay(messages, bridge, args.speed)
+
+        seconds = elapsed_ns / 1e9
+        rate = len(messages) / seconds if seconds else 0
+        summary = (
+            f"Replay {run}/{args.repeat} at {speed}: {len(messages)} messages "
+            f"in {seconds:.3f} s ({rate:,.0f} msg/s)"
+        )
+        if args.speed:
+            summary += f", max {max_lag_ns / 1e6:.2f} ms behind"
+        if hasattr(backend, "get_events"):
+            summary += f", {len(backend.get_events())} key events"
+        print(summary)
+
+    if args.ingest:
+        metrics = get_ingest_metrics()
+        stop_ingest_worker()
+        print(
+            f"Ingest queue: {metrics['processed']} processed, "
+            f"{metrics['coalesced']} coalesced, {metrics['dropped']} dropped"
+        )
+
+    if args.keys_out:
+        if hasattr(backend, "get_events"):
+            write_key_events(args.keys_out, backend.get_events())
+        else:
+            print(f"Backend {args.backend} does not record key events")
+
+    cleanup_controllers()
+    close_backend()
+    flush_log_summaries()
+    stop_logging()
+
+
+if __name__ == "__main__":
+    main()
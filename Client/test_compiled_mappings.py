@@ -0,0 +1,121 @@
+"""
+Compiled mappings test
+----------------------
+Checks the index-addressed key tables built by compile_key_mappings and
+that button/joystick input is looked up through them, including input
+with control numbers sent as strings or missing.
+"""
+
+import pytest
+
+from config.settings import SettingsManager
+from controller import GameController
+from controller.game_controller import compile_key_mappings
+from mqtt import client
+from utils.keyboard import BACKEND_ENV_VAR, select_backend, close_backend
+from utils.key_state import key_state
+
+
+@pytest.fixture
+def recorder(monkeypatch):
+    monkeypatch.delenv(BACKEND_ENV_VAR, raising=False)
+    backend = select_backend("recording")
+    yield backend
+    client.controllers.clear()
+    key_state.release_all()
+    close_backend()
+
+
+@pytest.fixture
+def controller(tmp_path, recorder):
+    controller = GameController("1", SettingsManager(str(tmp_path)))
+    controller.key_mappings = {
+        "button1": "space",
+        "button3": "",
+        "joystick1_up": "w",
+        "joystick1_right": "d",
+    }
+    client.controllers["1"] = controller
+    return controller
+
+
+def key_events(backend):
+    return [(code, down) for _, code, down in backend.get_events()]
+
+
+def test_tables_are_indexed_by_control_number(recorder):
+    compiled = compile_key_mappings(
+        {
+            "button1": "Space",
+            "button3": "",
+            "joystick2_left": "a",
+            "joystick2_up": "w",
+            "joystick1_sideways": "x",
+            "dpad_up": "up",
+        }
+    )
+
+    assert compiled.buttons == (None, ("Space", "space"), None, None)
+    assert compiled.joysticks == (None, None, (("w", "w"), None, ("a", "a"), None))
+
+
+def test_update_key_mapping_recompiles(controller):
+    controller.update_key_mapping("button2", "x")
+
+    assert controller.compiled_mappings.buttons[2] == ("x", "x")
+
+
+def test_button_input_uses_the_compiled_table(controller, recorder):
+    client.handle_button_input("1", 1, True, None)
+    client.handle_button_input("1", 3, True, None)
+    client.handle_button_input("1", 9, True, None)
+    client.handle_button_input("1", 1, False, None)
+
+    assert key_events(recorder) == [("space", True), ("space", False)]
+
+
+def test_joystick_input_uses_the_compiled_table(controller, recorder):
+    client.handle_joystick_input("1", 1, 900, 100, False, None)
+    client.handle_joystick_input("1", 1, 512, 512, False, None)
+    client.handle_joystick_input("1", 2, 900, 900, False, None)
+
+    assert key_events(recorder) == [
+        ("d", True),
+        ("w", True),
+        ("d", False),
+        ("w", False),
+    ]
+
+
+def test_numbers_sent_as_strings_are_coerced(controller, recorder):
+    assert client.handle_button_input("1", "1", True, None) == 1
+    assert client.handle_joystick_input("1", "1", "900", "512", False, None) == 1
+
+    assert controller.button_states[1] is True
+    assert controller.joystick_states[1]["x"] == 900
+    assert key_events(recorder) == [("space", True), ("d", True)]
+
+
+@pytest.mark.parametrize("number", [None, "one", [1]])
+def test_invalid_numbers_are_rejected_before_touching_state(controller, number):
+    button_states = dict(controller.button_states)
+    joystick_states = dict(controller.joystick_states)
+
+    assert client.handle_button_input("1", number, True, None) is None
+    assert client.handle_joystick_input("1", number, 900, 900, False, None) is None
+    assert client.handle_joystick_input("1", 1, number, 900, False, None) is None
+
+    assert controller.button_states == button_states
+    assert controller.joystick_states == joystick_states
+
+
+def test_json_messages_without_a_number_are_ignored(controller, recorder):
+    client.handle_button_message(None, None, "1", b'{"pressed": true}')
+    client.handle_joystick_message(None, None, "1", b'{"x": 900, "y": 512}')
+    client.handle_joystick_message(
+        None, None, "1", b'{"joystick": "1", "x": 900, "y": 512}'
+    )
+
+    assert key_events(recorder) == [("d", True)]
+    assert None not in controller.button_states
+    assert None not in controller.joystick_states
@@ -6,10 +6,19 @@ This script simulates an ESP32 controller connecting to the system for testing.
 
 import paho.mqtt.client as mqtt
 import json
+import sys
 import time
 import random
 import threading
 
+# Frames are encoded with the client's own definitions (run from Client/)
+from mqtt.frames import (
+    encode_button_frame,
+    encode_joystick_frame,
+    encode_state_frame,
+    encode_frame_trailer,
+)
+
 # Central server settings
 CENTRAL_SERVER = "31.44.2.222"
 CENTRAL_PORT = 1883
@@ -23,12 +32,21 @@ BASE_TOPIC = "gamecontroller"
 
 
 class ESP32ControllerSimulation:
-    def __init__(self):
+    def __init__(self, use_binary=False, burst=0, use_state=False, timestamps=False):
         self.device_id = f"ESP32-SIM-{random.randint(1000, 9999)}"
         self.controller_id = None
         self.local_client_ip = None
         self.local_client_port = None
 
+        # Wire format and optional throughput burst size
+        self.use_binary = use_binary or use_state
+        self.use_state = use_state
+        self.burst = burst
+
+        # Append a sequence number and device time to binary frames
+        self.timestamps = timestamps
+        self.sequence = 0
+
         # MQTT clients
         self.central_client = None
         self.local_client = None
@@ -38,6 +56,10 @@ class ESP32ControllerSimulation:
         self.connected_to_local = False
 
         print(f"Starting ESP32 Controller Simulation with device ID: {self.device_id}")
+        wire_format = "state" if use_state else "binary" if use_binary else "json"
+        print(f"Wire format: {wire_format}")
+        if timestamps and self.use_binary:
+            print("Frames carry sequence numbers and device timestamps")
 
     def on_central_connect(self, client, userdata, flags, rc):
         if rc == 0:
@@ -99,7 +121,8 @@ class ESP32ControllerSimulation:
             print(f"Assigned controller ID: {self.controller_id}")
 
             # Start sending simulated input
-            threading.Thread(target=self.simulate_input, daemon=True).start()
+            target = self.send_burst if self.burst else self.simulate_input
+            threading.Thread(target=target, daemon=True).start()
 
     def connect_to_central(self):
         """Connect to central MQTT server"""
@@ -139,15 +162,26 @@ class ESP32ControllerSimulation:
         except Exception as e:
             print(f"Failed to connect to local client: {e}")
 
+    def stamp_frame(self, frame):
+        """Append the sequence/timestamp trailer to a frame if enabled"""
+        if not self.timestamps:
+            return frame
+        self.sequence += 1
+        return frame + encode_frame_trailer(self.sequence, time.monotonic_ns() // 1000)
+
     def send_button_input(self, button_num, pressed):
         """Send button input to local client"""
         if not self.connected_to_local or not self.controller_id:
             return
 
-        message = {"button": button_num, "pressed": pressed}
-
-        topic = f"{BASE_TOPIC}/{self.controller_id}/button"
-        self.local_client.publish(topic, json.dumps(message))
+        if self.use_binary:
+            topic = f"{BASE_TOPIC}/{self.controller_id}/frame"
+            payload = self.stamp_frame(encode_button_frame(button_num, pressed))
+            self.local_client.publish(topic, payload)
+        else:
+            message = {"button": button_num, "pressed": pressed}
+            topic = f"{BASE_TOPIC}/{self.controller_id}/button"
+            self.local_client.publish(topic, json.dumps(message))
         print(f"Sent button {button_num} {'pressed' if pressed else 'released'}")
 
     def send_joystick_input(self, joystick_num, x, y, pressed=False):
@@ -155,12 +189,29 @@ class ESP32ControllerSimulation:
         if not self.connected_to_local or not self.controller_id:
             return
 
-        message = {"joystick": joystick_num, "x": x, "y": y, "pressed": pressed}
-
-        topic = f"{BASE_TOPIC}/{self.controller_id}/joystick"
-        self.local_client.publish(topic, json.dumps(message))
+        if self.use_binary:
+            topic = f"{BASE_TOPIC}/{self.controller_id}/frame"
+            payload = self.stamp_frame(
+                encode_joystick_frame(joystick_num, x, y, pressed)
+            )
+        else:
+            message = {"joystick": joystick_num, "x": x, "y": y, "pressed": pressed}
+            topic = f"{BASE_TOPIC}/{self.controller_id}/joystick"
+            payload = json.dumps(message)
+        self.local_client.publish(topic, payload)
         print(f"Sent joystick {joystick_num} position: ({x}, {y})")
 
+    def send_state_input(self, buttons, axes):
+        """Send a full controller state frame to local client"""
+        if not self.connected_to_local or not self.controller_id:
+            return
+
+        topic = f"{BASE_TOPIC}/{self.controller_id}/frame"
+        self.local_client.publish(
+            topic, self.stamp_frame(encode_state_frame(buttons, axes))
+        )
+        print(f"Sent state buttons={buttons:06b} axes={axes}")
+
     def simulate_input(self):
         """Simulate controller input in a loop"""
         print("Starting input simulation...")
@@ -190,6 +241,36 @@ class ESP32ControllerSimulation:
             button_cycle += 1
             time.sleep(2)
 
+    def send_burst(self):
+        """Publish a burst of joystick frames as fast as possible"""
+        print(f"Sending burst of {self.burst} joystick frames...")
+        positions = [(512, 100), (900, 512), (512, 900), (100, 512), (512, 512)]
+
+        if self.use_state:
+            topic = f"{BASE_TOPIC}/{self.controller_id}/frame"
+            payloads = [encode_state_frame(0, (x, y, 512, 512)) for x, y in positions]
+        elif self.use_binary:
+            topic = f"{BASE_TOPIC}/{self.controller_id}/frame"
+            payloads = [encode_joystick_frame(1, x, y) for x, y in positions]
+        else:
+            topic = f"{BASE_TOPIC}/{self.controller_id}/joystick"
+            payloads = [
+                json.dumps({"joystick": 1, "x": x, "y": y, "pressed": False})
+                for x, y in positions
+            ]
+
+        start_time = time.perf_counter()
+        stamp = self.stamp_frame if self.use_binary else (lambda payload: payload)
+        for i in range(self.burst):
+            self.local_client.publish(topic, stamp(payloads[i % len(payloads)]))
+        elapsed = time.perf_counter() - start_time
+
+        payload_bytes = sum(len(p) for p in payloads) / len(payloads)
+        print(
+            f"Sent {self.burst} frames in {elapsed:.3f}s "
+            f"({self.burst / elapsed:.0f} frames/s, ~{payload_bytes:.0f} bytes each)"
+        )
+
     def run(self):
         """Run the simulation"""
         # Connect to central server
@@ -225,5 +306,16 @@ class ESP32ControllerSimulation:
 
 
 if __name__ == "__main__":
-    sim = ESP32ControllerSimulation()
+    # Usage: test_controller_simulation.py [--binary | --state] [--timestamps]
+    #                                      [--burst N]
+    burst = 0
+    if "--burst" in sys.argv:
+        burst = int(sys.argv[sys.argv.index("--burst") + 1])
+
+    sim = ESP32ControllerSimulation(
+        use_binary="--binary" in sys.argv,
+        burst=burst,
+        use_state="--state" in sys.argv,
+        timestamps="--timestamps" in sys.argv,
+    )
     sim.run()
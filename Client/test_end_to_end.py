@@ -0,0 +1,131 @@
+"""
+End-to-end input test
+---------------------
+Sends JSON and binary frame messages through on_local_message, directly and
+through the ingest worker, and checks the presses and releases that reach
+the recording backend.
+"""
+
+import json
+from collections import namedtuple
+
+import pytest
+
+from config.settings import SettingsManager
+from controller import GameController
+from mqtt import client
+from mqtt.frames import encode_button_frame, encode_joystick_frame, encode_state_frame
+from utils.keyboard import BACKEND_ENV_VAR, select_backend, close_backend
+from utils.key_state import key_state
+
+# Stand-in for the paho message object
+Message = namedtuple("Message", "topic payload")
+
+
+@pytest.fixture
+def recorder(monkeypatch):
+    monkeypatch.delenv(BACKEND_ENV_VAR, raising=False)
+    backend = select_backend("recording")
+    yield backend
+    client.stop_ingest_worker()
+    client.controllers.clear()
+    key_state.release_all()
+    close_backend()
+
+
+@pytest.fixture(params=["direct", "ingest"])
+def bridge(request, tmp_path, recorder):
+    controller = GameController("1", SettingsManager(str(tmp_path)))
+    controller.key_mappings = {
+        "button1": "space",
+        "button2": "e",
+        "joystick1_up": "w",
+        "joystick1_down": "s",
+        "joystick1_left": "a",
+        "joystick1_right": "d",
+    }
+    client.controllers["1"] = controller
+    if request.param == "ingest":
+        # Without coalescing every intermediate position reaches the handlers
+        client.start_ingest_worker(coalesce=False)
+    return recorder
+
+
+def send(topic, payload):
+    client.on_local_message(None, None, Message(f"gamecontroller/1/{topic}", payload))
+
+
+def send_json(topic, message):
+    send(topic, json.dumps(message).encode())
+
+
+def key_events(backend):
+    assert client.drain_ingest_queue(5)
+    return [(code, down) for _, code, down in backend.get_events()]
+
+
+def test_json_messages(bridge):
+    send_json("button", {"button": 1, "pressed": True})
+    send_json("joystick", {"joystick": 1, "x": 900, "y": 512, "pressed": False})
+    send_json("joystick", {"joystick": 1, "x": 900, "y": 100, "pressed": False})
+    send_json("button", {"button": 1, "pressed": False})
+    send_json("joystick", {"joystick": 1, "x": 512, "y": 512, "pressed": False})
+
+    assert key_events(bridge) == [
+        ("space", True),
+        ("d", True),
+        ("w", True),
+        ("space", False),
+        ("d", False),
+        ("w", False),
+    ]
+
+
+def test_binary_frames(bridge):
+    send("frame", encode_button_frame(2, True))
+    send("frame", encode_joystick_frame(1, 100, 512))
+    send("frame", encode_joystick_frame(1, 512, 900))
+    send("frame", encode_button_frame(2, False))
+
+    assert key_events(bridge) == [
+        ("e", True),
+        ("a", True),
+        ("a", False),
+        ("s", True),
+        ("e", False),
+    ]
+
+
+def test_state_frames(bridge):
+    send("frame", encode_state_frame(0b01, (512, 512, 512, 512)))
+    send("frame", encode_state_frame(0b11, (900, 512, 512, 512)))
+    send("frame", encode_state_frame(0b10, (900, 512, 512, 512)))
+    send("frame", encode_state_frame(0b00, (512, 512, 512, 512)))
+
+    assert key_events(bridge) == [
+        ("space", True),
+        ("e", True),
+        ("d", True),
+        ("space", False),
+        ("e", False),
+        ("d", False),
+    ]
+
+
+def test_json_and_frames_share_controller_state(bridge):
+    send_json("button", {"button": 1, "pressed": True})
+    # Already pressed by the JSON message, so only button 2 changes
+    send("frame", encode_state_frame(0b11, (512, 512, 512, 512)))
+    send("frame", encode_button_frame(1, False))
+
+    assert key_events(bridge) == [("space", True), ("e", True), ("space", False)]
+
+
+def test_unknown_controllers_and_malformed_payloads_inject_nothing(bridge):
+    client.on_local_message(
+        None, None, Message("gamecontroller/9/frame", encode_button_frame(1, True))
+    )
+    send("frame", b"\x01")
+    send("button", b"{not json")
+
+    assert key_events(bridge) == []
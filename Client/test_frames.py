@@ -0,0 +1,73 @@
+"""
+Binary frame test
+-----------------
+Round-trips button, joystick and state frames through the encode helpers
+and decode_frame, with and without the latency trailer, and checks that
+malformed frames are rejected.
+"""
+
+import pytest
+
+from mqtt.frames import (
+    FRAME_BUTTON,
+    FRAME_HEADER,
+    FRAME_JOYSTICK,
+    FRAME_STATE,
+    decode_frame,
+    decode_frame_trailer,
+    encode_button_frame,
+    encode_frame_trailer,
+    encode_joystick_frame,
+    encode_state_frame,
+)
+
+
+def test_button_frame_round_trips():
+    assert decode_frame(encode_button_frame(3, True)) == (FRAME_BUTTON, 3, True)
+    assert decode_frame(encode_button_frame(3, False)) == (FRAME_BUTTON, 3, False)
+
+
+def test_joystick_frame_round_trips():
+    frame = encode_joystick_frame(2, -100, 1023, pressed=True)
+
+    assert decode_frame(frame) == (FRAME_JOYSTICK, 2, -100, 1023, True)
+
+
+def test_state_frame_round_trips():
+    frame = encode_state_frame(0b100101, (0, 1023, 512, 511))
+
+    assert decode_frame(frame) == (FRAME_STATE, 0b100101, (0, 1023, 512, 511))
+
+
+def test_trailer_is_ignored_by_decode_frame():
+    frame = encode_button_frame(1, True)
+    stamped = frame + encode_frame_trailer(2**32 + 7, 123456)
+
+    assert decode_frame(stamped) == decode_frame(frame)
+    # Sequence numbers are sent modulo 2**32
+    assert decode_frame_trailer(stamped) == (7, 123456)
+    assert decode_frame_trailer(frame) is None
+
+
+def test_decode_accepts_memoryview_and_bytearray():
+    frame = encode_joystick_frame(1, 10, 20)
+
+    assert decode_frame(memoryview(frame)) == decode_frame(frame)
+    assert decode_frame(bytearray(frame)) == decode_frame(frame)
+
+
+@pytest.mark.parametrize(
+    "payload",
+    [
+        b"",
+        b"\x01",
+        FRAME_HEADER.pack(2, FRAME_BUTTON) + b"\x01\x01",
+        FRAME_HEADER.pack(1, 9) + b"\x01\x01",
+        encode_joystick_frame(1, 0, 0)[:-1],
+        encode_state_frame(0, (0, 0, 0, 0))[:-2],
+    ],
+)
+def test_malformed_frames_are_rejected(payload):
+    with pytest.raises(ValueError):
+        decode_frame(payload)
+    assert decode_frame_trailer(payload) is None
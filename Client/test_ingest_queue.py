@@ -0,0 +1,268 @@
+"""
+Ingest queue test
+-----------------
+Checks that coalescing and the overflow policies of the ingest queue only
+ever drop superseded joystick snapshots, never button edges, and that a
+full queue finds them without a pass over the whole queue.
+"""
+
+import json
+import threading
+import time
+
+from mqtt.client import InputTask, coalesce_local_messages, local_message_key
+from mqtt.ingest import (
+    IngestQueue,
+    OVERFLOW_BLOCK,
+    OVERFLOW_EVICT_OR_BLOCK,
+    OVERFLOW_EVICT_OR_REJECT,
+)
+
+
+def button(controller_id, button_num, pressed):
+    payload = json.dumps({"button": button_num, "pressed": pressed}).encode()
+    return (None, None, f"gamecontroller/{controller_id}/button", payload, 0)
+
+
+def joystick(controller_id, joystick_num, x, pressed=False):
+    payload = json.dumps(
+        {"joystick": joystick_num, "x": x, "y": 512, "pressed": pressed}
+    ).encode()
+    return (None, None, f"gamecontroller/{controller_id}/joystick", payload, 0)
+
+
+def describe(item):
+    """Summarize a queued item, whether its payload was parsed or not"""
+    if type(item) is InputTask:
+        return ("task",)
+    payload = item[3]
+    if not isinstance(payload, dict):
+        payload = json.loads(payload)
+    if "button" in payload:
+        return ("button", payload["button"], payload["pressed"])
+    return ("joystick", payload["joystick"], payload["x"], payload["pressed"])
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.001)
+
+
+def drain(queue):
+    """Process everything queued so far and stop the worker"""
+    queue.start()
+    assert queue.join(5)
+    queue.stop()
+
+
+def make_queue(processed, maxsize, policy, gate=None):
+    def process(item):
+        if gate is not None:
+            gate.wait(5)
+        processed.append(describe(item))
+
+    return IngestQueue(process, maxsize, policy, supersede_key=local_message_key)
+
+
+def test_coalesce_keeps_newest_position_and_every_button():
+    batch = [
+        joystick("1", 1, 100),
+        button("1", 1, True),
+        joystick("1", 1, 200),
+        joystick("1", 1, 300),
+        button("1", 1, False),
+        joystick("1", 2, 400),
+    ]
+
+    assert [describe(item) for item in coalesce_local_messages(batch)] == [
+        ("button", 1, True),
+        ("joystick", 1, 300, False),
+        ("button", 1, False),
+        ("joystick", 2, 400, False),
+    ]
+
+
+def test_coalesce_keeps_joystick_press_edges():
+    batch = [
+        joystick("1", 1, 100),
+        joystick("1", 1, 200, pressed=True),
+        joystick("1", 1, 300, pressed=True),
+        joystick("1", 1, 400),
+    ]
+
+    assert [describe(item) for item in coalesce_local_messages(batch)] == [
+        ("joystick", 1, 100, False),
+        ("joystick", 1, 300, True),
+        ("joystick", 1, 400, False),
+    ]
+
+
+def test_coalesce_does_not_merge_across_input_tasks():
+    batch = [joystick("1", 1, 100), InputTask(print, ()), joystick("1", 1, 200)]
+
+    assert [describe(item) for item in coalesce_local_messages(batch)] == [
+        ("joystick", 1, 100, False),
+        ("task",),
+        ("joystick", 1, 200, False),
+    ]
+
+
+def test_worker_coalesces_a_backlog_in_order():
+    processed = []
+    queue = IngestQueue(
+        lambda item: processed.append(describe(item)),
+        coalesce=coalesce_local_messages,
+    )
+    for x in range(10):
+        queue.put(joystick("1", 1, x))
+    queue.put(button("1", 1, True))
+
+    queue.start()
+    assert queue.join(5)
+    queue.stop()
+
+    assert processed == [("joystick", 1, 9, False), ("button", 1, True)]
+    metrics = queue.get_metrics()
+    assert metrics["processed"] == 2
+    assert metrics["coalesced"] == 9
+
+
+def test_full_queue_evicts_superseded_joysticks():
+    processed = []
+    queue = make_queue(processed, 3, OVERFLOW_EVICT_OR_REJECT)
+    queue.put(joystick("1", 1, 100))
+    queue.put(joystick("1", 1, 200))
+    queue.put(button("1", 1, True))
+
+    assert queue.put(joystick("1", 1, 300))
+    assert queue.put(joystick("1", 1, 400))
+    drain(queue)
+
+    assert processed == [
+        ("button", 1, True),
+        ("joystick", 1, 300, False),
+        ("joystick", 1, 400, False),
+    ]
+    metrics = queue.get_metrics()
+    assert metrics["coalesced"] == 2
+    assert metrics["dropped"] == 0
+
+
+def test_full_queue_keeps_joystick_press_edges():
+    processed = []
+    queue = make_queue(processed, 2, OVERFLOW_EVICT_OR_REJECT)
+    queue.put(joystick("1", 1, 100))
+    queue.put(joystick("1", 1, 200, pressed=True))
+
+    assert not queue.put(joystick("1", 1, 300))
+    assert queue.put(joystick("1", 1, 400, pressed=True))
+    drain(queue)
+
+    assert processed == [
+        ("joystick", 1, 100, False),
+        ("joystick", 1, 400, True),
+    ]
+
+
+def test_evict_or_reject_rejects_buttons_instead_of_evicting_edges():
+    processed = []
+    queue = make_queue(processed, 2, OVERFLOW_EVICT_OR_REJECT)
+    queue.put(button("1", 1, True))
+    queue.put(button("1", 1, False))
+
+    assert not queue.put(button("1", 2, True))
+    drain(queue)
+
+    assert processed == [("button", 1, True), ("button", 1, False)]
+    assert queue.get_metrics()["dropped"] == 1
+
+
+def test_nothing_is_evicted_across_input_tasks():
+    processed = []
+    queue = make_queue(processed, 2, OVERFLOW_EVICT_OR_REJECT)
+    queue.put(joystick("1", 1, 100))
+    queue.put(InputTask(print, ()), critical=True)
+
+    assert not queue.put(joystick("1", 1, 200))
+    drain(queue)
+
+    assert processed == [("joystick", 1, 100, False), ("task",)]
+
+
+def test_full_queue_of_edges_waits_for_room():
+    for policy in (OVERFLOW_EVICT_OR_BLOCK, OVERFLOW_BLOCK):
+        processed = []
+        gate = threading.Event()
+        queue = make_queue(processed, 2, policy, gate)
+        queue.start()
+        queue.put(button("1", 1, True))
+        wait_for(lambda: queue.get_metrics()["depth"] == 0)
+        queue.put(button("1", 1, False))
+        queue.put(button("1", 2, True))
+
+        producer = threading.Thread(target=queue.put, args=(button("1", 2, False),))
+        producer.start()
+        wait_for(lambda: queue.get_metrics()["blocked"] == 1)
+        assert producer.is_alive()
+
+        gate.set()
+        producer.join(5)
+        assert queue.join(5)
+        queue.stop()
+
+        assert processed == [
+            ("button", 1, True),
+            ("button", 1, False),
+            ("button", 2, True),
+            ("button", 2, False),
+        ]
+        assert queue.get_metrics()["dropped"] == 0
+
+
+def test_critical_items_are_never_rejected():
+    processed = []
+    gate = threading.Event()
+    queue = make_queue(processed, 1, OVERFLOW_EVICT_OR_REJECT, gate)
+    queue.start()
+    queue.put(button("1", 1, True))
+    wait_for(lambda: queue.get_metrics()["depth"] == 0)
+    queue.put(button("1", 1, False))
+
+    producer = threading.Thread(
+        target=queue.put, args=(InputTask(print, ()),), kwargs={"critical": True}
+    )
+    producer.start()
+    wait_for(lambda: queue.get_metrics()["blocked"] == 1)
+    gate.set()
+    producer.join(5)
+    assert queue.join(5)
+    queue.stop()
+
+    assert processed == [("button", 1, True), ("button", 1, False), ("task",)]
+    assert queue.get_metrics()["dropped"] == 0
+
+
+def test_puts_into_a_full_queue_do_not_rescan_it():
+    calls = []
+
+    def counting_key(item):
+        calls.append(item)
+        return local_message_key(item)
+
+    queue = IngestQueue(
+        lambda item: None, 100, OVERFLOW_EVICT_OR_REJECT, supersede_key=counting_key
+    )
+    for x in range(100):
+        queue.put(joystick("1", 1, x))
+    assert not calls
+
+    for x in range(100, 150):
+        assert queue.put(joystick("1", 1, x))
+
+    # One pass over the queue at the first overflow, then one call per put
+    assert len(calls) == 100 + 50
+    assert queue.get_metrics()["depth"] == 100
+    drain(queue)
+    assert queue.get_metrics()["processed"] == 100
@@ -0,0 +1,147 @@
+"""
+Input journal test
+------------------
+Writes input and key records with JournalWriter and reads them back with
+read_journal, including segment rotation and a segment still being written,
+and that JSON messages and binary frames are journaled as the same record
+kinds.
+"""
+
+import json
+
+import pytest
+
+from config.settings import SettingsManager
+from controller import GameController
+from mqtt import client
+from mqtt.frames import (
+    BUTTON_FRAME,
+    FRAME_BUTTON,
+    FRAME_JOYSTICK,
+    FRAME_STATE,
+    FRAME_VERSION,
+    JOYSTICK_FRAME,
+    STATE_FRAME,
+)
+from utils.keyboard import BACKEND_ENV_VAR, select_backend, close_backend
+from utils.key_state import key_state
+from utils.journal import (
+    HEADER_SIZE,
+    JOURNAL_RECORD,
+    RECORD_BUTTON,
+    RECORD_JOYSTICK,
+    RECORD_KEY,
+    RECORD_STATE,
+    JournalRecord,
+    JournalWriter,
+    read_journal,
+)
+
+
+@pytest.fixture
+def recorder(monkeypatch):
+    monkeypatch.delenv(BACKEND_ENV_VAR, raising=False)
+    backend = select_backend("recording")
+    yield backend
+    client.stop_journal()
+    client.controllers.clear()
+    key_state.release_all()
+    close_backend()
+
+
+def journaled_inputs(directory):
+    return [
+        (record.kind, record.pressed, record.control, record.values)
+        for record in read_journal(directory)
+        if record.kind != RECORD_KEY
+    ]
+
+
+def test_records_round_trip(tmp_path):
+    writer = JournalWriter(str(tmp_path))
+    writer.record_input(10, RECORD_BUTTON, "1", 2, True)
+    writer.record_input(20, RECORD_JOYSTICK, "controller", 1, False, (100, 900))
+    writer.record_keys(30, [(57, True), ("space", False)])
+    writer.close()
+
+    assert list(read_journal(str(tmp_path))) == [
+        JournalRecord(10, RECORD_BUTTON, True, 2, "1", (0, 0, 0, 0), 0),
+        JournalRecord(20, RECORD_JOYSTICK, False, 1, "controll", (100, 900, 0, 0), 0),
+        JournalRecord(30, RECORD_KEY, True, 0, "", (0, 0, 0, 0), 57),
+        JournalRecord(30, RECORD_KEY, False, 0, "", (0, 0, 0, 0), "space"),
+    ]
+
+
+def test_out_of_range_values_are_clamped(tmp_path):
+    writer = JournalWriter(str(tmp_path))
+    writer.record_input(10, RECORD_JOYSTICK, "1", 1, False, (40000, -40000.5, 7.9))
+    writer.close()
+
+    (record,) = read_journal(str(tmp_path))
+    assert record.values == (32767, -32768, 7, 0)
+
+
+def test_segments_rotate_and_keep_the_newest(tmp_path):
+    writer = JournalWriter(
+        str(tmp_path),
+        segment_size=HEADER_SIZE + 4 * JOURNAL_RECORD.size,
+        max_segments=2,
+    )
+    for t_ns in range(10):
+        writer.record_input(t_ns, RECORD_BUTTON, "1", 1, t_ns % 2 == 0)
+    writer.close()
+
+    assert len(list(tmp_path.glob("journal-*.bin"))) == 2
+    assert [record.t_ns for record in read_journal(str(tmp_path))] == [
+        4,
+        5,
+        6,
+        7,
+        8,
+        9,
+    ]
+    assert writer.get_metrics()["written"] == 10
+
+
+def test_open_segment_is_readable(tmp_path):
+    writer = JournalWriter(str(tmp_path))
+    writer.record_input(10, RECORD_BUTTON, "1", 1, True)
+    writer.flush()
+
+    try:
+        assert [record.t_ns for record in read_journal(str(tmp_path))] == [10]
+    finally:
+        writer.close()
+
+
+def test_json_messages_and_frames_use_the_same_record_kinds(tmp_path, recorder):
+    client.controllers["1"] = GameController("1", SettingsManager(str(tmp_path)))
+    json_dir = str(tmp_path / "json")
+    frame_dir = str(tmp_path / "frames")
+
+    client.start_journal(json_dir)
+    for topic, message in (
+        ("button", {"button": 2, "pressed": True}),
+        ("joystick", {"joystick": 1, "x": 900, "y": 100, "pressed": False}),
+    ):
+        payload = json.dumps(message).encode()
+        client.process_local_message(None, None, f"gamecontroller/1/{topic}", payload)
+    client.stop_journal()
+
+    client.start_journal(frame_dir)
+    for frame in (
+        BUTTON_FRAME.pack(FRAME_VERSION, FRAME_BUTTON, 2, 1),
+        JOYSTICK_FRAME.pack(FRAME_VERSION, FRAME_JOYSTICK, 1, 0, 900, 100),
+        STATE_FRAME.pack(FRAME_VERSION, FRAME_STATE, 0b10, 900, 100, 512, 512),
+    ):
+        client.process_local_message(None, None, "gamecontroller/1/frame", frame)
+    client.stop_journal()
+
+    expected = [
+        (RECORD_BUTTON, True, 2, (0, 0, 0, 0)),
+        (RECORD_JOYSTICK, False, 1, (900, 100, 0, 0)),
+    ]
+    assert journaled_inputs(json_dir) == expected
+    assert journaled_inputs(frame_dir) == expected + [
+        (RECORD_STATE, False, 0b10, (900, 100, 512, 512))
+    ]
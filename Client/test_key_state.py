@@ -0,0 +1,79 @@
+"""
+Key state test
+--------------
+Checks that KeyStateManager only injects on the first press and the last
+release of a shared key, using the recording keyboard backend.
+"""
+
+import pytest
+
+from utils.keyboard import (
+    BACKEND_ENV_VAR,
+    begin_batch,
+    flush_batch,
+    select_backend,
+    close_backend,
+)
+from utils.key_state import KeyStateManager
+
+
+@pytest.fixture
+def recorder(monkeypatch):
+    monkeypatch.delenv(BACKEND_ENV_VAR, raising=False)
+    backend = select_backend("recording")
+    yield backend
+    close_backend()
+
+
+def key_events(backend):
+    return [(code, down) for _, code, down in backend.get_events()]
+
+
+def test_shared_key_is_pressed_once_and_released_by_last_holder(recorder):
+    keys = KeyStateManager()
+    button = ("1", "button", 1)
+    joystick = ("1", "joystick", 1)
+
+    assert keys.press(button, "space")
+    assert not keys.press(joystick, "space")
+    assert not keys.release(button, "space")
+    assert keys.is_pressed("space")
+    assert keys.release(joystick, "space")
+
+    assert key_events(recorder) == [("space", True), ("space", False)]
+    assert keys.get_metrics() == {"held_keys": 0, "injected": 2, "suppressed": 2}
+
+
+def test_release_by_non_holder_is_ignored(recorder):
+    keys = KeyStateManager()
+    keys.press(("1", "button", 1), "a")
+
+    assert not keys.release(("2", "button", 1), "a")
+    assert not keys.release(("1", "button", 1), "b")
+    assert keys.get_holders("a") == {("1", "button", 1)}
+    assert key_events(recorder) == [("a", True)]
+
+
+def test_release_controller_keeps_keys_held_by_others(recorder):
+    keys = KeyStateManager()
+    keys.press(("1", "button", 1), "a")
+    keys.press(("2", "button", 1), "a")
+    keys.press(("1", "button", 2), "b")
+
+    keys.release_controller("1")
+
+    assert keys.get_holders("a") == {("2", "button", 1)}
+    assert not keys.is_pressed("b")
+    assert key_events(recorder) == [("a", True), ("b", True), ("b", False)]
+
+
+def test_release_joins_the_open_batch_after_its_presses(recorder):
+    keys = KeyStateManager()
+    begin_batch()
+    keys.press(("1", "button", 1), "a")
+    keys.release_all()
+    assert flush_batch() == 2
+
+    assert key_events(recorder) == [("a", True), ("a", False)]
+    assert recorder.batches == 1
+    assert keys.get_metrics()["held_keys"] == 0
@@ -0,0 +1,52 @@
+"""
+Keyboard backend selection test
+-------------------------------
+Checks the order select_backend picks a backend in: an explicit name, then
+the environment variable, then the configured name.
+"""
+
+import pytest
+
+from utils.keyboard import (
+    BACKEND_ENV_VAR,
+    select_backend,
+    close_backend,
+    get_backend_name,
+)
+
+
+@pytest.fixture(autouse=True)
+def closed_backend():
+    yield
+    close_backend()
+
+
+def test_explicit_name_wins_over_the_environment(monkeypatch):
+    monkeypatch.setenv(BACKEND_ENV_VAR, "null")
+
+    select_backend("recording", configured="null")
+
+    assert get_backend_name() == "recording"
+
+
+def test_environment_wins_over_the_configured_name(monkeypatch):
+    monkeypatch.setenv(BACKEND_ENV_VAR, "recording")
+
+    select_backend(configured="null")
+
+    assert get_backend_name() == "recording"
+
+
+def test_configured_name_is_used_without_an_override(monkeypatch):
+    monkeypatch.delenv(BACKEND_ENV_VAR, raising=False)
+
+    select_backend(configured="recording")
+
+    assert get_backend_name() == "recording"
+
+
+def test_unknown_name_is_rejected(monkeypatch):
+    monkeypatch.delenv(BACKEND_ENV_VAR, raising=False)
+
+    with pytest.raises(ValueError):
+        select_backend("typewriter")
@@ -0,0 +1,74 @@
+"""
+Linux uinput backend test
+-------------------------
+Opens the uinput backend on the write end of a pipe instead of
+/dev/uinput and checks the evdev events it writes.
+"""
+
+import os
+
+from utils import keyboard_linux
+from utils.keyboard_linux import (
+    INPUT_EVENT,
+    EV_KEY,
+    EV_SYN,
+    SYN_REPORT,
+    KEY_CODES,
+    LinuxKeyboard,
+)
+
+
+def read_events(fd):
+    """Read the pending input_event structs from a pipe"""
+    data = os.read(fd, 65536)
+    assert len(data) % INPUT_EVENT.size == 0
+    return [event[2:] for event in INPUT_EVENT.iter_unpack(data)]
+
+
+def test_send_batch_is_one_write(monkeypatch):
+    read_fd, write_fd = os.pipe()
+    writes = []
+    real_write = os.write
+
+    def counting_write(fd, data):
+        writes.append(len(data))
+        return real_write(fd, data)
+
+    monkeypatch.setattr(keyboard_linux.os, "write", counting_write)
+    try:
+        keyboard = LinuxKeyboard(fd=write_fd)
+        transitions = [
+            (KEY_CODES["w"], True),
+            (KEY_CODES["space"], True),
+            (KEY_CODES["w"], False),
+        ]
+        keyboard.send_batch(transitions)
+
+        assert writes == [INPUT_EVENT.size * (len(transitions) + 1)]
+        assert read_events(read_fd) == [
+            (EV_KEY, KEY_CODES["w"], 1),
+            (EV_KEY, KEY_CODES["space"], 1),
+            (EV_KEY, KEY_CODES["w"], 0),
+            (EV_SYN, SYN_REPORT, 0),
+        ]
+    finally:
+        os.close(read_fd)
+        os.close(write_fd)
+
+
+def test_press_and_release_end_with_syn_report():
+    read_fd, write_fd = os.pipe()
+    try:
+        keyboard = LinuxKeyboard(fd=write_fd)
+        keyboard.press_code(KEY_CODES["a"])
+        keyboard.release_code(KEY_CODES["a"])
+
+        assert read_events(read_fd) == [
+            (EV_KEY, KEY_CODES["a"], 1),
+            (EV_SYN, SYN_REPORT, 0),
+            (EV_KEY, KEY_CODES["a"], 0),
+            (EV_SYN, SYN_REPORT, 0),
+        ]
+    finally:
+        os.close(read_fd)
+        os.close(write_fd)
@@ -0,0 +1,176 @@
+"""
+Latency histogram test
+----------------------
+Checks the log-linear buckets and percentiles of LatencyHistogram and the
+per-stage and sequence accounting of LatencyTracker, including that frames
+coalesced by the ingest queue are not reported as missed.
+"""
+
+import threading
+from collections import namedtuple
+
+import pytest
+
+from config.settings import SettingsManager
+from controller import GameController
+from mqtt import client
+from mqtt.frames import FRAME_JOYSTICK, FRAME_TRAILER, FRAME_VERSION, JOYSTICK_FRAME
+from mqtt.ingest import IngestQueue
+from utils.keyboard import BACKEND_ENV_VAR, select_backend, close_backend
+from utils.key_state import key_state
+from utils.latency import (
+    SUB_BUCKETS,
+    LatencyHistogram,
+    LatencyTracker,
+    bucket_bounds,
+    bucket_index,
+)
+
+Message = namedtuple("Message", "topic payload")
+
+
+@pytest.fixture
+def recorder(monkeypatch):
+    monkeypatch.delenv(BACKEND_ENV_VAR, raising=False)
+    backend = select_backend("recording")
+    yield backend
+    client.controllers.clear()
+    key_state.release_all()
+    close_backend()
+
+
+def joystick_frame(x, sequence):
+    frame = JOYSTICK_FRAME.pack(FRAME_VERSION, FRAME_JOYSTICK, 1, 0, x, 512)
+    return frame + FRAME_TRAILER.pack(sequence, sequence * 1000)
+
+
+def test_buckets_contain_their_values_within_relative_precision():
+    values = list(range(1000)) + [2**n + d for n in range(10, 62) for d in (-1, 0, 1)]
+    for value in values:
+        low, high = bucket_bounds(bucket_index(value))
+        assert low <= value <= high
+        assert high - low <= max(low // SUB_BUCKETS, 0)
+
+
+def test_buckets_are_contiguous():
+    for index in range(SUB_BUCKETS * 8):
+        assert bucket_bounds(index + 1)[0] == bucket_bounds(index)[1] + 1
+
+
+def test_percentiles():
+    histogram = LatencyHistogram()
+    for value in range(1, 1001):
+        histogram.record(value * 1000)
+
+    for percent in (50, 99, 99.9):
+        exact = percent * 10 * 1000
+        assert exact <= histogram.percentile(percent) <= exact * (1 + 1 / SUB_BUCKETS)
+    assert histogram.percentile(100) == 1_000_000
+
+    summary = histogram.summary()
+    assert summary["count"] == 1000
+    assert summary["mean_us"] == 500.5
+    assert summary["max_us"] == 1000.0
+
+
+def test_empty_histogram():
+    histogram = LatencyHistogram()
+
+    assert histogram.percentile(99) == 0
+    assert histogram.summary()["count"] == 0
+
+
+def test_tracker_records_message_stages():
+    tracker = LatencyTracker()
+    tracker.record_message("1", 1_000, 3_000, 6_000, injected=True)
+    tracker.record_message("1", 1_000, 2_000, 3_000, injected=False)
+
+    metrics = tracker.get_metrics()["1"]
+    assert metrics["queue"]["count"] == 2
+    assert metrics["process"]["max_us"] == 3.0
+    assert metrics["inject"]["count"] == 1
+    assert metrics["inject"]["max_us"] == 5.0
+    assert "missed_frames" not in metrics
+
+
+def test_tracker_counts_missed_and_reordered_frames():
+    tracker = LatencyTracker()
+    for sequence in (1, 2, 5, 6, 4):
+        tracker.record_device("1", sequence, sequence * 1000, sequence * 1_000_000)
+    # Sequence numbers wrap around at 32 bits
+    tracker.record_device("2", 0xFFFFFFFF, 0, 0)
+    tracker.record_device("2", 0, 0, 0)
+
+    metrics = tracker.get_metrics()
+    assert metrics["1"]["missed_frames"] == 2
+    assert metrics["1"]["reordered_frames"] == 1
+    assert metrics["2"]["missed_frames"] == 0
+    assert metrics["2"]["reordered_frames"] == 0
+
+
+def test_transit_is_relative_to_the_fastest_message():
+    tracker = LatencyTracker()
+    tracker.record_device("1", 1, 1_000, 5_000_000)
+    tracker.record_device("1", 2, 2_000, 6_500_000)
+
+    transit = tracker.get_metrics()["1"]["transit"]
+    assert transit["count"] == 2
+    assert transit["max_us"] == 500.0
+
+
+def test_summaries_are_computed_outside_the_lock(monkeypatch):
+    tracker = LatencyTracker()
+    tracker.record_message("1", 1_000, 2_000, 3_000, injected=True)
+    lock_held = []
+
+    def summary(histogram):
+        lock_held.append(tracker._lock.locked())
+        return {}
+
+    monkeypatch.setattr(LatencyHistogram, "summary", summary)
+    tracker.get_metrics()
+
+    assert lock_held == [False, False, False]
+
+
+def test_snapshot_is_independent_of_later_records():
+    histogram = LatencyHistogram()
+    histogram.record(1_000)
+    snapshot = histogram.copy()
+    histogram.record(5_000)
+
+    assert snapshot.summary()["count"] == 1
+    assert snapshot.summary()["max_us"] == 1.0
+
+
+def test_coalesced_frames_are_not_counted_as_missed(tmp_path, recorder, monkeypatch):
+    client.controllers["1"] = GameController("1", SettingsManager(str(tmp_path)))
+    monkeypatch.setattr(client, "latency_tracker", LatencyTracker())
+    gate = threading.Event()
+
+    def process(item):
+        gate.wait(5)
+        client._process_queued_message(item)
+
+    queue = IngestQueue(
+        process,
+        coalesce=client.coalesce_local_messages,
+        supersede_key=client.local_message_key,
+    )
+    monkeypatch.setattr(client, "ingest_queue", queue)
+    queue.start()
+    try:
+        for sequence in range(1, 11):
+            frame = joystick_frame(512 + sequence, sequence)
+            client.on_local_message(
+                None, None, Message("gamecontroller/1/frame", frame)
+            )
+        gate.set()
+        assert queue.join(5)
+    finally:
+        queue.stop()
+
+    assert queue.get_metrics()["coalesced"] > 0
+    metrics = client.latency_tracker.get_metrics()["1"]
+    assert metrics["missed_frames"] == 0
+    assert metrics["transit"]["count"] == 10
@@ -0,0 +1,67 @@
+"""
+Log pipeline test
+-----------------
+Checks that log records are formatted and written on the listener thread,
+that the file sink appends structured fields as key=value pairs and that
+stopping the pipeline writes out everything queued.
+"""
+
+import threading
+
+import pytest
+
+from utils.log_pipeline import (
+    is_logging_started,
+    logger,
+    set_gui_sink,
+    start_logging,
+    stop_logging,
+)
+
+
+@pytest.fixture
+def log_file(tmp_path):
+    path = tmp_path / "logs" / "client.log"
+    start_logging(log_file=str(path), console=False)
+    yield path
+    stop_logging()
+    set_gui_sink(None)
+
+
+def test_structured_fields_are_written_to_the_file(log_file):
+    logger.info("Button pressed", extra={"fields": {"controller": "1", "key": "space"}})
+    logger.info("Plain line")
+    stop_logging()
+
+    lines = log_file.read_text().splitlines()
+    assert lines[0].endswith("INFO Button pressed controller=1 key=space")
+    assert lines[1].endswith("INFO Plain line")
+
+
+def test_lines_are_formatted_on_the_listener_thread(log_file):
+    threads = []
+    lines = []
+
+    def sink(line):
+        threads.append(threading.current_thread())
+        lines.append(line)
+
+    set_gui_sink(sink)
+    for n in range(100):
+        logger.info("Line %d", n)
+    stop_logging()
+
+    assert len(lines) == 100
+    assert lines[-1].endswith("] Line 99")
+    assert threading.current_thread() not in threads
+
+
+def test_start_and_stop_are_idempotent(log_file):
+    listener = start_logging(console=False)
+
+    assert start_logging(console=False) is listener
+    assert is_logging_started()
+    stop_logging()
+    stop_logging()
+    assert not is_logging_started()
+    assert not logger.handlers
@@ -0,0 +1,63 @@
+"""
+Log throttle test
+-----------------
+Checks the per-key rate limit and suppressed-line summaries of LogThrottle.
+"""
+
+from utils.log_throttle import LogThrottle
+
+
+def test_lines_over_the_rate_are_suppressed_and_summarized():
+    summaries = []
+    throttle = LogThrottle(
+        lambda key, count: summaries.append((key, count)),
+        rate=3,
+        summary_interval=60,
+    )
+
+    allowed = [throttle.allow(("1", "button")) for _ in range(5)]
+    allowed.append(throttle.allow(("2", "button")))
+    throttle.stop()
+
+    assert allowed == [True, True, True, False, False, True]
+    assert summaries == [(("1", "button"), 2)]
+    assert throttle.get_metrics() == {
+        ("1", "button"): {"logged": 3, "suppressed": 2},
+        ("2", "button"): {"logged": 1, "suppressed": 0},
+    }
+
+
+def test_window_resets_after_a_second(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("utils.log_throttle.time.monotonic", lambda: now[0])
+    throttle = LogThrottle(lambda key, count: None, rate=1, summary_interval=60)
+
+    assert throttle.allow("key")
+    assert not throttle.allow("key")
+    now[0] += 1.0
+    assert throttle.allow("key")
+    throttle.stop()
+
+
+def test_zero_rate_disables_throttling():
+    throttle = LogThrottle(lambda key, count: None, rate=0)
+
+    assert all(throttle.allow("key") for _ in range(100))
+    assert throttle.get_metrics() == {}
+
+
+def test_flush_reports_each_suppression_once():
+    summaries = []
+    throttle = LogThrottle(
+        lambda key, count: summaries.append((key, count)),
+        rate=1,
+        summary_interval=60,
+    )
+    throttle.allow("key")
+    throttle.allow("key")
+
+    throttle.flush()
+    throttle.flush()
+    throttle.stop()
+
+    assert summaries == [("key", 1)]
@@ -0,0 +1,143 @@
+"""
+Mapping reload test
+-------------------
+Checks that edited controller mapping files are picked up by the watcher
+and swapped into live controllers, and that unreadable files leave the
+current mappings in place.
+"""
+
+import json
+import os
+import threading
+import time
+
+import pytest
+
+from config.settings import SettingsManager
+from config.watcher import MappingFileWatcher
+from controller import GameController
+from mqtt import client
+from utils.keyboard import BACKEND_ENV_VAR, select_backend, close_backend
+from utils.key_state import key_state
+
+
+@pytest.fixture
+def recorder(monkeypatch):
+    monkeypatch.delenv(BACKEND_ENV_VAR, raising=False)
+    backend = select_backend("recording")
+    yield backend
+    client.stop_ingest_worker()
+    client.controllers.clear()
+    key_state.release_all()
+    close_backend()
+
+
+@pytest.fixture
+def controller(tmp_path, recorder):
+    manager = SettingsManager(str(tmp_path))
+    controller = client.controllers["1"] = GameController("1", manager)
+    # Hold button 1 (space)
+    client.handle_button_input("1", 1, True, None)
+    recorder.clear()
+    return controller
+
+
+def write_file(manager, controller_id, text):
+    path = os.path.join(manager.config_dir, f"controller_{controller_id}.json")
+    with open(path, "w") as f:
+        f.write(text)
+
+
+def write_mappings(manager, controller_id, mappings):
+    write_file(manager, controller_id, json.dumps({"key_mappings": mappings}))
+
+
+def key_events(backend):
+    return [(code, down) for _, code, down in backend.get_events()]
+
+
+def test_reload_swaps_mappings_and_releases_held_keys(controller, recorder):
+    write_mappings(controller.settings_manager, "1", {"button1": "x"})
+
+    assert client.reload_controller_mappings("1")
+
+    assert controller.key_mappings == {"button1": "x"}
+    assert controller.compiled_mappings.buttons[1] == ("x", "x")
+    assert key_events(recorder) == [("space", False)]
+    assert not controller.active_keys
+
+
+def test_unchanged_file_is_not_swapped(controller, recorder):
+    write_mappings(controller.settings_manager, "1", dict(controller.key_mappings))
+
+    assert not client.reload_controller_mappings("1")
+    assert key_events(recorder) == []
+
+
+@pytest.mark.parametrize(
+    "text", ['{"key_mappings": {"button1": ', "[]", '{"name": "Pad"}']
+)
+def test_invalid_file_keeps_the_current_mappings(controller, recorder, text):
+    mappings = dict(controller.key_mappings)
+    compiled = controller.compiled_mappings
+    write_file(controller.settings_manager, "1", text)
+
+    assert not client.reload_controller_mappings("1")
+
+    assert controller.key_mappings == mappings
+    assert controller.compiled_mappings is compiled
+    assert key_events(recorder) == []
+    assert key_state.is_pressed("space")
+
+
+def test_missing_file_keeps_the_current_mappings(controller, recorder):
+    mappings = dict(controller.key_mappings)
+
+    assert not client.reload_controller_mappings("1")
+
+    assert controller.key_mappings == mappings
+    assert key_events(recorder) == []
+
+
+def test_tables_are_compiled_on_the_watcher_thread(controller, monkeypatch):
+    compile_threads = []
+    compile_key_mappings = client.compile_key_mappings
+
+    def recording_compile(mappings):
+        compile_threads.append(threading.current_thread())
+        return compile_key_mappings(mappings)
+
+    monkeypatch.setattr(client, "compile_key_mappings", recording_compile)
+    client.start_ingest_worker()
+    write_mappings(controller.settings_manager, "1", {"button1": "x"})
+
+    assert client.reload_controller_mappings("1")
+    assert client.drain_ingest_queue(5)
+
+    assert compile_threads == [threading.current_thread()]
+    assert controller.compiled_mappings.buttons[1] == ("x", "x")
+
+
+@pytest.mark.parametrize("use_inotify", [True, False])
+def test_watcher_reports_changed_controller_files(tmp_path, use_inotify):
+    changed = []
+    seen = threading.Event()
+
+    def on_change(controller_id):
+        changed.append(controller_id)
+        seen.set()
+
+    watcher = MappingFileWatcher(
+        str(tmp_path), on_change, poll_interval=0.05, use_inotify=use_inotify
+    )
+    watcher.start()
+    try:
+        # Let the poller take its first snapshot before the write
+        time.sleep(0.1)
+        (tmp_path / "notes.json").write_text("{}")
+        (tmp_path / "controller_3.json").write_text("{}")
+        assert seen.wait(5)
+    finally:
+        watcher.stop()
+
+    assert changed == ["3"]
@@ -0,0 +1,102 @@
+"""
+Mapping profile test
+--------------------
+Checks that ProfileLibrary compiles saved profiles once and that switching
+a controller, or all of them, to a profile over the profile topics swaps in
+the precompiled tables and releases keys held under the old mappings.
+"""
+
+from collections import namedtuple
+
+import pytest
+
+from config.settings import SettingsManager
+from controller import GameController
+from controller.profiles import ProfileLibrary
+from mqtt import client
+from utils.keyboard import BACKEND_ENV_VAR, select_backend, close_backend
+from utils.key_state import key_state
+
+# Stand-in for the paho message object
+Message = namedtuple("Message", "topic payload")
+
+
+@pytest.fixture
+def recorder(monkeypatch):
+    monkeypatch.delenv(BACKEND_ENV_VAR, raising=False)
+    backend = select_backend("recording")
+    yield backend
+    client.controllers.clear()
+    key_state.release_all()
+    close_backend()
+
+
+@pytest.fixture
+def manager(tmp_path):
+    return SettingsManager(str(tmp_path))
+
+
+@pytest.fixture
+def library(manager, recorder, monkeypatch):
+    library = ProfileLibrary()
+    library.add("racing", {"button1": "up", "button2": "down"}, manager)
+    library.add("shooter", {"button1": "space"}, manager)
+    monkeypatch.setattr(client, "profile_library", library)
+    return library
+
+
+def key_events(backend):
+    return [(code, down) for _, code, down in backend.get_events()]
+
+
+def test_saved_profiles_are_loaded_and_compiled(manager, library):
+    loaded = ProfileLibrary()
+
+    assert loaded.load(manager) == 2
+    assert loaded.names() == ["racing", "shooter"]
+    racing = loaded.get("racing")
+    assert racing.key_mappings == {"button1": "up", "button2": "down"}
+    assert racing.compiled.buttons[2] == ("down", "down")
+    assert loaded.get("missing") is None
+
+
+def test_removed_profiles_are_deleted(manager, library):
+    library.remove("racing", manager)
+
+    assert library.names() == ["shooter"]
+    assert ProfileLibrary().load(manager) == 1
+
+
+def test_profile_topic_switches_one_controller(manager, library, recorder):
+    first = client.controllers["1"] = GameController("1", manager)
+    second = client.controllers["2"] = GameController("2", manager)
+    client.handle_button_input("1", 1, True, None)
+
+    client.on_local_message(None, None, Message("gamecontroller/1/profile", b"racing"))
+
+    assert first.profile == "racing"
+    assert first.compiled_mappings is library.get("racing").compiled
+    assert second.profile is None
+    # The space held under the old mappings is released
+    assert key_events(recorder) == [("space", True), ("space", False)]
+
+    client.handle_button_input("1", 1, False, None)
+    client.handle_button_input("1", 1, True, None)
+    assert key_events(recorder)[-1] == ("up", True)
+
+
+def test_profile_topic_switches_every_controller(manager, library):
+    client.controllers["1"] = GameController("1", manager)
+    client.controllers["2"] = GameController("2", manager)
+
+    client.on_local_message(None, None, Message("gamecontroller/profile", b"shooter"))
+
+    assert [c.profile for c in client.controllers.values()] == ["shooter"] * 2
+
+
+def test_unknown_profile_changes_nothing(manager, library):
+    controller = client.controllers["1"] = GameController("1", manager)
+    compiled = controller.compiled_mappings
+
+    assert client.switch_profile("missing", "1") == 0
+    assert controller.compiled_mappings is compiled
@@ -0,0 +1,141 @@
+"""
+Session replay test
+-------------------
+Captures local messages to a session file, reads it back and replays it
+through on_local_message, checking that the session round-trips and that
+replays produce the same key events every run.
+"""
+
+import json
+from collections import namedtuple
+
+import pytest
+
+from config.settings import SettingsManager
+from mqtt import client
+from mqtt.frames import encode_button_frame, encode_state_frame
+from mqtt.session import SESSION_RECORD, SessionRecorder, read_session
+from replay import (
+    ReplayBridge,
+    main,
+    prepare_messages,
+    register_session_controllers,
+    replay,
+)
+from utils.keyboard import BACKEND_ENV_VAR, select_backend, close_backend
+from utils.key_state import key_state
+
+# Stand-in for the paho message object
+Message = namedtuple("Message", "topic payload")
+
+SESSION = [
+    ("gamecontroller/register", b"new"),
+    ("gamecontroller/1/button", json.dumps({"button": 1, "pressed": True}).encode()),
+    ("gamecontroller/2/frame", encode_state_frame(0b10, (900, 512, 512, 512))),
+    ("gamecontroller/1/button", json.dumps({"button": 1, "pressed": False}).encode()),
+    ("gamecontroller/2/frame", encode_button_frame(2, False)),
+]
+
+
+@pytest.fixture
+def recorder(monkeypatch):
+    monkeypatch.delenv(BACKEND_ENV_VAR, raising=False)
+    backend = select_backend("recording")
+    yield backend
+    client.stop_session_capture()
+    client.cleanup_controllers()
+    client.controllers.clear()
+    key_state.release_all()
+    close_backend()
+
+
+@pytest.fixture
+def session_file(tmp_path, recorder):
+    path = tmp_path / "session.bin"
+    session = SessionRecorder(str(path))
+    for n, (topic, payload) in enumerate(SESSION):
+        session.record(n * 1_000_000, topic, payload)
+    session.close()
+    return path
+
+
+def key_events(backend):
+    return [(code, down) for _, code, down in backend.get_events()]
+
+
+def test_captured_session_round_trips(tmp_path, recorder):
+    path = tmp_path / "capture.bin"
+    # Registration requests need a broker connection, so leave them out
+    messages = SESSION[1:]
+
+    client.start_session_capture(str(path))
+    for topic, payload in messages:
+        client.on_local_message(None, None, Message(topic, payload))
+    client.stop_session_capture()
+
+    records = read_session(str(path))
+    assert [(topic, payload) for _, topic, payload in records] == messages
+    times = [t_ns for t_ns, _, _ in records]
+    assert times == sorted(times)
+
+
+def test_truncated_session_is_rejected(session_file):
+    data = session_file.read_bytes()
+    session_file.write_bytes(data[: -SESSION_RECORD.size])
+
+    with pytest.raises(ValueError):
+        read_session(str(session_file))
+
+
+def test_replays_are_deterministic(tmp_path, session_file, recorder):
+    settings_manager = SettingsManager(str(tmp_path / "config"))
+    messages = prepare_messages(read_session(str(session_file)))
+    bridge = ReplayBridge(settings_manager)
+
+    # Registration requests are not replayed
+    assert len(messages) == len(SESSION) - 1
+
+    runs = []
+    for _ in range(2):
+        register_session_controllers(messages, settings_manager)
+        recorder.clear()
+        replay(messages, bridge, speed=0)
+        runs.append(key_events(recorder))
+
+    assert runs[0] == [
+        ("space", True),
+        ("x", True),
+        ("d", True),
+        ("space", False),
+        ("x", False),
+    ]
+    assert runs[1] == runs[0]
+    assert sorted(client.controllers) == ["1", "2"]
+
+
+def test_command_line_writes_key_events(tmp_path, session_file, capsys):
+    keys_out = tmp_path / "keys.txt"
+
+    main(
+        [
+            str(session_file),
+            "--speed",
+            "0",
+            "--repeat",
+            "2",
+            "--ingest",
+            "--config-dir",
+            str(tmp_path / "config"),
+            "--keys-out",
+            str(keys_out),
+        ]
+    )
+
+    assert keys_out.read_text().splitlines() == [
+        "space down",
+        "x down",
+        "d down",
+        "space up",
+        "x up",
+    ]
+    assert "Replay 2/2 at max: 4 messages" in capsys.readouterr().out
@@ -0,0 +1,102 @@
+"""
+Settings cache test
+-------------------
+Checks that settings files are parsed once while unchanged, re-read after
+they change on disk or are invalidated, and that writes replace the file
+atomically and refresh the cache.
+"""
+
+import json
+import os
+
+import pytest
+
+from config import settings
+from config.settings import (
+    SettingsManager,
+    _read_json_cached,
+    _write_json_cached,
+    invalidate_settings_cache,
+)
+
+
+@pytest.fixture
+def parses(monkeypatch):
+    """Count the JSON files actually parsed"""
+    count = []
+    json_load = json.load
+
+    def counting_load(f):
+        count.append(f.name)
+        return json_load(f)
+
+    monkeypatch.setattr(settings.json, "load", counting_load)
+    yield count
+    invalidate_settings_cache()
+
+
+def test_unchanged_file_is_parsed_once(tmp_path, parses):
+    path = tmp_path / "app_settings.json"
+    path.write_text('{"gui_refresh_rate": 60}')
+
+    first = _read_json_cached(str(path))
+    second = _read_json_cached(str(path))
+
+    assert first == {"gui_refresh_rate": 60}
+    assert second is first
+    assert len(parses) == 1
+
+
+def test_changed_file_is_read_again(tmp_path, parses):
+    path = tmp_path / "app_settings.json"
+    path.write_text('{"gui_refresh_rate": 60}')
+    _read_json_cached(str(path))
+
+    path.write_text('{"gui_refresh_rate": 120}')
+    stat = os.stat(path)
+    # Same size, so only the modification time tells the versions apart
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    assert _read_json_cached(str(path)) == {"gui_refresh_rate": 120}
+    assert len(parses) == 2
+
+
+def test_invalidate_forces_a_read(tmp_path, parses):
+    path = tmp_path / "app_settings.json"
+    path.write_text("{}")
+    _read_json_cached(str(path))
+
+    invalidate_settings_cache(str(path))
+    _read_json_cached(str(path))
+
+    assert len(parses) == 2
+
+
+def test_missing_file_reads_as_none(tmp_path, parses):
+    assert _read_json_cached(str(tmp_path / "missing.json")) is None
+    assert not parses
+
+
+def test_write_replaces_the_file_and_refreshes_the_cache(tmp_path, parses):
+    path = tmp_path / "controller_1.json"
+    data = {"key_mappings": {"button1": "x"}}
+
+    _write_json_cached(str(path), data)
+
+    assert json.loads(path.read_text()) == data
+    assert _read_json_cached(str(path)) is data
+    assert not parses
+    assert os.listdir(tmp_path) == ["controller_1.json"]
+
+
+def test_manager_loads_do_not_reparse(tmp_path, parses):
+    manager = SettingsManager(str(tmp_path))
+    manager.save_controller_mappings("1", {"button1": "x"})
+    manager.save_app_settings({"gui_refresh_rate": 60})
+    parses.clear()
+
+    for _ in range(3):
+        assert manager.load_controller_mappings("1") == {"button1": "x"}
+        assert manager.load_app_settings()["gui_refresh_rate"] == 60
+
+    assert not parses
@@ -0,0 +1,88 @@
+"""
+Settings writer test
+--------------------
+Checks that SettingsWriter debounces repeated saves of a key into one write
+of the latest data, and that debounced controller mapping saves are
+written in one batch.
+"""
+
+import threading
+
+from config.settings import SettingsManager
+from config.settings_writer import SettingsWriter
+
+
+def test_repeated_saves_of_a_key_write_the_latest_once():
+    written = []
+    done = threading.Event()
+    writer = SettingsWriter(delay=0.05)
+
+    for value in range(5):
+        writer.schedule("controller", lambda value=value: written.append(value))
+    writer.schedule("other", done.set)
+    assert done.wait(5)
+    writer.stop()
+
+    assert written == [4]
+    metrics = writer.get_metrics()
+    assert metrics == {"pending": 0, "scheduled": 6, "written": 2}
+
+
+def test_writes_wait_for_the_delay():
+    written = []
+    writer = SettingsWriter(delay=60)
+
+    writer.schedule("controller", lambda: written.append("saved"))
+
+    assert not written
+    assert writer.get_metrics()["pending"] == 1
+    writer.stop()
+    assert written == ["saved"]
+
+
+def test_flush_writes_pending_changes_on_the_calling_thread():
+    threads = []
+    writer = SettingsWriter(delay=60)
+    writer.schedule("a", lambda: threads.append(threading.current_thread()))
+    writer.schedule("b", lambda: threads.append(threading.current_thread()))
+
+    writer.flush()
+
+    assert threads == [threading.current_thread()] * 2
+    assert writer.get_metrics()["pending"] == 0
+    writer.stop()
+
+
+def test_failed_write_does_not_stop_the_writer():
+    written = []
+    writer = SettingsWriter(delay=60)
+    writer.schedule("bad", lambda: 1 / 0)
+    writer.schedule("good", lambda: written.append("saved"))
+
+    writer.stop()
+
+    assert written == ["saved"]
+    assert writer.get_metrics()["written"] == 1
+
+
+def test_controller_saves_are_written_in_one_batch(tmp_path, monkeypatch):
+    manager = SettingsManager(str(tmp_path), mapping_store="sqlite")
+    writer = SettingsWriter(delay=60)
+    monkeypatch.setattr("config.settings.settings_writer", writer)
+    batches = []
+    put_many = manager.mapping_store.put_many
+
+    def record_batch(records):
+        records = list(records)
+        batches.append(sorted(controller_id for controller_id, _, _ in records))
+        put_many(records)
+
+    monkeypatch.setattr(manager.mapping_store, "put_many", record_batch)
+
+    for key in ("a", "b", "c"):
+        for controller_id in ("1", "2", "3"):
+            manager.save_controller_mappings_async(controller_id, {"button1": key})
+    writer.stop()
+
+    assert batches == [["1", "2", "3"]]
+    assert manager.load_controller_mappings("2") == {"button1": "c"}
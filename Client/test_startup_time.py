@@ -0,0 +1,94 @@
+"""
+Startup time test
+-----------------
+Imports the startup modules in fresh interpreters and checks that they stay
+within an import-time budget and do not load heavy optional modules (GUI
+toolkit, image library, MQTT library) before they are needed.
+"""
+
+import os
+import subprocess
+import sys
+
+# Seconds allowed for importing the startup modules (best of RUNS)
+IMPORT_BUDGET = 0.5
+RUNS = 3
+
+# Modules that must only be imported once they are actually used
+DEFERRED_MODULES = ["tkinter", "PIL", "paho"]
+
+PROBE = """
+import sys, time
+start = time.perf_counter()
+import {modules}
+elapsed = time.perf_counter() - start
+loaded = [m for m in {deferred!r} if m in sys.modules]
+print(elapsed, ",".join(loaded))
+"""
+
+client_dir = os.path.dirname(os.path.abspath(__file__))
+
+
+def measure(modules):
+    """Import modules in a fresh interpreter, return (seconds, deferred loaded)"""
+    results = []
+    for _ in range(RUNS):
+        output = subprocess.run(
+            [
+                sys.executable,
+                "-c",
+                PROBE.format(modules=modules, deferred=DEFERRED_MODULES),
+            ],
+            cwd=client_dir,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.split()
+        results.append((float(output[0]), output[1] if len(output) > 1 else ""))
+    return min(results)
+
+
+# Modules imported by each entry point
+STARTUP_MODULES = [
+    ("main", "main"),
+    ("headless", "headless"),
+    ("core", "mqtt.client, config.settings, controller, utils.keyboard"),
+]
+
+
+def check_startup_imports():
+    """Measure every entry point, print the results, return the failures"""
+    failures = []
+    for label, modules in STARTUP_MODULES:
+        try:
+            elapsed, loaded = measure(modules)
+        except subprocess.CalledProcessError as e:
+            print(f"[FAIL] Importing {label} failed: {e.stderr.strip()}")
+            failures.append(f"importing {label} failed")
+            continue
+
+        if elapsed <= IMPORT_BUDGET:
+            print(f"[PASS] {label} imported in {elapsed * 1000:.0f} ms")
+        else:
+            print(
+                f"[FAIL] {label} imported in {elapsed * 1000:.0f} ms "
+                f"(budget {IMPORT_BUDGET * 1000:.0f} ms)"
+            )
+            failures.append(f"{label} over the import budget")
+
+        if loaded:
+            print(f"[FAIL] {label} imported deferred modules: {loaded}")
+            failures.append(f"{label} imported {loaded}")
+        else:
+            print(f"[PASS] {label} did not import {', '.join(DEFERRED_MODULES)}")
+    return failures
+
+
+def test_startup_imports():
+    failures = check_startup_imports()
+    assert not failures, failures
+
+
+if __name__ == "__main__":
+    print("Testing startup import time...")
+    sys.exit(1 if check_startup_imports() else 0)
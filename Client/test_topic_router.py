@@ -0,0 +1,65 @@
+"""
+Topic router test
+-----------------
+Checks topic matching and the per-topic resolution cache of TopicRouter.
+"""
+
+from mqtt.router import TopicRouter
+
+
+def button_handler():
+    pass
+
+
+def register_handler():
+    pass
+
+
+def make_router(**options):
+    router = TopicRouter(**options)
+    router.add_route("gamecontroller/register", register_handler)
+    router.add_route("gamecontroller/+/button", button_handler)
+    return router
+
+
+def test_resolve_matches_patterns_and_wildcard_ids():
+    router = make_router()
+
+    assert router.resolve("gamecontroller/register") == (None, register_handler)
+    assert router.resolve("gamecontroller/7/button") == ("7", button_handler)
+    assert router.resolve("gamecontroller/7/joystick") is None
+    assert router.resolve("gamecontroller/7/button/extra") is None
+
+
+def test_resolved_topics_are_cached(monkeypatch):
+    router = make_router()
+    matched = []
+    match = router._match
+    monkeypatch.setattr(
+        router, "_match", lambda topic: matched.append(topic) or match(topic)
+    )
+
+    for _ in range(3):
+        router.resolve("gamecontroller/1/button")
+        router.resolve("unknown/topic")
+
+    assert matched == ["gamecontroller/1/button", "unknown/topic"]
+
+
+def test_add_route_invalidates_the_cache():
+    router = make_router()
+    assert router.resolve("gamecontroller/1/joystick") is None
+
+    router.add_route("gamecontroller/+/joystick", button_handler)
+
+    assert router.resolve("gamecontroller/1/joystick") == ("1", button_handler)
+
+
+def test_cache_size_is_bounded():
+    router = make_router(max_cache_size=4)
+
+    for index in range(10):
+        router.resolve(f"unknown/{index}")
+
+    assert len(router._cache) <= 4
+    assert router.resolve("gamecontroller/2/button") == ("2", button_handler)
@@ -1,4 +1,37 @@
 # Utils package
-from utils.keyboard import press_key, release_key, key_press
+from utils.keyboard import (
+    press_key,
+    release_key,
+    key_press,
+    resolve_key,
+    press_code,
+    release_code,
+    press_many,
+    release_many,
+    register_backend,
+    select_backend,
+    get_backend,
+    get_backend_name,
+    add_transition_hook,
+    remove_transition_hook,
+)
+from utils.key_state import KeyStateManager, key_state
 
-__all__ = ["press_key", "release_key", "key_press"]
+__all__ = [
+    "press_key",
+    "release_key",
+    "key_press",
+    "resolve_key",
+    "press_code",
+    "release_code",
+    "press_many",
+    "release_many",
+    "register_backend",
+    "select_backend",
+    "get_backend",
+    "get_backend_name",
+    "add_transition_hook",
+    "remove_transition_hook",
+    "KeyStateManager",
+    "key_state",
+]
@@ -0,0 +1,285 @@
+"""
+Input Journal
+-------------
+Records received input and injected key transitions as fixed-size binary
+records in memory-mapped, preallocated segment files. Appending a record
+is a struct.pack_into into the mapping, and segments are rotated when
+full, keeping only the newest ones. Journals are read back zero-copy by
+mapping the segment and unpacking records straight from the mapping.
+
+Segment layout (little-endian):
+    header  JOURNAL_HEADER  magic, version, record size, record count,
+                            wall clock and perf_counter_ns at creation
+    records JOURNAL_RECORD  t_ns, kind, pressed, control, controller ID,
+                            4 values, key code
+
+``t_ns`` is time.perf_counter_ns(); the header's clock pair converts it to
+wall clock time. Key records of backends whose key codes are names (the
+null and recording backends) store the name in the controller ID field
+and 0 as the code. A segment still being written has a record count of 0
+and ends at the first record whose kind is 0.
+"""
+
+import glob
+import mmap
+import os
+import struct
+import threading
+import time
+from collections import namedtuple
+
+JOURNAL_MAGIC = b"GCJRNL"
+JOURNAL_VERSION = 1
+
+# magic, version, record size, record count, wall time_ns, perf_counter_ns
+JOURNAL_HEADER = struct.Struct("<6sHIIqq")
+HEADER_SIZE = 64
+# t_ns, kind, pressed, control, controller ID, values[4], key code
+JOURNAL_RECORD = struct.Struct("<qBBH8s4hI")
+
+# Record kinds (inputs use the frame type numbers of mqtt/frames.py)
+RECORD_BUTTON = 1  # control = button, pressed
+RECORD_JOYSTICK = 2  # control = joystick, pressed, values = x, y
+RECORD_STATE = 3  # control = button bitmask, values = axes
+RECORD_KEY = 4  # code = native key code, pressed = down
+
+# Range of the record's value fields
+VALUE_MIN = -(1 << 15)
+VALUE_MAX = (1 << 15) - 1
+
+DEFAULT_SEGMENT_SIZE = 4 * 1024 * 1024
+DEFAULT_MAX_SEGMENTS = 16
+
+JournalRecord = namedtuple(
+    "JournalRecord",
+    ["t_ns", "kind", "pressed", "control", "controller_id", "values", "code"],
+)
+
+
+def _encode_controller_id(controller_id):
+    return str(controller_id).encode()[:8]
+
+
+def _clamp_value(value):
+    return min(max(int(value), VALUE_MIN), VALUE_MAX)
+
+
+class JournalWriter:
+    """Appends records to memory-mapped segments in a directory"""
+
+    def __init__(
+        self,
+        directory,
+        segment_size=DEFAULT_SEGMENT_SIZE,
+        max_segments=DEFAULT_MAX_SEGMENTS,
+    ):
+        self.directory = directory
+        self.records_per_segment = (segment_size - HEADER_SIZE) // JOURNAL_RECORD.size
+        self.max_segments = max_segments
+        self._lock = threading.Lock()
+        self._file = None
+        self._map = None
+        self._path = None
+        self._count = 0
+        self._sequence = 0
+
+        # Metrics
+        self.written = 0
+        self.segments = 0
+
+        os.makedirs(directory, exist_ok=True)
+        self._open_segment()
+
+    def record_input(self, t_ns, kind, controller_id, control, pressed, values=()):
+        """Append a received input record
+
+        Values outside the int16 range of the record are clamped to it.
+        """
+        v = tuple(_clamp_value(value) for value in values) + (0, 0, 0, 0)
+        self._append(
+            t_ns,
+            kind,
+            pressed,
+            control,
+            _encode_controller_id(controller_id),
+            v[0],
+            v[1],
+            v[2],
+            v[3],
+            0,
+        )
+
+    def record_keys(self, t_ns, transitions):
+        """Append one record per injected (code, down) key transition"""
+        for code, down in transitions:
+            if isinstance(code, int):
+                self._append(t_ns, RECORD_KEY, down, 0, b"", 0, 0, 0, 0, code)
+            else:
+                name = str(code).encode()[:8]
+                self._append(t_ns, RECORD_KEY, down, 0, name, 0, 0, 0, 0, 0)
+
+    def _append(self, *fields):
+        with self._lock:
+            if self._map is None:
+                return
+            if self._count >= self.records_per_segment:
+                self._close_segment()
+                self._open_segment()
+            JOURNAL_RECORD.pack_into(
+                self._map, HEADER_SIZE + self._count * JOURNAL_RECORD.size, *fields
+            )
+            self._count += 1
+            self.written += 1
+
+    def _open_segment(self):
+        self._sequence += 1
+        self._path = os.path.join(
+            self.directory,
+            f"journal-{time.strftime('%Y%m%d-%H%M%S')}-{self._sequence:04d}.bin",
+        )
+        size = HEADER_SIZE + self.records_per_segment * JOURNAL_RECORD.size
+        self._file = open(self._path, "w+b")
+        self._file.truncate(size)
+        self._map = mmap.mmap(self._file.fileno(), size)
+        JOURNAL_HEADER.pack_into(
+            self._map,
+            0,
+            JOURNAL_MAGIC,
+            JOURNAL_VERSION,
+            JOURNAL_RECORD.size,
+            0,
+            time.time_ns(),
+            time.perf_counter_ns(),
+        )
+        self._count = 0
+        self.segments += 1
+        self._remove_old_segments()
+
+    def _close_segment(self):
+        """Store the record count and trim the unused preallocated space"""
+        JOURNAL_HEADER.pack_into(
+            self._map,
+            0,
+            JOURNAL_MAGIC,
+            JOURNAL_VERSION,
+            JOURNAL_RECORD.size,
+            self._count,
+            *JOURNAL_HEADER.unpack_from(self._map, 0)[4:],
+        )
+        self._map.flush()
+        self._map.close()
+        self._file.truncate(HEADER_SIZE + self._count * JOURNAL_RECORD.size)
+        self._file.close()
+        self._map = None
+        self._file = None
+
+    def _remove_old_segments(self):
+        segments = sorted(glob.glob(os.path.join(self.directory, "journal-*.bin")))
+        for path in segments[: max(0, len(segments) - self.max_segments)]:
+            try:
+                os.remove(path)
+            except OSError as e:
+                print(f"Error removing journal segment {path}: {e}")
+
+    def flush(self):
+        """Flush written records to disk"""
+        with self._lock:
+            if self._map is not None:
+                self._map.flush()
+
+    def close(self):
+        """Finish the current segment"""
+        with self._lock:
+            if self._map is not None:
+                self._close_segment()
+
+    def get_metrics(self):
+        """Get written record and segment counts"""
+        return {
+            "written": self.written,
+            "segments": self.segments,
+            "segment": self._path,
+        }
+
+
+class JournalReader:
+    """Reads a journal segment through a read-only memory map"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, record_size, count, wall_ns, perf_ns = (
+            JOURNAL_HEADER.unpack_from(self._map, 0)
+        )
+        if magic != JOURNAL_MAGIC or record_size != JOURNAL_RECORD.size:
+            self._map.close()
+            raise ValueError(f"Not a version {JOURNAL_VERSION} journal: {path}")
+        self.version = version
+        self.wall_ns = wall_ns
+        self.perf_ns = perf_ns
+
+        available = (len(self._map) - HEADER_SIZE) // JOURNAL_RECORD.size
+        if count == 0:
+            # Segment still being written: stop at the first empty record
+            count = available
+            view = memoryview(self._map)
+            for index in range(available):
+                if view[HEADER_SIZE + index * JOURNAL_RECORD.size + 8] == 0:
+                    count = index
+                    break
+            view.release()
+        self.count = min(count, available)
+
+    def __len__(self):
+        return self.count
+
+    def raw_records(self):
+        """Iterate over raw record tuples unpacked directly from the mapping"""
+        view = memoryview(self._map)[
+            HEADER_SIZE : HEADER_SIZE + self.count * JOURNAL_RECORD.size
+        ]
+        try:
+            yield from JOURNAL_RECORD.iter_unpack(view)
+        finally:
+            view.release()
+
+    def records(self):
+        """Iterate over decoded JournalRecord entries"""
+        for (
+            t_ns,
+            kind,
+            pressed,
+            control,
+            cid,
+            v0,
+            v1,
+            v2,
+            v3,
+            code,
+        ) in self.raw_records():
+            cid = cid.rstrip(b"\0").decode()
+            if kind == RECORD_KEY and cid:
+                # Key code stored by name
+                cid, code = "", cid
+            yield JournalRecord(
+                t_ns, kind, bool(pressed), control, cid, (v0, v1, v2, v3), code
+            )
+
+    def to_wall_ns(self, t_ns):
+        """Convert a record timestamp to wall clock nanoseconds"""
+        return self.wall_ns + (t_ns - self.perf_ns)
+
+    def close(self):
+        """Unmap the segment"""
+        self._map.close()
+
+
+def read_journal(directory):
+    """Iterate over the decoded records of every segment in a directory"""
+    for path in sorted(glob.glob(os.path.join(directory, "journal-*.bin"))):
+        reader = JournalReader(path)
+        try:
+            yield from reader.records()
+        finally:
+            reader.close()
@@ -0,0 +1,119 @@
+"""
+Key State Manager
+-----------------
+Tracks which holders (a control on a controller, e.g. ``("1", "button", 2)``)
+currently hold each native key code. A key is only pressed at the OS level
+when its first holder acquires it and only released when its last holder
+lets go, so controls sharing a key never produce redundant or premature
+events.
+
+The key state may only be changed on the input thread, the thread running
+mqtt.client.process_local_message (the ingest worker when it is running).
+Presses made while handling a message are batched until the message is
+done, so a change from any other thread could reach the OS out of order
+with the holder counts, e.g. a forced release landing before a batched
+press and leaving the key down with no holder. Other threads hand such
+work to the input thread with mqtt.client.submit_input_task. The lock only
+keeps reads such as get_metrics consistent.
+"""
+
+import threading
+
+from utils.keyboard import press_code, release_code, queue_transitions
+
+
+class KeyStateManager:
+    """Reference-counts key holders and injects only on 0 <-> 1 transitions"""
+
+    def __init__(self):
+        self._holders = {}
+        self._lock = threading.Lock()
+
+        # Metrics
+        self.injected = 0
+        self.suppressed = 0
+
+    def press(self, holder, code):
+        """Acquire a key for a holder, pressing it if nobody held it yet
+
+        Returns True if an OS key press was emitted.
+        """
+        with self._lock:
+            holders = self._holders.get(code)
+            if holders is None:
+                self._holders[code] = {holder}
+                self.injected += 1
+            else:
+                holders.add(holder)
+                self.suppressed += 1
+                return False
+        press_code(code)
+        return True
+
+    def release(self, holder, code):
+        """Let go of a key for a holder, releasing it if it was the last one
+
+        Returns True if an OS key release was emitted.
+        """
+        with self._lock:
+            holders = self._holders.get(code)
+            if holders is None or holder not in holders:
+                return False
+            holders.discard(holder)
+            if holders:
+                self.suppressed += 1
+                return False
+            del self._holders[code]
+            self.injected += 1
+        release_code(code)
+        return True
+
+    def release_controller(self, controller_id):
+        """Drop every hold of a controller, releasing keys nobody else holds
+
+        The releases join the input thread's open batch, after any presses
+        already in it.
+        """
+        released = []
+        with self._lock:
+            for code, holders in list(self._holders.items()):
+                remaining = {h for h in holders if h[0] != controller_id}
+                if remaining:
+                    self._holders[code] = remaining
+                else:
+                    del self._holders[code]
+                    released.append((code, False))
+            self.injected += len(released)
+        if released:
+            queue_transitions(released)
+
+    def release_all(self):
+        """Release every held key"""
+        with self._lock:
+            released = [(code, False) for code in self._holders]
+            self._holders.clear()
+            self.injected += len(released)
+        if released:
+            queue_transitions(released)
+
+    def is_pressed(self, code):
+        """Check whether a key is currently pressed"""
+        return code in self._holders
+
+    def get_holders(self, code):
+        """Get the holders of a key"""
+        with self._lock:
+            return set(self._holders.get(code, ()))
+
+    def get_metrics(self):
+        """Get injected/suppressed event counters and the held key count"""
+        with self._lock:
+            return {
+                "held_keys": len(self._holders),
+                "injected": self.injected,
+                "suppressed": self.suppressed,
+            }
+
+
+# Process-wide key state shared by all controllers
+key_state = KeyStateManager()
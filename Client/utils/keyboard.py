@@ -1,13 +1,291 @@
+"""
+Keyboard Output Backends
+------------------------
+Key injection goes through a pluggable backend selected at startup.
+Backends are registered by name with a factory; the selection order is an
+explicitly requested name (e.g. a --backend command line flag), then the
+GAMECONTROLLER_KEYBOARD_BACKEND environment variable, then the configured
+name (from app settings), then the platform default.
+
+A backend provides resolve_key, press_code, release_code, press_key,
+release_key and send_batch, and optionally close. Key codes are backend
+specific, so the backend must be selected before controllers compile their
+mappings.
+
+Between begin_batch() and flush_batch() press_code/release_code calls on the
+same thread are collected and handed to the backend in one send_batch call.
+queue_transitions() adds to the open batch the same way, so transitions of
+one thread always reach the backend in the order they were made.
+"""
+
+import importlib
+import os
 import sys
+import threading
+import time
+
+BACKEND_ENV_VAR = "GAMECONTROLLER_KEYBOARD_BACKEND"
+
+_backend_factories = {}
+_backend = None
+_backend_name = None
+_backend_lock = threading.Lock()
+_batch_state = threading.local()
+_transition_hooks = ()
+
+
+def register_backend(name, factory):
+    """Register a keyboard backend factory under a name"""
+    _backend_factories[name] = factory
+
+
+def get_backend_names():
+    """Get the names of all registered backends"""
+    return sorted(_backend_factories)
+
+
+def default_backend_name():
+    """Get the backend name for the current platform"""
+    if sys.platform == "darwin":
+        return "mac"
+    if sys.platform == "win32":
+        return "windows"
+    if sys.platform.startswith("linux"):
+        from utils.keyboard_linux import is_available
+
+        if is_available():
+            return "linux"
+    return "null"
+
+
+def select_backend(name=None, configured=None):
+    """Create and activate a keyboard backend, returning it
+
+    ``name`` is an explicit request and wins over the environment variable,
+    which in turn wins over the ``configured`` name from app settings.
+    """
+    global _backend, _backend_name
+    name = name or os.environ.get(BACKEND_ENV_VAR) or configured
+    if not name:
+        name = default_backend_name()
+        if name == "null":
+            print(f"Unsupported platform: {sys.platform}, keys will not be injected")
+
+    if name not in _backend_factories:
+        raise ValueError(
+            f"Unknown keyboard backend '{name}' "
+            f"(available: {', '.join(get_backend_names())})"
+        )
+
+    with _backend_lock:
+        _backend = _backend_factories[name]()
+        _backend_name = name
+    return _backend
+
+
+def get_backend():
+    """Get the active backend, selecting the default one on first use"""
+    if _backend is None:
+        return select_backend()
+    return _backend
+
+
+def get_backend_name():
+    """Get the name of the active backend"""
+    get_backend()
+    return _backend_name
+
+
+def close_backend():
+    """Release resources held by the active backend"""
+    global _backend, _backend_name
+    with _backend_lock:
+        backend, _backend, _backend_name = _backend, None, None
+    if backend is not None and hasattr(backend, "close"):
+        backend.close()
+
+
+def add_transition_hook(hook):
+    """Call ``hook(transitions)`` with every list of (code, down) transitions sent"""
+    global _transition_hooks
+    _transition_hooks = _transition_hooks + (hook,)
+
+
+def remove_transition_hook(hook):
+    """Stop calling a transition hook"""
+    global _transition_hooks
+    _transition_hooks = tuple(h for h in _transition_hooks if h is not hook)
+
+
+def _notify_transition_hooks(transitions):
+    for hook in _transition_hooks:
+        try:
+            hook(transitions)
+        except Exception as e:
+            print(f"Error in key transition hook: {e}")
+
+
+def begin_batch():
+    """Start collecting key transitions on this thread until flush_batch"""
+    _batch_state.pending = []
+
+
+def flush_batch():
+    """Send the key transitions collected since begin_batch in one call
+
+    Returns the number of transitions sent.
+    """
+    pending = getattr(_batch_state, "pending", None)
+    _batch_state.pending = None
+    if pending:
+        send_transitions(pending)
+        return len(pending)
+    return 0
+
+
+def queue_transitions(transitions):
+    """Add transitions to this thread's open batch, or send them now"""
+    pending = getattr(_batch_state, "pending", None)
+    if pending is not None:
+        pending.extend(transitions)
+    else:
+        send_transitions(transitions)
+
+
+def send_transitions(transitions):
+    """Send (code, down) transitions through the backend's batch API"""
+    if _transition_hooks:
+        _notify_transition_hooks(transitions)
+    backend = get_backend()
+    send_batch = getattr(backend, "send_batch", None)
+    if send_batch is not None:
+        send_batch(transitions)
+    else:
+        for code, down in transitions:
+            if down:
+                backend.press_code(code)
+            else:
+                backend.release_code(code)
+
+
+def press_many(keys):
+    """Press several keys down with one backend call"""
+    _send_keys(keys, True)
+
+
+def release_many(keys):
+    """Release several keys with one backend call"""
+    _send_keys(keys, False)
+
+
+def _send_keys(keys, down):
+    """Resolve key names and send them as one batch"""
+    backend = get_backend()
+    transitions = []
+    for key in keys:
+        code = backend.resolve_key(key)
+        if code is not None:
+            transitions.append((code, down))
+        else:
+            print(f"Key '{key}' not supported")
+    if transitions:
+        send_transitions(transitions)
+
+
+def resolve_key(key):
+    """Resolve a key name to a native key code, or None if unsupported"""
+    return get_backend().resolve_key(key)
+
+
+def press_code(code):
+    """Press a key down by native key code"""
+    pending = getattr(_batch_state, "pending", None)
+    if pending is not None:
+        pending.append((code, True))
+    else:
+        if _transition_hooks:
+            _notify_transition_hooks(((code, True),))
+        get_backend().press_code(code)
+
+
+def release_code(code):
+    """Release a key by native key code"""
+    pending = getattr(_batch_state, "pending", None)
+    if pending is not None:
+        pending.append((code, False))
+    else:
+        if _transition_hooks:
+            _notify_transition_hooks(((code, False),))
+        get_backend().release_code(code)
+
+
+def press_key(key):
+    """Press a key down"""
+    get_backend().press_key(key)
+
+
+def release_key(key):
+    """Release a key"""
+    get_backend().release_key(key)
+
+
+def key_press(key, duration=0.1):
+    """Press and release a key with a given duration"""
+    press_key(key)
+    time.sleep(duration)
+    release_key(key)
+
+
+def _module_backend(module_name):
+    """Factory for backends implemented as modules, imported on demand"""
+    return lambda: importlib.import_module(module_name)
+
+
+def _null_backend():
+    from utils.keyboard_null import NullKeyboard
+
+    return NullKeyboard()
+
+
+def _linux_backend():
+    from utils.keyboard_linux import LinuxKeyboard
+
+    return LinuxKeyboard()
+
+
+def _recording_backend():
+    from utils.keyboard_recording import RecordingKeyboard
+
+    return RecordingKeyboard()
+
 
-# Determine which keypress module to use based on the OS
-if sys.platform == "darwin":  # macOS
-    from .keyboard_mac import press_key, release_key, key_press
-elif sys.platform == "win32":  # Windows
-    from .keyboard_win import press_key, release_key, key_press
-else:
-    print(f"Unsupported platform: {sys.platform}")
-    sys.exit(1)
+register_backend("mac", _module_backend("utils.keyboard_mac"))
+register_backend("windows", _module_backend("utils.keyboard_win"))
+register_backend("linux", _linux_backend)
+register_backend("null", _null_backend)
+register_backend("recording", _recording_backend)
 
 # Export the functions
-__all__ = ["press_key", "release_key", "key_press"]
+__all__ = [
+    "press_key",
+    "release_key",
+    "key_press",
+    "resolve_key",
+    "press_code",
+    "release_code",
+    "begin_batch",
+    "flush_batch",
+    "queue_transitions",
+    "send_transitions",
+    "add_transition_hook",
+    "remove_transition_hook",
+    "press_many",
+    "release_many",
+    "close_backend",
+    "register_backend",
+    "select_backend",
+    "get_backend",
+    "get_backend_name",
+    "get_backend_names",
+    "BACKEND_ENV_VAR",
+]
@@ -0,0 +1,190 @@
+"""
+Linux uinput keyboard backend
+-----------------------------
+Creates a virtual keyboard through /dev/uinput and emits evdev events.
+All key transitions of a batch are packed into one buffer and written with
+a single write() followed by one SYN_REPORT.
+
+The backend can be given an already open file descriptor (e.g. a pipe in
+tests) instead of a real uinput device, in which case no ioctl setup is
+performed.
+"""
+
+import fcntl
+import os
+import struct
+
+UINPUT_PATH = "/dev/uinput"
+DEVICE_NAME = b"GameController Virtual Keyboard"
+
+# Event types and codes from linux/input-event-codes.h
+EV_SYN = 0x00
+EV_KEY = 0x01
+SYN_REPORT = 0
+
+# ioctl requests from linux/uinput.h
+UI_DEV_CREATE = 0x5501
+UI_DEV_DESTROY = 0x5502
+UI_SET_EVBIT = 0x40045564
+UI_SET_KEYBIT = 0x40045565
+
+BUS_VIRTUAL = 0x06
+
+# struct input_event: struct timeval, __u16 type, __u16 code, __s32 value
+INPUT_EVENT = struct.Struct("@llHHi")
+# struct uinput_user_dev: name[80], struct input_id, ff_effects_max, abs arrays
+UINPUT_USER_DEV = struct.Struct("80sHHHHI" + "i" * 64 * 4)
+
+# Key code mappings for Linux (evdev KEY_* codes)
+KEY_CODES = {
+    "a": 30,
+    "b": 48,
+    "c": 46,
+    "d": 32,
+    "e": 18,
+    "f": 33,
+    "g": 34,
+    "h": 35,
+    "i": 23,
+    "j": 36,
+    "k": 37,
+    "l": 38,
+    "m": 50,
+    "n": 49,
+    "o": 24,
+    "p": 25,
+    "q": 16,
+    "r": 19,
+    "s": 31,
+    "t": 20,
+    "u": 22,
+    "v": 47,
+    "w": 17,
+    "x": 45,
+    "y": 21,
+    "z": 44,
+    "0": 11,
+    "1": 2,
+    "2": 3,
+    "3": 4,
+    "4": 5,
+    "5": 6,
+    "6": 7,
+    "7": 8,
+    "8": 9,
+    "9": 10,
+    "space": 57,
+    "enter": 28,
+    "tab": 15,
+    "escape": 1,
+    "backspace": 14,
+    "up": 103,
+    "down": 108,
+    "left": 105,
+    "right": 106,
+    "ctrl": 29,
+    "alt": 56,
+    "shift": 42,
+    "caps_lock": 58,
+    "f1": 59,
+    "f2": 60,
+    "f3": 61,
+    "f4": 62,
+    "f5": 63,
+    "f6": 64,
+    "f7": 65,
+    "f8": 66,
+    "f9": 67,
+    "f10": 68,
+    "f11": 87,
+    "f12": 88,
+}
+
+_SYN_EVENT = INPUT_EVENT.pack(0, 0, EV_SYN, SYN_REPORT, 0)
+
+
+def is_available(path=UINPUT_PATH):
+    """Check whether the uinput device can be opened for writing"""
+    return os.access(path, os.W_OK)
+
+
+def encode_events(transitions):
+    """Pack (code, down) transitions plus a SYN_REPORT into one buffer"""
+    buffer = bytearray(INPUT_EVENT.size * (len(transitions) + 1))
+    offset = 0
+    for code, down in transitions:
+        INPUT_EVENT.pack_into(buffer, offset, 0, 0, EV_KEY, code, 1 if down else 0)
+        offset += INPUT_EVENT.size
+    buffer[offset:] = _SYN_EVENT
+    return buffer
+
+
+class LinuxKeyboard:
+    """Virtual keyboard backed by a uinput device"""
+
+    def __init__(self, fd=None, path=UINPUT_PATH):
+        if fd is None:
+            self.fd = os.open(path, os.O_WRONLY | os.O_NONBLOCK)
+            self._owns_device = True
+            self._create_device()
+        else:
+            self.fd = fd
+            self._owns_device = False
+
+    def _create_device(self):
+        """Register the supported keys and create the virtual device"""
+        fcntl.ioctl(self.fd, UI_SET_EVBIT, EV_KEY)
+        fcntl.ioctl(self.fd, UI_SET_EVBIT, EV_SYN)
+        for code in KEY_CODES.values():
+            fcntl.ioctl(self.fd, UI_SET_KEYBIT, code)
+
+        abs_values = [0] * (64 * 4)
+        os.write(
+            self.fd,
+            UINPUT_USER_DEV.pack(DEVICE_NAME, BUS_VIRTUAL, 1, 1, 1, 0, *abs_values),
+        )
+        fcntl.ioctl(self.fd, UI_DEV_CREATE)
+
+    def resolve_key(self, key):
+        """Resolve a key name to its evdev key code, or None if unsupported"""
+        return KEY_CODES.get(key.lower()) if key else None
+
+    def send_batch(self, transitions):
+        """Emit (code, down) transitions with one write and one SYN_REPORT"""
+        if transitions:
+            os.write(self.fd, encode_events(transitions))
+
+    def press_code(self, code):
+        """Press a key down by evdev key code"""
+        self.send_batch(((code, True),))
+
+    def release_code(self, code):
+        """Release a key by evdev key code"""
+        self.send_batch(((code, False),))
+
+    def press_key(self, key):
+        """Press a key down"""
+        code = self.resolve_key(key)
+        if code is not None:
+            self.press_code(code)
+        else:
+            print(f"Key '{key}' not supported")
+
+    def release_key(self, key):
+        """Release a key"""
+        code = self.resolve_key(key)
+        if code is not None:
+            self.release_code(code)
+        else:
+            print(f"Key '{key}' not supported")
+
+    def close(self):
+        """Destroy the virtual device and close it"""
+        if self.fd is None:
+            return
+        if self._owns_device:
+            try:
+                fcntl.ioctl(self.fd, UI_DEV_DESTROY)
+            finally:
+                os.close(self.fd)
+        self.fd = None
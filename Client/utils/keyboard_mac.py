@@ -73,22 +73,51 @@ KEY_CODES = {
 }
 
 
+def resolve_key(key):
+    """Resolve a key name to its macOS key code, or None if unsupported"""
+    return KEY_CODES.get(key.lower()) if key else None
+
+
+def press_code(key_code):
+    """Press a key down by macOS key code"""
+    event = CGEventCreateKeyboardEvent(None, key_code, True)
+    CGEventPost(kCGHIDEventTap, event)
+
+
+def release_code(key_code):
+    """Release a key by macOS key code"""
+    event = CGEventCreateKeyboardEvent(None, key_code, False)
+    CGEventPost(kCGHIDEventTap, event)
+
+
+def send_batch(transitions):
+    """Post (key_code, down) transitions back to back
+
+    Quartz has no multi-event post call, so all events are created first
+    and then posted in one tight loop.
+    """
+    events = [
+        CGEventCreateKeyboardEvent(None, key_code, down)
+        for key_code, down in transitions
+    ]
+    for event in events:
+        CGEventPost(kCGHIDEventTap, event)
+
+
 def press_key(key):
     """Press a key down"""
-    if key.lower() in KEY_CODES:
-        key_code = KEY_CODES[key.lower()]
-        event = CGEventCreateKeyboardEvent(None, key_code, True)
-        CGEventPost(kCGHIDEventTap, event)
+    key_code = resolve_key(key)
+    if key_code is not None:
+        press_code(key_code)
     else:
         print(f"Key '{key}' not supported")
 
 
 def release_key(key):
     """Release a key"""
-    if key.lower() in KEY_CODES:
-        key_code = KEY_CODES[key.lower()]
-        event = CGEventCreateKeyboardEvent(None, key_code, False)
-        CGEventPost(kCGHIDEventTap, event)
+    key_code = resolve_key(key)
+    if key_code is not None:
+        release_code(key_code)
     else:
         print(f"Key '{key}' not supported")
 
@@ -0,0 +1,35 @@
+"""Keyboard backend that accepts every key and injects nothing"""
+
+
+class NullKeyboard:
+    """Backend that discards all key events
+
+    Key names are used as their own key codes, so any non-empty key
+    resolves. Useful for headless benchmarks and platforms without a
+    native backend.
+    """
+
+    def resolve_key(self, key):
+        """Resolve a key name to its code (the lowercase name)"""
+        return key.lower() if key else None
+
+    def press_code(self, code):
+        """Press a key down by code"""
+
+    def release_code(self, code):
+        """Release a key by code"""
+
+    def send_batch(self, transitions):
+        """Send (code, down) transitions in one call"""
+
+    def press_key(self, key):
+        """Press a key down"""
+        code = self.resolve_key(key)
+        if code is not None:
+            self.press_code(code)
+
+    def release_key(self, key):
+        """Release a key"""
+        code = self.resolve_key(key)
+        if code is not None:
+            self.release_code(code)
@@ -0,0 +1,60 @@
+"""Keyboard backend that records timestamped key events in memory"""
+
+import threading
+import time
+
+from utils.keyboard_null import NullKeyboard
+
+
+class RecordingKeyboard(NullKeyboard):
+    """Backend that records every press/release instead of injecting it
+
+    Each event is stored as ``(timestamp_ns, code, down)`` using
+    ``time.perf_counter_ns``, so the full input -> key path can be
+    regression-tested and benchmarked without touching the OS. ``batches``
+    counts the backend calls that produced them.
+    """
+
+    def __init__(self):
+        self.events = []
+        self.pressed = set()
+        self.batches = 0
+        self._lock = threading.Lock()
+
+    def press_code(self, code):
+        """Record a key press"""
+        with self._lock:
+            self.batches += 1
+            self.events.append((time.perf_counter_ns(), code, True))
+            self.pressed.add(code)
+
+    def release_code(self, code):
+        """Record a key release"""
+        with self._lock:
+            self.batches += 1
+            self.events.append((time.perf_counter_ns(), code, False))
+            self.pressed.discard(code)
+
+    def send_batch(self, transitions):
+        """Record (code, down) transitions with a shared timestamp"""
+        timestamp = time.perf_counter_ns()
+        with self._lock:
+            self.batches += 1
+            for code, down in transitions:
+                self.events.append((timestamp, code, down))
+                if down:
+                    self.pressed.add(code)
+                else:
+                    self.pressed.discard(code)
+
+    def get_events(self):
+        """Get a copy of the recorded events"""
+        with self._lock:
+            return list(self.events)
+
+    def clear(self):
+        """Forget all recorded events and pressed keys"""
+        with self._lock:
+            self.events.clear()
+            self.pressed.clear()
+            self.batches = 0
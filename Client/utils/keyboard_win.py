@@ -113,40 +113,61 @@ class INPUT(ctypes.Structure):
     _fields_ = (("type", wintypes.DWORD), ("union", INPUT_union))
 
 
+def resolve_key(key):
+    """Resolve a key name to its virtual-key code, or None if unsupported"""
+    return KEY_CODES.get(key.lower()) if key else None
+
+
+def _keyboard_input(vk_code, flags):
+    """Build a keyboard INPUT structure"""
+    return INPUT(
+        type=INPUT_KEYBOARD,
+        union=INPUT_union(
+            ki=KEYBDINPUT(wVk=vk_code, wScan=0, dwFlags=flags, time=0, dwExtraInfo=None)
+        ),
+    )
+
+
+def send_batch(transitions):
+    """Send (vk_code, down) transitions with a single SendInput call"""
+    count = len(transitions)
+    if not count:
+        return
+    inputs = (INPUT * count)(
+        *(
+            _keyboard_input(vk_code, 0 if down else KEYEVENTF_KEYUP)
+            for vk_code, down in transitions
+        )
+    )
+    user32.SendInput(count, inputs, ctypes.sizeof(INPUT))
+
+
+def press_code(vk_code):
+    """Press a key down by virtual-key code"""
+    x = _keyboard_input(vk_code, 0)
+    user32.SendInput(1, ctypes.byref(x), ctypes.sizeof(x))
+
+
+def release_code(vk_code):
+    """Release a key by virtual-key code"""
+    x = _keyboard_input(vk_code, KEYEVENTF_KEYUP)
+    user32.SendInput(1, ctypes.byref(x), ctypes.sizeof(x))
+
+
 def press_key(key):
     """Press a key down"""
-    if key.lower() in KEY_CODES:
-        vk_code = KEY_CODES[key.lower()]
-
-        x = INPUT(
-            type=INPUT_KEYBOARD,
-            union=INPUT_union(
-                ki=KEYBDINPUT(wVk=vk_code, wScan=0, dwFlags=0, time=0, dwExtraInfo=None)
-            ),
-        )
-        user32.SendInput(1, ctypes.byref(x), ctypes.sizeof(x))
+    vk_code = resolve_key(key)
+    if vk_code is not None:
+        press_code(vk_code)
     else:
         print(f"Key '{key}' not supported")
 
 
 def release_key(key):
     """Release a key"""
-    if key.lower() in KEY_CODES:
-        vk_code = KEY_CODES[key.lower()]
-
-        x = INPUT(
-            type=INPUT_KEYBOARD,
-            union=INPUT_union(
-                ki=KEYBDINPUT(
-                    wVk=vk_code,
-                    wScan=0,
-                    dwFlags=KEYEVENTF_KEYUP,
-                    time=0,
-                    dwExtraInfo=None,
-                )
-            ),
-        )
-        user32.SendInput(1, ctypes.byref(x), ctypes.sizeof(x))
+    vk_code = resolve_key(key)
+    if vk_code is not None:
+        release_code(vk_code)
     else:
         print(f"Key '{key}' not supported")
 
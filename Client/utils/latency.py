@@ -0,0 +1,206 @@
+"""
+Latency Histograms
+------------------
+HDR-style histograms of input latency. Values are counted in log-linear
+buckets: exact below SUB_BUCKETS, then SUB_BUCKETS buckets per power of
+two, so every value is kept within 1/SUB_BUCKETS (about 6%) of its true
+value at constant cost and memory, from nanoseconds to minutes.
+
+LatencyTracker keeps one histogram per controller and stage:
+    queue    received -> taken off the ingest queue
+    process  taken off the queue -> handled, keys sent to the backend
+    inject   received -> keys sent, for messages that changed keys
+    transit  device timestamp -> received, above the fastest message seen
+             from that controller (device clocks are not synchronized)
+
+Frames carrying a device sequence number are also checked for gaps as
+they arrive, before the ingest queue, so frames count as missed only when
+they were lost on the way; frames dropped or coalesced by the queue are
+counted by its metrics instead.
+"""
+
+import threading
+
+SUB_BUCKET_BITS = 4
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+# Enough buckets for any non-negative 64-bit value
+BUCKET_COUNT = SUB_BUCKETS * (64 - SUB_BUCKET_BITS + 1)
+
+# Percentiles reported by summaries
+PERCENTILES = ((50, "p50_us"), (99, "p99_us"), (99.9, "p999_us"))
+
+SEQUENCE_MASK = 0xFFFFFFFF
+
+
+def bucket_index(value):
+    """Get the bucket of a non-negative integer value"""
+    if value < SUB_BUCKETS:
+        return max(value, 0)
+    shift = value.bit_length() - SUB_BUCKET_BITS - 1
+    return SUB_BUCKETS * shift + (value >> shift)
+
+
+def bucket_bounds(index):
+    """Get the lowest and highest value counted in a bucket"""
+    if index < SUB_BUCKETS:
+        return index, index
+    shift = index // SUB_BUCKETS - 1
+    mantissa = index % SUB_BUCKETS + SUB_BUCKETS
+    return mantissa << shift, ((mantissa + 1) << shift) - 1
+
+
+class LatencyHistogram:
+    """Log-linear histogram of nanosecond values"""
+
+    def __init__(self):
+        self.counts = [0] * BUCKET_COUNT
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def record(self, value):
+        """Count one value"""
+        self.counts[bucket_index(value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, percent):
+        """Get the value below which ``percent`` of the values fall
+
+        Returns the highest value of the matching bucket, capped at the
+        largest recorded value.
+        """
+        if not self.count:
+            return 0
+        target = max(1, -(-self.count * percent // 100))
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= target:
+                return min(bucket_bounds(index)[1], self.max)
+        return self.max
+
+    def summary(self):
+        """Get the count, mean, percentiles and maximum in microseconds"""
+        result = {
+            "count": self.count,
+            "mean_us": round(self.total / self.count / 1000, 1) if self.count else 0,
+        }
+        for percent, name in PERCENTILES:
+            result[name] = round(self.percentile(percent) / 1000, 1)
+        result["max_us"] = round(self.max / 1000, 1)
+        return result
+
+    def copy(self):
+        """Get an independent snapshot of the histogram"""
+        snapshot = LatencyHistogram.__new__(LatencyHistogram)
+        snapshot.counts = self.counts[:]
+        snapshot.count = self.count
+        snapshot.total = self.total
+        snapshot.max = self.max
+        return snapshot
+
+    def reset(self):
+        """Forget all values"""
+        self.counts = [0] * BUCKET_COUNT
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+
+class LatencyTracker:
+    """Per-controller latency histograms and device frame sequence checks"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._sequences = {}
+        self._transit_base = {}
+        self._missed = {}
+        self._reordered = {}
+
+    def _record(self, controller_id, stage, value):
+        # Called with the lock held
+        histogram = self._histograms.get((controller_id, stage))
+        if histogram is None:
+            histogram = self._histograms[(controller_id, stage)] = LatencyHistogram()
+        histogram.record(value)
+
+    def record(self, controller_id, stage, value):
+        """Count one nanosecond latency of a controller stage"""
+        with self._lock:
+            self._record(controller_id, stage, value)
+
+    def record_message(
+        self, controller_id, received_ns, dequeued_ns, handled_ns, injected
+    ):
+        """Count the stages of one handled message (perf_counter_ns stamps)"""
+        with self._lock:
+            self._record(controller_id, "queue", dequeued_ns - received_ns)
+            self._record(controller_id, "process", handled_ns - dequeued_ns)
+            if injected:
+                self._record(controller_id, "inject", handled_ns - received_ns)
+
+    def record_device(self, controller_id, sequence, device_us, received_ns):
+        """Check a device frame's sequence number and count its transit time"""
+        offset = received_ns - device_us * 1000
+        with self._lock:
+            base = self._transit_base.get(controller_id)
+            if base is None or offset < base:
+                base = self._transit_base[controller_id] = offset
+            self._record(controller_id, "transit", offset - base)
+
+            last = self._sequences.get(controller_id)
+            self._sequences[controller_id] = sequence
+            if last is not None:
+                gap = (sequence - last - 1) & SEQUENCE_MASK
+                if gap > SEQUENCE_MASK // 2:
+                    # Older than the previous frame, or the device restarted
+                    self._reordered[controller_id] = (
+                        self._reordered.get(controller_id, 0) + 1
+                    )
+                elif gap:
+                    self._missed[controller_id] = (
+                        self._missed.get(controller_id, 0) + gap
+                    )
+
+    def get_metrics(self):
+        """Get latency summaries by controller ID and stage
+
+        Controllers that send sequence numbers also report
+        ``missed_frames`` and ``reordered_frames``. The histograms are
+        copied under the lock and summarized after releasing it, so the
+        input thread is not held up while percentiles are computed.
+        """
+        with self._lock:
+            histograms = [
+                (key, histogram.copy()) for key, histogram in self._histograms.items()
+            ]
+            frames = [
+                (
+                    controller_id,
+                    self._missed.get(controller_id, 0),
+                    self._reordered.get(controller_id, 0),
+                )
+                for controller_id in self._sequences
+            ]
+
+        metrics = {}
+        for (controller_id, stage), histogram in histograms:
+            metrics.setdefault(controller_id, {})[stage] = histogram.summary()
+        for controller_id, missed, reordered in frames:
+            controller_metrics = metrics.setdefault(controller_id, {})
+            controller_metrics["missed_frames"] = missed
+            controller_metrics["reordered_frames"] = reordered
+        return metrics
+
+    def reset(self):
+        """Forget all recorded latencies and sequence state"""
+        with self._lock:
+            self._histograms.clear()
+            self._sequences.clear()
+            self._transit_base.clear()
+            self._missed.clear()
+            self._reordered.clear()
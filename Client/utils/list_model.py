@@ -0,0 +1,43 @@
+"""
+Keyed Row Model
+---------------
+Remembers the rows currently shown in a list widget, keyed by a stable ID
+(e.g. a controller ID used as a Treeview item ID), and works out which rows
+to insert, update or remove to show a new set of rows. Widgets then only
+touch the rows that changed instead of being rebuilt on every refresh.
+"""
+
+
+class KeyedRowModel:
+    """Diffs keyed rows against the rows last shown"""
+
+    def __init__(self):
+        self.rows = {}
+
+    def diff(self, rows):
+        """Record ``rows`` (key -> values) as shown and return the changes
+
+        Returns ``(removed, added, changed)``: the keys of rows to remove,
+        and ``(key, values)`` pairs of rows to insert and rows to update.
+        """
+        removed = [key for key in self.rows if key not in rows]
+        added = []
+        changed = []
+        for key, values in rows.items():
+            current = self.rows.get(key)
+            if current is None:
+                added.append((key, values))
+            elif current != values:
+                changed.append((key, values))
+        self.rows = dict(rows)
+        return removed, added, changed
+
+    def clear(self):
+        """Forget every shown row"""
+        self.rows = {}
+
+    def __contains__(self, key):
+        return key in self.rows
+
+    def __len__(self):
+        return len(self.rows)
@@ -0,0 +1,57 @@
+"""
+Log Buffer
+----------
+A bounded ring buffer of log lines shared between the threads producing
+log messages and the GUI thread displaying them. The GUI takes the lines
+added since its last refresh in one batch, so a log view costs one widget
+insert per tick no matter how many lines arrived.
+"""
+
+import threading
+from collections import deque
+
+# Number of log lines kept in memory and in log views
+DEFAULT_MAX_LINES = 2000
+
+
+class LogBuffer:
+    """Thread-safe ring buffer of log lines with a pending-lines cursor"""
+
+    def __init__(self, max_lines=DEFAULT_MAX_LINES):
+        self.max_lines = max_lines
+        self._lines = deque(maxlen=max_lines)
+        self._pending = deque(maxlen=max_lines)
+        self._lock = threading.Lock()
+
+        # Metrics
+        self.appended = 0
+
+    def append(self, line):
+        """Add a line, dropping the oldest one once the buffer is full"""
+        with self._lock:
+            self._lines.append(line)
+            self._pending.append(line)
+            self.appended += 1
+
+    def take_pending(self):
+        """Get the lines added since the last call, at most max_lines"""
+        with self._lock:
+            if not self._pending:
+                return []
+            lines = list(self._pending)
+            self._pending.clear()
+        return lines
+
+    def get_lines(self):
+        """Get a copy of every buffered line"""
+        with self._lock:
+            return list(self._lines)
+
+    def clear(self):
+        """Drop every buffered and pending line"""
+        with self._lock:
+            self._lines.clear()
+            self._pending.clear()
+
+    def __len__(self):
+        return len(self._lines)
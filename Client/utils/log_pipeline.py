@@ -0,0 +1,141 @@
+"""
+Log Pipeline
+------------
+Moves log formatting and output off the input path. Records are put on a
+queue by a QueueHandler and written by a QueueListener thread to the
+console, a rotating log file and the GUI. Records carry structured fields
+(controller, control, key, latency_us, ...) which the file sink writes as
+``key=value`` pairs.
+"""
+
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+
+LOGGER_NAME = "gamecontroller"
+
+# Display format shared by the console and GUI sinks
+CONSOLE_FORMAT = "[%(asctime)s] %(message)s"
+CONSOLE_DATE_FORMAT = "%H:%M:%S"
+FILE_FORMAT = "%(asctime)s %(levelname)s %(message)s"
+
+DEFAULT_LOG_FILE_BYTES = 1024 * 1024
+DEFAULT_LOG_FILE_COUNT = 3
+
+logger = logging.getLogger(LOGGER_NAME)
+logger.propagate = False
+
+_listener = None
+_lock = threading.Lock()
+
+
+class StructuredFormatter(logging.Formatter):
+    """Formatter that appends a record's structured fields as key=value"""
+
+    def format(self, record):
+        line = super().format(record)
+        fields = getattr(record, "fields", None)
+        if fields:
+            line += " " + " ".join(f"{k}={v}" for k, v in fields.items())
+        return line
+
+
+class QueueOnlyHandler(logging.handlers.QueueHandler):
+    """QueueHandler that leaves all formatting to the listener thread
+
+    The stdlib QueueHandler formats each record before enqueueing it, which
+    would put the formatting cost back on the logging thread.
+    """
+
+    def prepare(self, record):
+        return record
+
+
+class CallbackHandler(logging.Handler):
+    """Sink passing formatted lines to a callback, e.g. the GUI log view"""
+
+    def __init__(self, callback=None):
+        super().__init__()
+        self.callback = callback
+
+    def emit(self, record):
+        callback = self.callback
+        if callback is None:
+            return
+        try:
+            callback(self.format(record))
+        except Exception:
+            self.handleError(record)
+
+
+# The GUI sink exists from the start; the GUI attaches to it once created
+gui_handler = CallbackHandler()
+gui_handler.setFormatter(logging.Formatter(CONSOLE_FORMAT, CONSOLE_DATE_FORMAT))
+
+
+def start_logging(
+    log_file=None,
+    console=True,
+    max_bytes=DEFAULT_LOG_FILE_BYTES,
+    backup_count=DEFAULT_LOG_FILE_COUNT,
+    level=logging.INFO,
+):
+    """Start the background listener writing to the configured sinks"""
+    global _listener
+    with _lock:
+        if _listener is not None:
+            return _listener
+
+        handlers = [gui_handler]
+        if console:
+            console_handler = logging.StreamHandler(sys.stdout)
+            console_handler.setFormatter(
+                logging.Formatter(CONSOLE_FORMAT, CONSOLE_DATE_FORMAT)
+            )
+            handlers.append(console_handler)
+        if log_file:
+            log_dir = os.path.dirname(log_file)
+            if log_dir:
+                os.makedirs(log_dir, exist_ok=True)
+            file_handler = logging.handlers.RotatingFileHandler(
+                log_file, maxBytes=max_bytes, backupCount=backup_count
+            )
+            file_handler.setFormatter(StructuredFormatter(FILE_FORMAT))
+            handlers.append(file_handler)
+
+        log_queue = queue.SimpleQueue()
+        logger.addHandler(QueueOnlyHandler(log_queue))
+        logger.setLevel(level)
+        _listener = logging.handlers.QueueListener(
+            log_queue, *handlers, respect_handler_level=True
+        )
+        _listener.start()
+        return _listener
+
+
+def stop_logging():
+    """Write out queued records and stop the listener"""
+    global _listener
+    with _lock:
+        if _listener is None:
+            return
+        _listener.stop()
+        for handler in list(logger.handlers):
+            logger.removeHandler(handler)
+        for handler in _listener.handlers:
+            if handler is not gui_handler:
+                handler.close()
+        _listener = None
+
+
+def is_logging_started():
+    """Check whether the background listener is running"""
+    return _listener is not None
+
+
+def set_gui_sink(callback):
+    """Send formatted log lines to a callback (None to detach)"""
+    gui_handler.callback = callback
@@ -0,0 +1,107 @@
+"""
+Log Throttle
+------------
+Caps how many log lines each (controller, event type) may produce per
+second. Lines over the cap are not logged; they are counted and reported
+periodically as one summary line per key. Exact logged/suppressed counts
+are kept for metrics.
+"""
+
+import threading
+import time
+from collections import Counter
+
+# Log lines allowed per (controller, event type) per second
+DEFAULT_RATE = 20
+# Seconds between summaries of suppressed lines
+DEFAULT_SUMMARY_INTERVAL = 5.0
+
+
+class LogThrottle:
+    """Per-key log rate limiter with periodic suppressed-line summaries
+
+    ``emit(key, count)`` is called from the summary thread with the number
+    of lines of a key suppressed since the previous summary.
+    """
+
+    def __init__(
+        self, emit, rate=DEFAULT_RATE, summary_interval=DEFAULT_SUMMARY_INTERVAL
+    ):
+        self.emit = emit
+        self.rate = rate
+        self.summary_interval = summary_interval
+        self._windows = {}
+        self._pending = Counter()
+        self._lock = threading.Lock()
+        self._reporter = None
+        self._stop = threading.Event()
+
+        # Metrics
+        self.logged = Counter()
+        self.suppressed = Counter()
+
+    def allow(self, key):
+        """Check whether a line for ``key`` may be logged now"""
+        if not self.rate:
+            return True
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= 1.0:
+                window = self._windows[key] = [now, 0]
+            if window[1] < self.rate:
+                window[1] += 1
+                self.logged[key] += 1
+                return True
+            self.suppressed[key] += 1
+            self._pending[key] += 1
+            if self._reporter is None:
+                self._start_reporter()
+        return False
+
+    def flush(self):
+        """Emit summaries for every key with suppressed lines"""
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+        for key, count in sorted(pending.items(), key=lambda item: str(item[0])):
+            try:
+                self.emit(key, count)
+            except Exception as e:
+                print(f"Error reporting suppressed log lines: {e}")
+
+    def stop(self):
+        """Stop the summary thread and emit the remaining summaries"""
+        self._stop.set()
+        reporter = self._reporter
+        if reporter is not None:
+            reporter.join()
+        with self._lock:
+            self._reporter = None
+        self._stop.clear()
+        self.flush()
+
+    def get_metrics(self):
+        """Get logged and suppressed line counts by key"""
+        with self._lock:
+            keys = set(self.logged) | set(self.suppressed)
+            return {
+                key: {"logged": self.logged[key], "suppressed": self.suppressed[key]}
+                for key in keys
+            }
+
+    def reset_metrics(self):
+        """Reset the logged and suppressed counters"""
+        with self._lock:
+            self.logged.clear()
+            self.suppressed.clear()
+
+    def _start_reporter(self):
+        # Called with the lock held
+        self._reporter = threading.Thread(
+            target=self._run, name="log-throttle", daemon=True
+        )
+        self._reporter.start()
+
+    def _run(self):
+        while not self._stop.wait(self.summary_interval):
+            self.flush()
@@ -0,0 +1,69 @@
+"""
+UI Event Queue
+--------------
+Collects GUI updates posted from any thread so the GUI thread can apply
+them in one batch per refresh tick. Updates posted under the same key
+replace each other, so a burst of state changes for one controller costs a
+single widget update per tick. Independent of any GUI toolkit.
+"""
+
+import itertools
+import threading
+
+
+class UIEventQueue:
+    """Thread-safe queue of pending GUI updates with per-key collapsing"""
+
+    def __init__(self):
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._unkeyed = itertools.count()
+
+        # Metrics
+        self.posted = 0
+        self.collapsed = 0
+        self.dispatched = 0
+
+    def post(self, callback, *args, key=None):
+        """Queue ``callback(*args)``, replacing a pending update with the same key
+
+        A replaced update keeps its original position in the queue.
+        """
+        if key is None:
+            key = ("unkeyed", next(self._unkeyed))
+        with self._lock:
+            if key in self._pending:
+                self.collapsed += 1
+            self._pending[key] = (callback, args)
+            self.posted += 1
+
+    def drain(self):
+        """Run every pending update on the calling thread
+
+        Returns the number of updates run.
+        """
+        with self._lock:
+            if not self._pending:
+                return 0
+            pending, self._pending = self._pending, {}
+
+        for callback, args in pending.values():
+            try:
+                callback(*args)
+            except Exception as e:
+                print(f"Error applying UI update: {e}")
+        self.dispatched += len(pending)
+        return len(pending)
+
+    def __len__(self):
+        return len(self._pending)
+
+    def get_metrics(self):
+        """Get posted/collapsed/dispatched counters and the pending count"""
+        with self._lock:
+            return {
+                "pending": len(self._pending),
+                "posted": self.posted,
+                "collapsed": self.collapsed,
+                "dispatched": self.dispatched,
+            }
@@ -31,6 +31,13 @@ String baseTopic = "gamecontroller";
 String controllerIdTopic = baseTopic + "/getid";
 String buttonTopic;
 String joystickTopic;
+String frameTopic;
+
+// Binary state frame (must match Client/mqtt/frames.py)
+// Layout: version, type, button bitmask, leftX, leftY, rightX, rightY (int16 LE)
+const uint8_t FRAME_VERSION = 1;
+const uint8_t FRAME_STATE = 3;
+const size_t STATE_FRAME_SIZE = 11;
 
 // Controller settings
 String deviceId = "";
@@ -166,6 +173,7 @@ void localCallback(char* topic, byte* payload, unsigned int length) {
     // Update MQTT topics with the new ID
     buttonTopic = baseTopic + "/" + controllerId + "/button";
     joystickTopic = baseTopic + "/" + controllerId + "/joystick";
+    frameTopic = baseTopic + "/" + controllerId + "/frame";
     
     Serial.print("Registered with local client, ID: ");
     Serial.println(controllerId);
@@ -313,6 +321,21 @@ void sendJoystickState(int joystickNum, int x, int y, bool pressed) {
   Serial.println(jsonString);
 }
 
+void sendStateFrame(uint8_t buttons, int16_t leftX, int16_t leftY, int16_t rightX, int16_t rightY) {
+  if (!connectedToLocal || controllerId == "") return;
+
+  // Full controller state in one message; the ESP32 is little-endian so the
+  // axes can be copied straight into the frame
+  uint8_t frame[STATE_FRAME_SIZE];
+  int16_t axes[4] = {leftX, leftY, rightX, rightY};
+  frame[0] = FRAME_VERSION;
+  frame[1] = FRAME_STATE;
+  frame[2] = buttons;
+  memcpy(frame + 3, axes, sizeof(axes));
+
+  localMqttClient.publish(frameTopic.c_str(), frame, STATE_FRAME_SIZE, false);
+}
+
 void simulateInputs() {
   if (millis() - lastSimulation < 2000) return; // Simulate every 2 seconds
   lastSimulation = millis();
@@ -373,54 +396,16 @@ void simulateInputs() {
 }
 
 void checkRealInputs() {
-  // Read buttons
-  bool button1 = !digitalRead(BUTTON1_PIN);
-  bool button2 = !digitalRead(BUTTON2_PIN);
-  bool button3 = !digitalRead(BUTTON3_PIN);
-  bool button4 = !digitalRead(BUTTON4_PIN);
-  
-  // Read joystick buttons
-  bool l3Button = !digitalRead(L3_BUTTON_PIN);
-  bool r3Button = !digitalRead(R3_BUTTON_PIN);
-  
-  static bool lastButton1 = false;
-  static bool lastButton2 = false;
-  static bool lastButton3 = false;
-  static bool lastButton4 = false;
-  static bool lastL3Button = false;
-  static bool lastR3Button = false;
-  
-  // Check for button state changes
-  if (button1 != lastButton1) {
-    sendButtonState(1, button1);
-    lastButton1 = button1;
-  }
-  
-  if (button2 != lastButton2) {
-    sendButtonState(2, button2);
-    lastButton2 = button2;
-  }
-  
-  if (button3 != lastButton3) {
-    sendButtonState(3, button3);
-    lastButton3 = button3;
-  }
-  
-  if (button4 != lastButton4) {
-    sendButtonState(4, button4);
-    lastButton4 = button4;
-  }
-
-  // Check for joystick button state changes
-  if (l3Button != lastL3Button) {
-    sendButtonState(5, l3Button);  // L3 is button 5
-    lastL3Button = l3Button;
-  }
+  // Read buttons into a bitmask (bit n-1 is button n)
+  uint8_t buttons = 0;
+  if (!digitalRead(BUTTON1_PIN)) buttons |= 1 << 0;
+  if (!digitalRead(BUTTON2_PIN)) buttons |= 1 << 1;
+  if (!digitalRead(BUTTON3_PIN)) buttons |= 1 << 2;
+  if (!digitalRead(BUTTON4_PIN)) buttons |= 1 << 3;
 
-  if (r3Button != lastR3Button) {
-    sendButtonState(6, r3Button);  // R3 is button 6
-    lastR3Button = r3Button;
-  }
+  // Joystick buttons: L3 is button 5, R3 is button 6
+  if (!digitalRead(L3_BUTTON_PIN)) buttons |= 1 << 4;
+  if (!digitalRead(R3_BUTTON_PIN)) buttons |= 1 << 5;
   
   // Read joysticks
   int leftX = analogRead(LEFT_VRX_PIN);
@@ -434,11 +419,8 @@ void checkRealInputs() {
   int mappedRightX = map(rightX, 0, 4095, -32768, 32767);
   int mappedRightY = map(rightY, 0, 4095, -32768, 32767);
   
-  // Send left joystick state
-  sendJoystickState(1, mappedLeftX, mappedLeftY, l3Button);
-  
-  // Send right joystick state
-  sendJoystickState(2, mappedRightX, mappedRightY, r3Button);
+  // Send the whole controller state as a single frame per tick
+  sendStateFrame(buttons, mappedLeftX, mappedLeftY, mappedRightX, mappedRightY);
 }
 
 void loop() {